@@ -0,0 +1,89 @@
+# Benchmark: !chart rendering throughput on the CPU pool's process workers (run from the repo root: `python bench/bench_chart.py`)
+# Draws a burst of charts from day-long fake price series with 1, 2, ... up to every core's worth of pre-warmed workers, and reports charts per second in total
+# and per worker process, plus how long one chart takes inline and how long a disk cache hit takes instead.
+
+# Imports
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Make `utils` importable the same way bot.py sees it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import numpy as np
+from utils import cpu_tasks
+from utils.chart import render_chart
+from utils.chart_cache import ChartCache
+from utils.cpu_pool import CPUPool
+
+# Function to make a fake day of minute prices (a random walk; each series a bit different so zlib can't cheat)
+def fake_series(seed, samples):
+    rng = np.random.default_rng(seed)
+    times = time.time() - 60.0 * np.arange(samples)[::-1]
+    prices = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, samples)))
+    return times, prices
+
+# Function to draw every series on `processes` workers (pre-warmed the way the bot does it, with the chart code already loaded) and time the burst
+async def run_processes(processes, series):
+    pool = CPUPool(threads=1, processes=processes, max_queue=len(series) + processes)
+    pool.preload(1, cpu_tasks.load_worker, (1, ['Bitcoin'], ['bitcoin']))
+
+    # Wait until every worker is up before timing (one round of tiny charts per worker)
+    await asyncio.gather(*[pool.run_in_process('warmup', render_chart, [0.0, 1.0], [1.0, 2.0], 8, 4) for _ in range(processes * 2)])
+
+    start = time.perf_counter()
+    await asyncio.gather(*[pool.run_in_process('chart', render_chart, times, prices) for times, prices in series])
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+# Function to time disk cache hits (written once, then read back over and over)
+async def run_cache(series, reads):
+    directory = tempfile.mkdtemp(prefix='chart-bench-')
+    try:
+        cache = ChartCache(directory)
+        cache.open()
+        keys = [('coin', 86400, float(times[-1]) + i) for i, (times, _) in enumerate(series)]
+        for key, (times, prices) in zip(keys, series):
+            await cache.put(key, render_chart(times, prices))
+        start = time.perf_counter()
+        for i in range(reads):
+            await cache.get(keys[i % len(keys)])
+        return (time.perf_counter() - start) / reads
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+# Main function to be ran
+def main():
+    parser = argparse.ArgumentParser(description='Chart rendering benchmark')
+    parser.add_argument('--charts', type=int, default=200, help='charts drawn per run')
+    parser.add_argument('--samples', type=int, default=1440, help='price samples per chart')
+    parser.add_argument('--max-processes', type=int, default=os.cpu_count(), help='most worker processes to try')
+    args = parser.parse_args()
+
+    series = [fake_series(i, args.samples) for i in range(args.charts)]
+
+    # One chart inline first, so the per-core numbers have something to be compared against
+    render_chart(*series[0])
+    start = time.perf_counter()
+    for times, prices in series[:20]:
+        png = render_chart(times, prices)
+    inline = (time.perf_counter() - start) / 20
+    print(f"inline      {inline * 1000:6.1f} ms per chart   {1 / inline:6.1f} charts/s   ({len(png) / 1024:.1f} KB PNG)")
+
+    # Then bursts on more and more workers (doubling, plus every core at the end)
+    counts = sorted({n for n in (1, 2, 4, 8, 16, 32, 64) if n <= args.max_processes} | {args.max_processes})
+    for processes in counts:
+        elapsed = asyncio.run(run_processes(processes, series))
+        rate = args.charts / elapsed
+        print(f"{processes:2} workers  {elapsed * 1000:6.0f} ms for {args.charts}   {rate:6.1f} charts/s   {rate / processes:6.1f} charts/s per core")
+
+    # And what a repeat of the same chart costs instead
+    hit = asyncio.run(run_cache(series[:50], 500))
+    print(f"disk cache  {hit * 1000:6.2f} ms per hit")
+
+if __name__ == '__main__':
+    main()
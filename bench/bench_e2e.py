@@ -0,0 +1,266 @@
+# Benchmark: end-to-end command latency against a local fake CoinGecko/CMC server (run from the repo root: `python bench/bench_e2e.py`)
+# Drives the real PricesCog/VolumeCog commands through fake ctx objects (nothing touches Discord or the real APIs) and reports p50/p95/p99 latency,
+# throughput and upstream call counts. Results are saved as JSON; pass an older results file with --compare to see what changed between versions.
+#
+# e.g. `python bench/bench_e2e.py --requests 2000 --concurrency 50 --latency-ms 80 --jitter-ms 30 --error-rate 0.02 --error-status 429`
+
+# Imports
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from fake_upstream import FakeUpstream, load_payloads
+
+# Paths
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+
+# Commands the benchmark knows how to drive (and what kind of argument each takes)
+COMMAND_ARGS = {
+    'price': 'name',
+    'priceid': 'id',
+    'vol24': 'name',
+    'vol24id': 'id',
+    'topcap': 'number',
+    'id': 'name',
+}
+
+# Create class (stands in for discord.ext.commands.Context; just records what the command sends)
+class FakeContext:
+
+    # Init method (set important variables)
+    def __init__(self, bot, author_id):
+        self.bot = bot
+        self.author = SimpleNamespace(id=author_id)
+        self.channel = SimpleNamespace(id=author_id)
+        self.sent = []
+
+    # Function to "send" a message (keeps the embed so the benchmark can tell answers from error embeds)
+    async def send(self, content=None, embed=None, **kwargs):
+        self.sent.append(embed.to_dict() if embed is not None else {'content': content})
+
+    # Whether the command answered with an error embed
+    def failed(self) -> bool:
+        return any(message.get('title') == 'ERROR' for message in self.sent)
+
+# Function to get the p-th percentile (nearest rank) of an already sorted list
+def percentile(values, p):
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1, round(p / 100 * len(values) + 0.5) - 1))
+    return values[rank]
+
+# Function to summarize a list of latencies (seconds in, milliseconds out)
+def summarize(latencies, errors, exceptions, elapsed=None) -> dict:
+    values = sorted(latencies)
+    summary = {
+        'count': len(values),
+        'errors': errors,
+        'exceptions': exceptions,
+        'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else None,
+        'p50_ms': round(percentile(values, 50) * 1000, 3) if values else None,
+        'p95_ms': round(percentile(values, 95) * 1000, 3) if values else None,
+        'p99_ms': round(percentile(values, 99) * 1000, 3) if values else None,
+        'max_ms': round(values[-1] * 1000, 3) if values else None,
+    }
+    if elapsed:
+        summary['throughput_per_s'] = round(len(values) / elapsed, 2)
+    return summary
+
+# Function to build the workload: (command, argument) pairs drawn from the payloads (a small "hot" set of coins gets most of the traffic, like real usage)
+def build_workload(payloads, commands_to_run, requests, hot_coins, hot_share, seed):
+    rng = random.Random(seed)
+    coins = payloads['coins_list']
+    hot = coins[:hot_coins]
+    cmc_names = [coin['name'] for coin in payloads['cmc_map']] or ['Bitcoin']
+
+    workload = []
+    for _ in range(requests):
+        command = rng.choice(commands_to_run)
+        coin = rng.choice(hot) if rng.random() < hot_share else rng.choice(coins)
+        kind = COMMAND_ARGS[command]
+        if kind == 'name':
+            argument = rng.choice(cmc_names[:hot_coins]) if command == 'id' else coin['name']
+        elif kind == 'id':
+            argument = coin['id']
+        else:
+            argument = rng.randint(1, 10)
+        workload.append((command, argument))
+    return workload
+
+# Function to run the workload with `concurrency` commands in flight at once (returns per-command results and the wall time)
+async def drive(bot, workload, concurrency):
+    queue = asyncio.Queue()
+    for job in workload:
+        queue.put_nowait(job)
+    results = {}
+
+    # Each worker plays one user firing commands back to back
+    async def worker(author_id):
+        while not queue.empty():
+            command_name, argument = queue.get_nowait()
+            command = bot.get_command(command_name)
+            ctx = FakeContext(bot, author_id)
+            entry = results.setdefault(command_name, {'latencies': [], 'errors': 0, 'exceptions': 0, 'exception_types': {}})
+            start = time.perf_counter()
+            try:
+                await command(ctx, argument)
+            except Exception as e:
+                entry['exceptions'] += 1
+                kind = f'{type(e).__name__}: {e}'[:200]
+                entry['exception_types'][kind] = entry['exception_types'].get(kind, 0) + 1
+            entry['latencies'].append(time.perf_counter() - start)
+            if ctx.failed():
+                entry['errors'] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(author_id) for author_id in range(concurrency)))
+    return results, time.perf_counter() - start
+
+# Function to get the current git commit (so saved results say which version they measured)
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Function to print how this run compares to an older results file
+def compare(report, baseline_path):
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    print(f"\nCompared to {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    rows = [('overall', report['overall'], baseline['overall'])]
+    rows += [(name, summary, baseline['commands'][name]) for name, summary in report['commands'].items() if name in baseline['commands']]
+    for name, new, old in rows:
+        changes = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_per_s'):
+            if new.get(key) is not None and old.get(key):
+                changes.append(f"{key} {old[key]} -> {new[key]} ({(new[key] - old[key]) / old[key] * 100:+.1f}%)")
+        print(f"  {name:>8}: " + ', '.join(changes))
+    old_calls, new_calls = sum(baseline['upstream']['calls'].values()), sum(report['upstream']['calls'].values())
+    print(f"  upstream calls: {old_calls} -> {new_calls}")
+
+# Function to run the whole benchmark
+async def run(args):
+    # Start the fake upstream first so the bot can be pointed at it
+    payloads = load_payloads(args.recordings, coins=args.coins, seed=args.seed)
+    server = FakeUpstream(payloads, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, error_rate=args.error_rate,
+                          error_status=args.error_status, retry_after=args.retry_after, seed=args.seed)
+    url = await server.start()
+
+    # Configure the bot through its normal env settings, then import it (the settings are read at import time)
+    snapshot_dir = tempfile.TemporaryDirectory()
+    os.environ.update({
+        'GECKO_API_URL': f'{url}/api/v3',
+        'CMC_API_URL': url,
+        'GECKO_RATE_PER_MIN': str(args.rate_per_min),
+        'CMC_RATE_PER_MIN': str(args.rate_per_min),
+        'QUOTE_TTL': str(args.quote_ttl),
+        'REGISTRY_SNAPSHOT': os.path.join(snapshot_dir.name, 'coin_registry.bin'),
+    })
+    sys.path.insert(0, SRC)
+    import discord
+    from bot import CryptoBot
+
+    bot = CryptoBot(command_prefix='/', intents=discord.Intents.default())
+    await bot.api_client.start()
+    try:
+        # Startup work the real bot does before it can answer anything
+        start = time.perf_counter()
+        await bot.data_manager.populate_cache()
+        populate_ms = (time.perf_counter() - start) * 1000
+        await bot.load_cogs()
+
+        # Warm up (connections, caches) without counting it, then measure
+        workload = build_workload(payloads, args.commands, args.requests, args.hot_coins, args.hot_share, args.seed)
+        if args.warmup:
+            await drive(bot, workload[:args.warmup], args.concurrency)
+        server.reset_counts()
+        cache = bot.quote_service.cache
+        cache.hits = cache.misses = cache.coalesced = 0
+        results, elapsed = await drive(bot, workload, args.concurrency)
+    finally:
+        await bot.api_client.close()
+        await server.stop()
+        snapshot_dir.cleanup()
+
+    # Build the report
+    every_latency = [latency for entry in results.values() for latency in entry['latencies']]
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args),
+        },
+        'startup': {'populate_cache_ms': round(populate_ms, 3), 'coins': len(bot.data_manager.registry)},
+        'overall': summarize(every_latency, sum(e['errors'] for e in results.values()), sum(e['exceptions'] for e in results.values()), elapsed),
+        'commands': {name: dict(summarize(entry['latencies'], entry['errors'], entry['exceptions']), exception_types=entry['exception_types']) for name, entry in sorted(results.items())},
+        'upstream': {'calls': dict(sorted(server.calls.items())), 'injected_errors': dict(sorted(server.errors.items()))},
+        'quote_cache': {'hits': cache.hits, 'misses': cache.misses, 'coalesced': cache.coalesced},
+        'batchers': {'markets': bot.quote_service.markets_batcher.stats(), 'simple': bot.quote_service.simple_batcher.stats()},
+        'elapsed_s': round(elapsed, 3),
+    }
+    return report
+
+# Function to print the headline numbers
+def print_report(report):
+    overall = report['overall']
+    print(f"\n{overall['count']} commands in {report['elapsed_s']}s ({overall['throughput_per_s']}/s), {overall['errors']} error embeds, {overall['exceptions']} exceptions")
+    print(f"populate_cache: {report['startup']['populate_cache_ms']:.1f} ms for {report['startup']['coins']} coins")
+    print(f"{'command':>8} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>6}")
+    for name, summary in [('overall', overall)] + list(report['commands'].items()):
+        print(f"{name:>8} {summary['count']:>6} {summary['p50_ms']:>9} {summary['p95_ms']:>9} {summary['p99_ms']:>9} {summary['max_ms']:>9} {summary['errors']:>6}")
+    print(f"upstream calls: {report['upstream']['calls']} (injected errors: {report['upstream']['injected_errors']})")
+    print(f"quote cache: {report['quote_cache']}")
+
+# Main function to be ran
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end command latency benchmark against a local fake upstream')
+    parser.add_argument('--requests', type=int, default=1000, help='commands to run (after warm-up)')
+    parser.add_argument('--concurrency', type=int, default=20, help='commands in flight at once')
+    parser.add_argument('--commands', type=lambda value: value.split(','), default=['price', 'priceid', 'vol24', 'vol24id', 'topcap'],
+                        help=f"comma-separated mix, any of {','.join(COMMAND_ARGS)}")
+    parser.add_argument('--warmup', type=int, default=50, help='commands to run before measuring')
+    parser.add_argument('--coins', type=int, default=15000, help='size of the generated /coins/list')
+    parser.add_argument('--hot-coins', type=int, default=50, help='size of the popular set of coins')
+    parser.add_argument('--hot-share', type=float, default=0.8, help='share of commands asking about a popular coin')
+    parser.add_argument('--recordings', help='folder with recorded payloads to serve instead of generated ones')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='upstream latency added to every request')
+    parser.add_argument('--jitter-ms', type=float, default=10.0, help='+/- random spread on the upstream latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='chance each upstream request fails')
+    parser.add_argument('--error-status', type=int, default=500, help='status code for injected failures (429 adds Retry-After)')
+    parser.add_argument('--retry-after', type=float, default=1, help='Retry-After seconds sent with injected 429s')
+    parser.add_argument('--rate-per-min', type=float, default=100000, help="the bot's own upstream budget (set it to the real one to include rate limiting)")
+    parser.add_argument('--quote-ttl', type=float, default=30, help="the bot's quote cache ttl (0 measures every command hitting upstream)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=os.path.join(HERE, 'results', 'e2e.json'), help='where to save the JSON results')
+    parser.add_argument('--compare', help='older results file to compare against')
+    args = parser.parse_args()
+
+    unknown = [name for name in args.commands if name not in COMMAND_ARGS]
+    if unknown:
+        parser.error(f"unknown commands: {', '.join(unknown)}")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    # Save the results
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Saved results to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == '__main__':
+    main()
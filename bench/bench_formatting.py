@@ -0,0 +1,21 @@
+# Micro-benchmark for utils.formatting (run from the repo root: `python bench/bench_formatting.py`)
+# Output equivalence with the original Decimal implementation is checked by tests/test_formatting.py; this only does the timing.
+
+# Imports
+import os
+import sys
+import timeit
+
+# Make `utils` importable the same way bot.py sees it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from utils.formatting import format_crypto_price, format_crypto_price_exact, format_prices
+
+# Time the common ranges (>= $0.01) the fast paths cover: original, fast path without the memo, and memoized
+mix = [65000.12345, 3012.5, 1.0001, 0.5123456, 0.0423, 152.37, 0.99, 7.1]
+runs = 20000
+exact = timeit.timeit(lambda: [format_crypto_price_exact(price) for price in mix], number=runs) / (runs * len(mix)) * 1e6
+fast = timeit.timeit(lambda: [format_crypto_price.__wrapped__(price) for price in mix], number=runs) / (runs * len(mix)) * 1e6
+warm = timeit.timeit(lambda: format_prices(mix), number=runs) / (runs * len(mix)) * 1e6
+print(f"original Decimal:   {exact:.3f} us/price")
+print(f"fast path:          {fast:.3f} us/price")
+print(f"memoized batch:     {warm:.3f} us/price")
@@ -0,0 +1,35 @@
+# Micro-benchmark: rebuilding + scanning every name per typo vs. the precomputed FuzzyIndex (run from the repo root: `python bench/bench_fuzzy.py`)
+
+# Imports
+import os
+import sys
+import timeit
+from rapidfuzz import process
+
+# Make `utils` importable the same way bot.py sees it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from utils.fuzzy_index import FuzzyIndex
+
+# Build a fake list of coin names roughly the size of the real one (~15k rows)
+ROWS = 15000
+names = [f'Coin Number {i}' for i in range(ROWS)] + ['Bitcoin', 'Bitcoin Cash', 'Ethereum', 'Shiba Inu', 'Dogecoin']
+index = FuzzyIndex(names)
+
+# What DataManager.get_corrected_name used to do on every miss
+def old_search(query):
+    lowercase_name_list = [name.lower() for name in names]
+    return process.extract(query.lower(), lowercase_name_list, limit=3)
+
+# Typos to try (the top suggestion should match the old path for each of them)
+queries = ['bitcoim', 'etherium', 'shiba inuu', 'dogecoinn', 'coin numbr 1234']
+for query in queries:
+    assert old_search(query)[0][0] == index.search(query)[0][0], query
+
+# Time both (report microseconds per typo lookup)
+build = timeit.timeit(lambda: FuzzyIndex(names), number=3) / 3 * 1e3
+print(f"rows:          {len(names)}")
+print(f"index build:   {build:.1f} ms (once per cache refresh)")
+for query in queries:
+    old = timeit.timeit(lambda: old_search(query), number=10) / 10 * 1e6
+    new = timeit.timeit(lambda: index.search(query), number=1000) / 1000 * 1e6
+    print(f"{query!r:18} old {old:9.1f} us   new {new:7.1f} us   {old / new:5.0f}x")
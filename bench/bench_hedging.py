@@ -0,0 +1,98 @@
+# Benchmark: quote latency with and without hedged requests while CoinGecko has a slow tail (run from the repo root: `python bench/bench_hedging.py`)
+# Serves both providers from the local fake upstream with a small chance of a CoinGecko request stalling, fires single-coin /coins/markets lookups at it
+# through Providers (the way the quote batcher does), and reports p50/p95/p99 latency plus how many extra upstream requests the hedging cost.
+
+# Imports
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from fake_upstream import FakeUpstream, load_payloads
+
+# Where the bot's code lives (imported after the fake upstream is up, since the base urls are read at import time)
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Function to get the p-th percentile (nearest rank) of an already sorted list
+def percentile(values, p):
+    rank = max(0, min(len(values) - 1, round(p / 100 * len(values) + 0.5) - 1))
+    return values[rank]
+
+# Function to run one mode (fresh client and latency windows, warmed up until hedging has its samples, then measured)
+async def run_mode(hedging, args, payloads, server, coin_ids):
+    from utils.api_client import APIClient
+    from utils.coin_xref import build_cross_reference
+    from utils.providers import PROVIDER_HEDGES, Providers
+
+    api_client = APIClient(gecko_rate_per_min=600000, cmc_rate_per_min=600000, burst=1000, max_queue=100000)
+    await api_client.start()
+    providers = Providers(api_client, hedging=hedging, min_samples=args.min_samples)
+    coins = payloads['coins_list']
+    providers.cross_reference.swap(*build_cross_reference([c['id'] for c in coins], [c['symbol'] for c in coins], [c['name'] for c in coins], payloads['cmc_map']), (1, 0))
+    rng = random.Random(args.seed)
+
+    # Each worker plays one command asking for one coin at a time
+    async def worker(count, latencies):
+        for _ in range(count):
+            start = time.perf_counter()
+            await providers.markets([rng.choice(coin_ids)])
+            latencies.append(time.perf_counter() - start)
+
+    async def drive(requests):
+        latencies = []
+        await asyncio.gather(*(worker(requests // args.concurrency, latencies) for _ in range(args.concurrency)))
+        return sorted(latencies)
+
+    try:
+        await drive(args.warmup)
+        server.reset_counts()
+        hedges_before = sum(child.value for child in PROVIDER_HEDGES.children.values())
+        cmc_before = sum(child.value for labels, child in PROVIDER_HEDGES.children.items() if labels[1] == 'cmc')
+        start = time.perf_counter()
+        latencies = await drive(args.requests)
+        elapsed = time.perf_counter() - start
+        hedges = sum(child.value for child in PROVIDER_HEDGES.children.values()) - hedges_before
+        cmc_wins = sum(child.value for labels, child in PROVIDER_HEDGES.children.items() if labels[1] == 'cmc') - cmc_before
+    finally:
+        await api_client.close()
+
+    calls = sum(server.calls.values())
+    print(f"hedging {'on ' if hedging else 'off'}  p50 {percentile(latencies, 50) * 1000:7.1f} ms  p95 {percentile(latencies, 95) * 1000:7.1f} ms  "
+          f"p99 {percentile(latencies, 99) * 1000:7.1f} ms  max {latencies[-1] * 1000:7.1f} ms  | {len(latencies) / elapsed:6.1f} req/s  "
+          f"upstream calls {calls} (+{(calls - len(latencies)) / len(latencies) * 100:.1f}%)  hedges {hedges}" + (f" (CMC answered first in {cmc_wins})" if hedging else ""))
+
+# Function to run both modes against the same fake upstream
+async def run(args):
+    payloads = load_payloads(coins=2000, seed=args.seed)
+    server = FakeUpstream(payloads, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, seed=args.seed,
+                          stall_rate=args.stall_rate, stall_latency=args.stall_ms / 1000, stall_prefix='/api/v3')
+    url = await server.start()
+    os.environ.update({'GECKO_API_URL': f'{url}/api/v3', 'CMC_API_URL': url})
+    sys.path.insert(0, SRC)
+
+    # Only coins CMC knows about, so every request has somewhere to hedge to
+    coin_ids = [entry['slug'] for entry in payloads['cmc_map']]
+    print(f"CoinGecko: {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, {args.stall_rate * 100:.1f}% of requests stall {args.stall_ms:.0f} ms; CoinMarketCap: {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms")
+    try:
+        for hedging in (False, True):
+            await run_mode(hedging, args, payloads, server, coin_ids)
+    finally:
+        await server.stop()
+
+# Main function to be ran
+def main():
+    parser = argparse.ArgumentParser(description='Hedged request benchmark against a local fake upstream')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--stall-rate', type=float, default=0.03)
+    parser.add_argument('--stall-ms', type=float, default=1000.0)
+    parser.add_argument('--min-samples', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
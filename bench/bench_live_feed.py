@@ -0,0 +1,87 @@
+# Benchmark: live ticker feed ingest throughput (run from the repo root: `python bench/bench_live_feed.py`)
+# First times the ingest step on its own (parsing a message and updating the price table and history), then connects a LiveFeed to the fake ticker feed
+# running in its own process at a few message rates and reports how many ticks per second actually made it into the table, and finally drops the
+# connection every so often to check that reconnecting keeps prices flowing.
+
+# Imports
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+from fake_ticker_feed import generate_ticks
+
+# Make `utils` importable the same way bot.py sees it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from utils.live_feed import DEFAULT_PAIRS, LiveFeed, LivePrices
+from utils.price_history import PriceHistory
+
+# Where the stand-in server script is
+FEED_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_ticker_feed.py')
+
+# Function to get a free local port for the server process
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+# Function to make a price table the way the bot does (recording into a price history)
+def make_prices():
+    history = PriceHistory()
+    history.open()
+    return LivePrices(history=history)
+
+# Function to time the ingest step alone
+def run_ingest(ticks):
+    feed = LiveFeed('ws://unused', DEFAULT_PAIRS, make_prices())
+    for raw in ticks[:1000]:
+        feed.ingest(raw)
+    start = time.perf_counter()
+    for raw in ticks:
+        feed.ingest(raw)
+    elapsed = time.perf_counter() - start
+    print(f"ingest only          {elapsed / len(ticks) * 1e6:6.2f} us per message   {len(ticks) / elapsed:9.0f} msg/s")
+
+# Function to stream from a fake feed process for a while and count what arrived (returns the feed, so its counters can be read)
+async def run_socket(label, seconds, rate, drop_after=None):
+    port = free_port()
+    command = [sys.executable, FEED_SCRIPT, '--port', str(port), '--rate', str(rate)] + (['--drop-after', str(drop_after)] if drop_after else [])
+    server = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE)
+    await server.stdout.readline() # "Serving ..." once it's listening
+    feed = LiveFeed(f'ws://127.0.0.1:{port}/stream', DEFAULT_PAIRS, make_prices(), name='fake', backoff=0.05, max_backoff=0.5)
+    try:
+        feed.start()
+        while feed.ticks == 0:
+            await asyncio.sleep(0.01)
+        ticks_before, start = feed.ticks, time.perf_counter()
+        await asyncio.sleep(seconds)
+        ticks, elapsed = feed.ticks - ticks_before, time.perf_counter() - start
+    finally:
+        await feed.close()
+        server.terminate()
+        await server.wait()
+    print(f"{label:20} {ticks / elapsed:9.0f} ticks/s in   ({feed.connects} connections, {feed.bad_messages} bad messages, {feed.prices.fresh()} coins fresh)")
+    return feed
+
+# Function to run every socket case on one event loop
+async def run_sockets(args):
+    for rate in args.rates:
+        await run_socket(f"socket {rate:g} msg/s" if rate else 'socket max rate', args.seconds, rate)
+    await run_socket(f"drop every {args.drop_after}", args.seconds, args.drop_rate, drop_after=args.drop_after)
+
+# Main function to be ran
+def main():
+    parser = argparse.ArgumentParser(description='Live ticker feed ingest benchmark')
+    parser.add_argument('--ticks', type=int, default=100000, help='messages for the ingest-only run')
+    parser.add_argument('--rates', type=lambda text: [float(rate) for rate in text.split(',')], default=[100.0, 1000.0, 10000.0, 0.0], help='feed rates to try (0 for as fast as possible)')
+    parser.add_argument('--seconds', type=float, default=3.0, help='how long each socket run lasts')
+    parser.add_argument('--drop-after', type=int, default=2000, help='messages per connection in the reconnect run')
+    parser.add_argument('--drop-rate', type=float, default=5000.0, help='feed rate in the reconnect run')
+    args = parser.parse_args()
+
+    run_ingest(generate_ticks(count=args.ticks))
+    asyncio.run(run_sockets(args))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# Micro-benchmark: old full-column df scan vs. the hashed CoinRegistry indexes (run from the repo root: `python bench/bench_lookup.py`)
+
+# Imports
+import os
+import sys
+import timeit
+import pandas as pd
+
+# Make `utils` importable the same way bot.py sees it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from utils.coin_registry import CoinRegistry
+
+# Build a fake /coins/list roughly the size of the real one (~15k rows)
+ROWS = 15000
+df = pd.DataFrame([{'id': f'coin-{i}', 'symbol': f'c{i}', 'name': f'Coin Number {i}'} for i in range(ROWS)])
+registry = CoinRegistry.from_df(df)
+
+# The lookup DataManager.get_coin_name used to do on every command
+def old_lookup(name):
+    match = df[df['name'].str.lower() == name.lower()]
+    return match.iloc[0]['id'] if not match.empty else None
+
+# The lookup it does now
+def new_lookup(name):
+    row = registry.row_for_name(name)
+    return registry.ids[row] if row is not None else None
+
+# Both must agree before timing anything
+query = f'coin number {ROWS // 2}'
+assert old_lookup(query) == new_lookup(query)
+assert old_lookup('not a coin') is None and new_lookup('not a coin') is None
+
+# Time both (report microseconds per lookup)
+old_runs, new_runs = 50, 200000
+old = timeit.timeit(lambda: old_lookup(query), number=old_runs) / old_runs * 1e6
+new = timeit.timeit(lambda: new_lookup(query), number=new_runs) / new_runs * 1e6
+build = timeit.timeit(lambda: CoinRegistry.from_df(df), number=5) / 5 * 1e3
+
+print(f"rows:            {ROWS}")
+print(f"index build:     {build:.1f} ms (once per cache refresh)")
+print(f"df scan lookup:  {old:.1f} us")
+print(f"indexed lookup:  {new:.3f} us")
+print(f"speedup:         {old / new:.0f}x")
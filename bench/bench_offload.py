@@ -0,0 +1,94 @@
+# Benchmark: fuzzy search and big JSON parsing on the event loop vs. on the CPU pool (run from the repo root: `python bench/bench_offload.py`)
+# Fires a burst of concurrent typo lookups, then one coin-list-sized JSON parse, and reports how long each took and the worst event loop lag for each mode
+# (inline is what happened before the pool; lag is how long a heartbeat or any other command would have been stuck behind the work). Thread mode runs
+# the searches on the pool's threads instead of process workers: rapidfuzz and json.loads hold the GIL for the whole call, so threads don't help either.
+
+# Imports
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Make `utils` importable the same way bot.py sees it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from utils.coin_registry import CoinRegistry
+from utils.cpu_pool import CPUPool
+from utils.data_manager import DataManager
+
+# Typos to look up (cycled through)
+QUERIES = ['bitcoim', 'etherium', 'shiba inuu', 'dogecoinn', 'coin numbr 1234', 'solanna', 'cardanno']
+
+# Function to watch how late the event loop wakes up (the worst lag is how long anything blocked it)
+async def loop_lag(stop, interval=0.001):
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+async def run_mode(mode, args, ids, names, body):
+    # Set up a DataManager the way the bot does for this mode
+    pool = None
+    if mode != 'inline':
+        pool = CPUPool(threads=args.threads, processes=args.processes if mode == 'process' else 0, max_queue=args.searches + 8)
+    data_manager = DataManager(None, cpu_pool=pool)
+    if mode == 'thread':
+        async def thread_search(registry, version, kind, query, limit=3):
+            index = registry.name_search if kind == 'name' else registry.id_search
+            return await pool.run('fuzzy', index.search, query, limit)
+        data_manager.fuzzy_search = thread_search
+    data_manager.swap_registry(CoinRegistry(ids, ids, names))
+
+    # Process workers spawn and build their indexes in the background; wait for them so we time the steady state
+    if mode == 'process':
+        await data_manager.preloading
+        await pool.run_in_process('warmup', int)
+
+    registry, version = data_manager.registry, data_manager.registry_version
+
+    # Function to parse the body on the event loop, or on a pool thread
+    async def parse():
+        if mode == 'inline':
+            return json.loads(body)
+        return await pool.run('json', json.loads, body)
+
+    # Burst of typo lookups, then one big parse (separately, since they behave differently off the loop)
+    scenarios = [('searches', lambda: asyncio.gather(*[data_manager.fuzzy_search(registry, version, 'name', QUERIES[i % len(QUERIES)]) for i in range(args.searches)]))]
+    if mode != 'process':
+        scenarios.append(('json', parse))
+    for label, work in scenarios:
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(loop_lag(stop))
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        await work()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        worst_lag = await lag_task
+        print(f"{mode:8} {label:8} {elapsed * 1000:7.1f} ms   worst event loop lag {worst_lag * 1000:6.1f} ms")
+
+    if pool is not None:
+        pool.close()
+
+# Main function to be ran
+def main():
+    parser = argparse.ArgumentParser(description='CPU offload benchmark')
+    parser.add_argument('--rows', type=int, default=15000, help='coins in the fake registry')
+    parser.add_argument('--searches', type=int, default=200, help='concurrent typo lookups')
+    parser.add_argument('--threads', type=int, default=2)
+    parser.add_argument('--processes', type=int, default=2)
+    args = parser.parse_args()
+
+    # Fake registry and a coin list body roughly the size of the real /coins/list response
+    ids = [f'coin-number-{i}' for i in range(args.rows)] + ['bitcoin', 'ethereum', 'shiba-inu', 'dogecoin', 'solana', 'cardano']
+    names = [f'Coin Number {i}' for i in range(args.rows)] + ['Bitcoin', 'Ethereum', 'Shiba Inu', 'Dogecoin', 'Solana', 'Cardano']
+    body = json.dumps([{'id': coin_id, 'symbol': coin_id[:4], 'name': name} for coin_id, name in zip(ids, names)] * 4).encode()
+
+    for mode in ('inline', 'thread', 'process'):
+        asyncio.run(run_mode(mode, args, ids, names, body))
+
+if __name__ == '__main__':
+    main()
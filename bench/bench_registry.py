@@ -0,0 +1,85 @@
+# Benchmark: the old pandas DataFrame registry vs. the array-backed CoinRegistry (import time, RSS and lookup latency; run from the repo root: `python bench/bench_registry.py`)
+# Each variant runs in its own fresh interpreter so imports and memory don't bleed into each other. pandas is only needed for the "df" side.
+
+# Imports
+import json
+import os
+import subprocess
+import sys
+import time
+import timeit
+
+# Paths
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+
+# Size of the fake /coins/list (roughly the real one)
+ROWS = 15000
+
+# Function to read this process's current resident set size in MB
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# Function to build and measure one variant (runs in the child interpreter, prints one JSON line)
+def child(variant):
+    records = [{'id': f'coin-{i}', 'symbol': f'c{i}', 'name': f'Coin Number {i}'} for i in range(ROWS)]
+    query = f'coin number {ROWS // 2}'
+    base_rss = rss_mb()
+
+    # Import + build + lookup for the old DataFrame version
+    if variant == 'df':
+        start = time.perf_counter()
+        import pandas as pd
+        import_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        df = pd.DataFrame(records)
+        build_ms = (time.perf_counter() - start) * 1000
+        def lookup():
+            match = df[df['name'].str.lower() == query]
+            return match.iloc[0]['id'] if not match.empty else None
+        runs = 50
+
+    # Import + build + lookup for the registry
+    else:
+        sys.path.insert(0, SRC)
+        start = time.perf_counter()
+        from utils.coin_registry import CoinRegistry
+        import_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        registry = CoinRegistry.from_records(records)
+        build_ms = (time.perf_counter() - start) * 1000
+        def lookup():
+            row = registry.row_for_name(query)
+            return registry.ids[row] if row is not None else None
+        runs = 200000
+
+    # Drop the source records so only the structure itself counts towards memory
+    del records
+    assert lookup() == f'coin-{ROWS // 2}'
+    lookup_us = timeit.timeit(lookup, number=runs) / runs * 1e6
+    print(json.dumps({'import_ms': import_ms, 'build_ms': build_ms, 'rss_mb': rss_mb() - base_rss, 'lookup_us': lookup_us, 'pandas_loaded': 'pandas' in sys.modules}))
+
+# Function to run both variants and print a comparison
+def main():
+    results = {}
+    for variant in ('df', 'registry'):
+        output = subprocess.run([sys.executable, __file__, '--child', variant], capture_output=True, text=True, check=True).stdout
+        results[variant] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"rows: {ROWS} (registry includes its fuzzy indexes; the df had none)")
+    print(f"{'':16}{'DataFrame':>14}{'CoinRegistry':>14}")
+    for key, label in (('import_ms', 'import (ms)'), ('build_ms', 'build (ms)'), ('rss_mb', 'RSS delta (MB)'), ('lookup_us', 'lookup (us)')):
+        print(f"{label:16}{results['df'][key]:>14.3f}{results['registry'][key]:>14.3f}")
+    print(f"pandas imported by the registry side: {results['registry']['pandas_loaded']}")
+
+# Run the benchmark
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--child':
+        child(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,94 @@
+# Benchmark: upstream traffic as cluster workers are added, with and without the shared cache (run from the repo root: `python bench/bench_shared_cache.py`)
+# Each simulated worker has its own HTTP client, quote cache and top listings snapshot, like a separate bot process, and they all talk to the same local fake
+# CoinGecko/CMC server. With --shared they also share the local Redis stand-in. Every worker gets the same mix of price lookups over a set of popular coins and
+# one top listings refresh, and the upstream call counts show whether adding workers multiplies traffic.
+
+# Imports
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from fake_redis import FakeRedis
+from fake_upstream import FakeUpstream, load_payloads
+
+# Paths
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+# Function to build one worker's services (point the clients at the fake server first)
+def make_worker(backend_url, args):
+    from utils.api_client import APIClient
+    from utils.cache_backend import make_backend
+    from utils.quote_service import QuoteService
+    from utils.top_listings import TopListings
+    backend = make_backend(backend_url)
+    api_client = APIClient(gecko_rate_per_min=100000, cmc_rate_per_min=100000, burst=1000, max_queue=100000)
+    return {
+        'backend': backend,
+        'api_client': api_client,
+        'quote_service': QuoteService(api_client, ttl=args.quote_ttl, backend=backend),
+        'top_listings': TopListings(api_client, size=100, backend=backend, share_ttl=300),
+    }
+
+async def run(workers, shared, args, payloads):
+    rng = random.Random(args.seed)
+    hot = [row['id'] for row in payloads['markets'][:args.hot_coins]]
+
+    server = FakeUpstream(payloads, latency=args.latency_ms / 1000)
+    url = await server.start()
+    redis = FakeRedis()
+    backend_url = await redis.start() if shared else None
+
+    # The clients read their base urls at import time
+    import utils.api_client
+    utils.api_client.GECKO_BASE_URL = url + '/api/v3'
+    utils.api_client.CMC_BASE_URL = url
+
+    pool = [make_worker(backend_url, args) for _ in range(workers)]
+    for worker in pool:
+        await worker['api_client'].start()
+
+    # Every worker refreshes its top listings, then serves its share of lookups (spread over a few seconds, like real traffic)
+    async def drive(worker):
+        await worker['top_listings'].refresh()
+        for _ in range(args.lookups):
+            await asyncio.sleep(rng.uniform(0, args.spread_ms / 1000))
+            await worker['quote_service'].get_market(rng.choice(hot))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(drive(worker) for worker in pool))
+    elapsed = time.perf_counter() - start
+
+    calls = dict(server.calls)
+    for worker in pool:
+        await worker['api_client'].close()
+        if worker['backend'] is not None:
+            await worker['backend'].close()
+    await server.stop()
+    await redis.stop()
+
+    markets = calls.get('/api/v3/coins/markets', 0)
+    listings = calls.get('/v1/cryptocurrency/listings/latest', 0)
+    print(f"{workers} workers {'shared' if shared else 'local '}: {markets:4d} /coins/markets calls, {listings:2d} listings calls, {workers * args.lookups} lookups in {elapsed:.2f}s")
+
+# Main function to be ran
+def main():
+    parser = argparse.ArgumentParser(description='Shared cache benchmark')
+    parser.add_argument('--workers', type=lambda value: [int(part) for part in value.split(',')], default=[1, 2, 4, 8], help='worker counts to try')
+    parser.add_argument('--lookups', type=int, default=200, help='price lookups per worker')
+    parser.add_argument('--hot-coins', type=int, default=50, help='popular coins the lookups pick from')
+    parser.add_argument('--spread-ms', type=float, default=10.0, help='most time between one worker\'s lookups')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='upstream latency added to every request')
+    parser.add_argument('--quote-ttl', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    payloads = load_payloads(coins=2000, listings=100)
+    for workers in args.workers:
+        for shared in (False, True):
+            asyncio.run(run(workers, shared, args, payloads))
+
+if __name__ == '__main__':
+    main()
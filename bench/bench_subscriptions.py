@@ -0,0 +1,120 @@
+# Benchmark: the SQLite subscription store at 100k subscriptions (run from the repo root: `python bench/bench_subscriptions.py`)
+# Measures batched inserts (and how long the event loop is ever blocked while they happen) against one-commit-per-row inserts, indexed queries by user
+# and by coin, and the streaming startup load into the AlertBook. Everything lives in a temp folder.
+
+# Imports
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Paths
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from utils.alert_engine import ABOVE, BELOW, Alert, AlertBook
+from utils.subscription_store import SubscriptionStore
+
+# Function to read this process's current resident set size in MB
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# Function to watch how late the event loop wakes up (the worst lag is how long anything blocked it)
+async def loop_lag(stop, interval=0.001):
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+# Function to time a batch of async queries (returns mean microseconds per query)
+async def time_queries(query, args):
+    start = time.perf_counter()
+    for arg in args:
+        await query(arg)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+async def run(args):
+    rng = random.Random(1)
+    coins = [f'coin-{i}' for i in range(args.coins)]
+    users = list(range(1, args.users + 1))
+    alerts = [Alert(i, rng.choice(users), rng.randrange(100), rng.choice(coins), rng.choice((ABOVE, BELOW)), 10 ** rng.uniform(-6, 4)) for i in range(1, args.rows + 1)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        # Batched inserts through the store (queueing is all the event loop does; the commits happen in batches on a worker thread)
+        store = SubscriptionStore(os.path.join(folder, 'subscriptions.db'), max_batch=args.batch)
+        await store.open()
+        start = time.perf_counter()
+        for alert in alerts:
+            store.save_alert(alert)
+            store.add_watch(alert.user_id, alert.coin_id)
+        queued = time.perf_counter() - start
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(loop_lag(stop))
+        start = time.perf_counter()
+        await store.flush()
+        batched = time.perf_counter() - start
+        stop.set()
+        worst_lag = await lag_task
+        print(f"queue writes:    {args.rows * 2} writes in {queued * 1000:.0f} ms ({queued / (args.rows * 2) * 1e6:.2f} us each on the event loop)")
+        print(f"batched commit:  {args.rows * 2} rows in {batched:.2f}s ({args.rows * 2 / batched:,.0f} rows/s) in {store.batches} transactions, worst event loop lag {worst_lag * 1000:.1f} ms")
+
+        # One commit per row, the naive way (on a sample, since it's slow)
+        sample = alerts[:args.naive_rows]
+        connection = sqlite3.connect(os.path.join(folder, 'naive.db'), isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript("CREATE TABLE alerts (alert_id INTEGER PRIMARY KEY, user_id INTEGER, channel_id INTEGER, coin_id TEXT, direction INTEGER, threshold REAL, created_at REAL);")
+        start = time.perf_counter()
+        for alert in sample:
+            connection.execute("INSERT INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?)", (alert.alert_id, alert.user_id, alert.channel_id, alert.coin_id, alert.direction, alert.threshold, time.time()))
+        naive = time.perf_counter() - start
+        connection.close()
+        print(f"per-row commits: {len(sample)} alerts in {naive:.2f}s ({len(sample) / naive:,.0f} rows/s, on the event loop)")
+
+        # Indexed queries
+        query_users = rng.sample(users, 1000)
+        query_coins = rng.sample(coins, 1000)
+        print(f"alerts by user:  {await time_queries(store.alerts_for_user, query_users):.0f} us/query")
+        print(f"alerts by coin:  {await time_queries(store.alerts_for_coin, query_coins):.0f} us/query")
+        print(f"watchlist:       {await time_queries(store.watchlist, query_users):.0f} us/query")
+        print(f"watchers:        {await time_queries(store.watchers, query_coins):.0f} us/query")
+        plan = await store.read("EXPLAIN QUERY PLAN SELECT * FROM alerts WHERE coin_id = ?", ('coin-1',))
+        print(f"coin query plan: {plan[0][-1]}")
+
+        # Streaming startup load into the AlertBook
+        before = rss_mb()
+        book = AlertBook(max_per_user=10**9, store=store)
+        start = time.perf_counter()
+        count = await book.load()
+        loaded = time.perf_counter() - start
+        print(f"streamed load:   {count} alerts in {loaded * 1000:.0f} ms (+{rss_mb() - before:.1f} MB RSS for the AlertBook)")
+        start = time.perf_counter()
+        book.compile()
+        print(f"compile arrays:  {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        await store.close()
+        print(f"database size:   {os.path.getsize(os.path.join(folder, 'subscriptions.db')) / 2**20:.1f} MB")
+
+# Main function to be ran
+def main():
+    parser = argparse.ArgumentParser(description='SQLite subscription store benchmark')
+    parser.add_argument('--rows', type=int, default=100000, help='alerts (and watchlist rows) to insert')
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--coins', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=5000, help="the store's max batch size")
+    parser.add_argument('--naive-rows', type=int, default=5000, help='rows to insert one commit at a time for comparison')
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
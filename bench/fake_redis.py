@@ -0,0 +1,132 @@
+# Local Redis stand-in speaking just enough RESP for the bot's shared cache (GET, MGET, SET with PX/EX/NX, DEL, PING, AUTH, SELECT, FLUSHALL, DBSIZE)
+# Used by the cluster benchmark, and handy for trying CACHE_BACKEND=redis://127.0.0.1:6379 without a real Redis: `python bench/fake_redis.py --port 6379`
+
+# Imports
+import argparse
+import asyncio
+import time
+
+# Create class
+class FakeRedis:
+
+    # Init method (set important variables)
+    def __init__(self):
+        self.entries = {}                # key -> (value, expires_at monotonic or None)
+        self.commands = {}               # command name -> how many were served
+        self.server = None
+
+    # Function to get a key's value if it hasn't expired
+    def live(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self.entries[key]
+            return None
+        return entry[0]
+
+    # Function to read one command (RESP array of bulk strings)
+    @staticmethod
+    async def read_command(reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    # Function to encode a reply
+    @staticmethod
+    def encode(reply) -> bytes:
+        if reply is None:
+            return b'$-1\r\n'
+        if isinstance(reply, Exception):
+            return b'-ERR %s\r\n' % str(reply).encode()
+        if isinstance(reply, str):
+            return b'+%s\r\n' % reply.encode()
+        if isinstance(reply, int):
+            return b':%d\r\n' % reply
+        if isinstance(reply, list):
+            return b'*%d\r\n' % len(reply) + b''.join(FakeRedis.encode(item) for item in reply)
+        return b'$%d\r\n%s\r\n' % (len(reply), reply)
+
+    # Function to run one command
+    def run(self, args):
+        name = args[0].decode().upper()
+        self.commands[name] = self.commands.get(name, 0) + 1
+        if name == 'PING':
+            return 'PONG'
+        if name in ('AUTH', 'SELECT'):
+            return 'OK'
+        if name == 'GET':
+            return self.live(args[1])
+        if name == 'MGET':
+            return [self.live(key) for key in args[1:]]
+        if name == 'DEL':
+            return sum(self.entries.pop(key, None) is not None for key in args[1:])
+        if name == 'FLUSHALL':
+            self.entries.clear()
+            return 'OK'
+        if name == 'DBSIZE':
+            return len(self.entries)
+        if name == 'SET':
+            key, value, options = args[1], args[2], [arg.decode().upper() for arg in args[3:]]
+            expires_at = None
+            if 'PX' in options:
+                expires_at = time.monotonic() + int(options[options.index('PX') + 1]) / 1000
+            elif 'EX' in options:
+                expires_at = time.monotonic() + int(options[options.index('EX') + 1])
+            if 'NX' in options and self.live(key) is not None:
+                return None
+            self.entries[key] = (value, expires_at)
+            return 'OK'
+        return Exception(f"unknown command '{name}'")
+
+    # Function to serve one client connection
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                args = await self.read_command(reader)
+                if args is None:
+                    break
+                writer.write(self.encode(self.run(args)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # Function to start listening (returns the redis:// url to point the bot at)
+    async def start(self, host='127.0.0.1', port=0):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"redis://{host}:{port}/0"
+
+    # Function to stop listening
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+# Main function to be ran
+async def main():
+    parser = argparse.ArgumentParser(description='Local Redis stand-in for the shared cache')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6379)
+    args = parser.parse_args()
+
+    server = FakeRedis()
+    url = await server.start(args.host, args.port)
+    print(f"Serving {url} (Ctrl+C to stop)")
+    await asyncio.Event().wait()
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,143 @@
+# Local stand-in for an exchange's WebSocket ticker stream (used by the live feed benchmark; replays recorded or generated Binance-style mini tickers at a
+# configurable rate, and can drop connections to exercise reconnecting)
+# Run on its own with `python bench/fake_ticker_feed.py --port 8766 --rate 100` and point the bot at it with LIVE_FEED_URL=ws://127.0.0.1:8766/stream
+# Record real ticks to replay later with `python bench/fake_ticker_feed.py --record wss://stream.binance.com:9443/stream?streams=btcusdt@miniTicker --out ticks.jsonl`
+
+# Imports
+import argparse
+import asyncio
+import json
+import random
+import time
+import aiohttp
+from aiohttp import web
+
+# Starting prices for generated ticks (pairs not listed start at 1)
+START_PRICES = {
+    'BTCUSDT': 65000.12, 'ETHUSDT': 3000.5, 'BNBUSDT': 580.31, 'SOLUSDT': 145.87, 'XRPUSDT': 0.5213, 'DOGEUSDT': 0.1234, 'ADAUSDT': 0.4511,
+    'TRXUSDT': 0.1201, 'AVAXUSDT': 35.2, 'SHIBUSDT': 0.00001734, 'LINKUSDT': 14.8, 'DOTUSDT': 7.1, 'BCHUSDT': 480.3, 'LTCUSDT': 84.2,
+    'NEARUSDT': 6.3, 'UNIUSDT': 9.8,
+}
+
+# Function to make fake ticks (a random walk per pair, each one a combined stream message exactly like the exchange sends)
+def generate_ticks(symbols=tuple(START_PRICES), count=10000, seed=1):
+    rng = random.Random(seed)
+    prices = {symbol: START_PRICES.get(symbol, 1.0) for symbol in symbols}
+    ticks = []
+    event_time = int(time.time() * 1000)
+    for i in range(count):
+        symbol = symbols[i % len(symbols)]
+        prices[symbol] *= 1 + rng.gauss(0, 0.0005)
+        price = prices[symbol]
+        event_time += rng.randint(0, 50)
+        ticks.append(json.dumps({'stream': f"{symbol.lower()}@miniTicker", 'data': {
+            'e': '24hrMiniTicker', 'E': event_time, 's': symbol, 'c': f"{price:.8f}", 'o': f"{price * 0.98:.8f}", 'h': f"{price * 1.03:.8f}",
+            'l': f"{price * 0.97:.8f}", 'v': f"{rng.uniform(1e3, 1e6):.2f}", 'q': f"{rng.uniform(1e6, 1e9):.2f}"}}))
+    return ticks
+
+# Function to load recorded ticks (one raw message per line, as written by --record)
+def load_recording(path):
+    with open(path) as file:
+        return [line.rstrip('\n') for line in file if line.strip()]
+
+# Function to record `count` raw messages from a real feed into a file
+async def record(url, path, count):
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(url) as ws:
+            with open(path, 'w') as file:
+                for _ in range(count):
+                    message = await ws.receive()
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    file.write(message.data + '\n')
+
+# Create class (serves the ticks over WebSocket to every client that connects, from the start of the list and round again once it runs out)
+class FakeTickerFeed:
+
+    # Init method (set important variables; `rate` is messages per second per connection, 0 for as fast as the socket takes them; `drop_after` closes each
+    # connection after that many messages)
+    def __init__(self, ticks, rate=100.0, drop_after=None):
+        self.ticks = ticks
+        self.rate = rate
+        self.drop_after = drop_after
+        self.runner = None
+
+        # Counters the benchmarks read
+        self.connections = 0
+        self.sent = 0
+
+    # Function to build the aiohttp app (any path works, so urls with a ?streams= query can be used as they are)
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', self.handle)
+        return app
+
+    # Function to stream ticks to one client until it goes away (or until it's time to drop it)
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        ticks, sent, start = self.ticks, 0, time.perf_counter()
+        try:
+            while not ws.closed and (self.drop_after is None or sent < self.drop_after):
+                # Send whatever is due by now (everything up to the next batch when there's no rate), then give the loop a turn
+                due = int((time.perf_counter() - start) * self.rate) if self.rate else sent + 256
+                if self.drop_after is not None:
+                    due = min(due, self.drop_after)
+                while sent < due:
+                    await ws.send_str(ticks[sent % len(ticks)])
+                    sent += 1
+                    self.sent += 1
+                await asyncio.sleep(0.005 if self.rate else 0)
+        except (ConnectionResetError, RuntimeError):
+            pass # Client went away mid-send
+        await ws.close()
+        return ws
+
+    # Function to start serving (returns the url; port 0 picks a free port)
+    async def start(self, host='127.0.0.1', port=0):
+        self.runner = web.AppRunner(self.make_app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f'ws://{host}:{port}/stream'
+
+    # Function to stop serving
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+# Run the server on its own (handy for poking at a locally running bot), or record a real feed
+async def main():
+    parser = argparse.ArgumentParser(description='Fake exchange WebSocket ticker feed')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--recording', help='file of recorded raw messages to replay (one per line); generated ticks otherwise')
+    parser.add_argument('--ticks', type=int, default=10000, help='generated ticks to cycle through')
+    parser.add_argument('--rate', type=float, default=100.0, help='messages per second per connection (0 for as fast as possible)')
+    parser.add_argument('--drop-after', type=int, help='close each connection after this many messages')
+    parser.add_argument('--record', metavar='URL', help='record from this feed instead of serving')
+    parser.add_argument('--out', default='ticks.jsonl', help='where --record writes to')
+    parser.add_argument('--count', type=int, default=1000, help='messages --record keeps')
+    args = parser.parse_args()
+
+    if args.record:
+        await record(args.record, args.out, args.count)
+        print(f"Recorded {args.count} messages to {args.out}")
+        return
+
+    ticks = load_recording(args.recording) if args.recording else generate_ticks(count=args.ticks)
+    server = FakeTickerFeed(ticks, rate=args.rate, drop_after=args.drop_after)
+    url = await server.start(args.host, args.port)
+    print(f"Serving {len(ticks)} ticks at {args.rate or 'max'} msg/s on {url} (LIVE_FEED_URL={url})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,231 @@
+# Local stand-in for the CoinGecko and CoinMarketCap APIs (used by the benchmarks; serves recorded or generated payloads with configurable latency and error injection)
+# Run on its own with `python bench/fake_upstream.py --port 8765` and point the bot at it with GECKO_API_URL=http://127.0.0.1:8765/api/v3 and CMC_API_URL=http://127.0.0.1:8765
+
+# Imports
+import argparse
+import asyncio
+import json
+import os
+import random
+from aiohttp import web
+
+# Recorded payload files the server will pick up from a --recordings folder (anything missing gets generated)
+RECORDING_FILES = {
+    'coins_list': 'coins_list.json',
+    'markets': 'coins_markets.json',
+    'listings': 'listings_latest.json',
+    'cmc_map': 'cryptocurrency_map.json',
+}
+
+# A few real coins so benchmark runs can use familiar names (the rest of the list is filler shaped like /coins/list)
+REAL_COINS = [
+    ('bitcoin', 'btc', 'Bitcoin', 65000.12),
+    ('ethereum', 'eth', 'Ethereum', 3000.5),
+    ('tether', 'usdt', 'Tether', 1.0002),
+    ('binancecoin', 'bnb', 'BNB', 580.31),
+    ('solana', 'sol', 'Solana', 145.87),
+    ('ripple', 'xrp', 'XRP', 0.5213),
+    ('dogecoin', 'doge', 'Dogecoin', 0.1234),
+    ('cardano', 'ada', 'Cardano', 0.4511),
+    ('shiba-inu', 'shib', 'Shiba Inu', 0.00001734),
+    ('bitcoin-cash', 'bch', 'Bitcoin Cash', 401.2),
+]
+
+# Function to generate payloads shaped like the real ones (deterministic for a given seed and size)
+def generate_payloads(coins=15000, listings=500, seed=1):
+    rng = random.Random(seed)
+
+    # /coins/list plus a price for every coin
+    coins_list = [{'id': coin_id, 'symbol': symbol, 'name': name} for coin_id, symbol, name, _ in REAL_COINS]
+    prices = {coin_id: price for coin_id, _, _, price in REAL_COINS}
+    for i in range(coins - len(REAL_COINS)):
+        coin_id = f'coin-{i}'
+        coins_list.append({'id': coin_id, 'symbol': f'c{i}', 'name': f'Coin Number {i}'})
+        prices[coin_id] = round(10 ** rng.uniform(-9, 4), 10)
+
+    # /coins/markets rows (market cap order follows the list order)
+    markets = []
+    for rank, coin in enumerate(coins_list, 1):
+        price = prices[coin['id']]
+        markets.append({
+            'id': coin['id'], 'symbol': coin['symbol'], 'name': coin['name'],
+            'image': f"https://example.invalid/{coin['id']}.png",
+            'current_price': price, 'market_cap': round(price * rng.uniform(1e6, 1e9)), 'market_cap_rank': rank,
+            'total_volume': round(price * rng.uniform(1e4, 1e8)), 'price_change_percentage_24h': round(rng.uniform(-15, 15), 3),
+        })
+
+    # CMC /listings/latest and /cryptocurrency/map
+    listings_data = []
+    cmc_map = []
+    for rank, coin in enumerate(coins_list[:listings], 1):
+        row = markets[rank - 1]
+        listings_data.append({
+            'id': rank, 'name': coin['name'], 'symbol': coin['symbol'].upper(), 'slug': coin['id'], 'cmc_rank': rank,
+            'quote': {'USD': {'price': row['current_price'], 'market_cap': row['market_cap'], 'volume_24h': row['total_volume']}},
+        })
+        cmc_map.append({'id': rank, 'rank': rank, 'name': coin['name'], 'symbol': coin['symbol'].upper(), 'slug': coin['id']})
+
+    return {'coins_list': coins_list, 'markets': markets, 'listings': listings_data, 'cmc_map': cmc_map}
+
+# Function to load recorded payloads from a folder (falls back to generated ones for anything not recorded)
+def load_payloads(recordings=None, **generate_options):
+    payloads = generate_payloads(**generate_options)
+    if recordings:
+        for key, filename in RECORDING_FILES.items():
+            path = os.path.join(recordings, filename)
+            if os.path.exists(path):
+                with open(path) as file:
+                    data = json.load(file)
+                # Recorded CMC responses keep their {"data": [...]} wrapper
+                payloads[key] = data['data'] if isinstance(data, dict) and 'data' in data else data
+    return payloads
+
+# Create class
+class FakeUpstream:
+
+    # Init method (latency is in seconds; error_rate is the chance any request gets error_status instead of its payload; stall_rate is the chance a request
+    # whose path starts with stall_prefix takes stall_latency seconds longer, for slow tails like a provider having a bad minute)
+    def __init__(self, payloads, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500, retry_after=1, seed=1, stall_rate=0.0, stall_latency=1.0, stall_prefix=''):
+        self.payloads = payloads
+        self.latency = latency
+        self.jitter = jitter
+        self.stall_rate = stall_rate
+        self.stall_latency = stall_latency
+        self.stall_prefix = stall_prefix
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+
+        # Requests served, per route (and how many of those got an injected error)
+        self.calls = {}
+        self.errors = {}
+
+        # Lookups built once so the server itself stays cheap
+        self.markets_by_id = {row['id']: row for row in payloads['markets']}
+        self.listings_by_id = {row['id']: row for row in payloads['listings']}
+
+        self.runner = None
+
+    # Function to make the aiohttp app with every route the bot uses
+    def make_app(self):
+        app = web.Application(middlewares=[self.inject])
+        app.router.add_get('/api/v3/coins/list', self.coins_list)
+        app.router.add_get('/api/v3/coins/markets', self.coins_markets)
+        app.router.add_get('/api/v3/simple/price', self.simple_price)
+        app.router.add_get('/v1/cryptocurrency/listings/latest', self.listings_latest)
+        app.router.add_get('/v1/cryptocurrency/map', self.cryptocurrency_map)
+        app.router.add_get('/v2/cryptocurrency/quotes/latest', self.quotes_latest)
+        return app
+
+    # Middleware to count calls and add the configured latency / errors in front of every route
+    @web.middleware
+    async def inject(self, request, handler):
+        route = request.path
+        self.calls[route] = self.calls.get(route, 0) + 1
+
+        # Simulated network + upstream processing time
+        delay = self.latency + (self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if self.stall_rate and route.startswith(self.stall_prefix) and self.rng.random() < self.stall_rate:
+            delay += self.stall_latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        # Simulated upstream trouble
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors[route] = self.errors.get(route, 0) + 1
+            headers = {'Retry-After': str(self.retry_after)} if self.error_status == 429 else None
+            return web.json_response({'error': 'injected'}, status=self.error_status, headers=headers)
+
+        return await handler(request)
+
+    # Function to split a comma-separated `ids` param
+    @staticmethod
+    def requested_ids(request):
+        return [coin_id for coin_id in request.query.get('ids', '').split(',') if coin_id]
+
+    async def coins_list(self, request):
+        return web.json_response(self.payloads['coins_list'])
+
+    async def coins_markets(self, request):
+        ids = self.requested_ids(request)
+        if ids:
+            rows = [self.markets_by_id[coin_id] for coin_id in ids if coin_id in self.markets_by_id]
+        else:
+            per_page = int(request.query.get('per_page', 100))
+            page = int(request.query.get('page', 1))
+            rows = self.payloads['markets'][(page - 1) * per_page:page * per_page]
+        return web.json_response(rows)
+
+    async def simple_price(self, request):
+        data = {}
+        for coin_id in self.requested_ids(request):
+            row = self.markets_by_id.get(coin_id)
+            if row is not None:
+                data[coin_id] = {'usd': row['current_price'], 'usd_24h_vol': row['total_volume']}
+        return web.json_response(data)
+
+    async def listings_latest(self, request):
+        start = int(request.query.get('start', 1))
+        limit = int(request.query.get('limit', 100))
+        return web.json_response({'data': self.payloads['listings'][start - 1:start - 1 + limit]})
+
+    async def cryptocurrency_map(self, request):
+        return web.json_response({'data': self.payloads['cmc_map']})
+
+    async def quotes_latest(self, request):
+        data = {}
+        for cmc_id in request.query.get('id', '').split(','):
+            row = self.listings_by_id.get(int(cmc_id)) if cmc_id.isdigit() else None
+            if row is not None:
+                data[cmc_id] = row
+        return web.json_response({'data': data})
+
+    # Function to start serving (port 0 picks a free port; returns the base url)
+    async def start(self, host='127.0.0.1', port=0):
+        self.runner = web.AppRunner(self.make_app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f'http://{host}:{port}'
+
+    # Function to stop serving
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    # Function to clear the call counters (e.g. after warm-up)
+    def reset_counts(self):
+        self.calls.clear()
+        self.errors.clear()
+
+# Run the server on its own (handy for poking at a locally running bot)
+async def main():
+    parser = argparse.ArgumentParser(description='Fake CoinGecko/CoinMarketCap server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--recordings', help='folder with recorded payloads (coins_list.json, coins_markets.json, listings_latest.json, cryptocurrency_map.json)')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='chance a request stalls (e.g. 0.05)')
+    parser.add_argument('--stall-ms', type=float, default=1000.0)
+    parser.add_argument('--stall-prefix', default='', help='only stall paths starting with this (e.g. /api/v3 for CoinGecko, /v for CoinMarketCap)')
+    args = parser.parse_args()
+
+    server = FakeUpstream(load_payloads(args.recordings), latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                          error_rate=args.error_rate, error_status=args.error_status, stall_rate=args.stall_rate, stall_latency=args.stall_ms / 1000, stall_prefix=args.stall_prefix)
+    url = await server.start(args.host, args.port)
+    print(f"Serving on {url} (GECKO_API_URL={url}/api/v3 CMC_API_URL={url})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
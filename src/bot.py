@@ -1,10 +1,27 @@
+# Read the clock before anything else, so the startup profile covers the imports too
+import time
+STARTED = time.perf_counter()
+
 # Imports
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import os
 import asyncio
+import argparse
 from dotenv import load_dotenv
 from utils.data_manager import DataManager
+from utils.api_client import APIClient
+from utils.quote_service import QuoteService
+from utils.providers import Providers
+from utils.render_cache import RenderCache
+from utils.price_history import PriceHistory
+from utils.chart_cache import ChartCache
+from utils.live_feed import LiveFeed, LivePrices, parse_pairs
+from utils.alert_engine import AlertEngine
+from utils.cpu_pool import CPUPool
+from utils.cache_backend import make_backend
+from utils.metrics import metrics, start_metrics_server
+from utils.startup_profile import StartupProfile
 
 # Initialize load-env for token accessing
 load_dotenv()
@@ -12,28 +29,188 @@ load_dotenv()
 # Store important values from .env in variables
 BOT_TOKEN = os.getenv('TOKEN')
 TEST_TOKEN = os.getenv('TEST_TOKEN')
+CMC_KEY = os.getenv('KEY')
+GECKO_KEY = os.getenv('GECKO_KEY')
+
+# Upstream request budgets (requests per minute each provider lets us make)
+GECKO_RATE_PER_MIN = float(os.getenv('GECKO_RATE_PER_MIN', '30'))
+CMC_RATE_PER_MIN = float(os.getenv('CMC_RATE_PER_MIN', '30'))
+
+# Where the coin registry snapshot lives on disk (lets the bot start without waiting on /coins/list)
+REGISTRY_SNAPSHOT = os.getenv('REGISTRY_SNAPSHOT', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'coin_registry.bin'))
+
+# Where user subscriptions (alerts, watchlists, preferences) are stored (SQLite)
+SUBSCRIPTIONS_DB = os.getenv('SUBSCRIPTIONS_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'subscriptions.db'))
+
+# Hours between background refreshes of the coin registry
+REGISTRY_REFRESH_HOURS = float(os.getenv('REGISTRY_REFRESH_HOURS', '24'))
+
+# Hours the CoinMarketCap id map stays cached before it's re-fetched
+CMC_MAP_TTL_HOURS = float(os.getenv('CMC_MAP_TTL_HOURS', '24'))
+
+# Hedged requests (send a command's request to the other provider too once the usual one takes longer than its recent p95; 0 turns it off and only fails over
+# on errors), and how many recent latencies per endpoint the p95 comes from (hedging starts once an endpoint has HEDGE_MIN_SAMPLES of them)
+HEDGE_REQUESTS = os.getenv('HEDGE_REQUESTS', '1') != '0'
+HEDGE_WINDOW = int(os.getenv('HEDGE_WINDOW', '200'))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+
+# Top market cap snapshot settings (coins held for !topcap, minutes a snapshot stays fresh). CMC charges 1 credit per 200 listings per refresh, so the
+# default 200 costs 1 credit; the snapshot is only refreshed once it's stale and someone has used !topcap since, so at most 96 credits a day at 15 minutes
+# (and none on days nobody asks)
+TOP_LISTINGS_SIZE = int(os.getenv('TOP_LISTINGS_SIZE', '200'))
+TOP_LISTINGS_REFRESH_MINUTES = float(os.getenv('TOP_LISTINGS_REFRESH_MINUTES', '15'))
+
+# Quote cache settings (seconds a quote stays fresh, max quotes held in memory)
+QUOTE_TTL = float(os.getenv('QUOTE_TTL', '30'))
+QUOTE_CACHE_SIZE = int(os.getenv('QUOTE_CACHE_SIZE', '1024'))
+
+# Most rendered answer embeds kept for reuse while their quotes haven't changed
+EMBED_CACHE_SIZE = int(os.getenv('EMBED_CACHE_SIZE', '1024'))
+
+# Quote batching settings (seconds to collect ids before one multi-id call, max ids per call)
+QUOTE_BATCH_WINDOW = float(os.getenv('QUOTE_BATCH_WINDOW', '0.05'))
+QUOTE_BATCH_SIZE = int(os.getenv('QUOTE_BATCH_SIZE', '100'))
+
+# Price history settings (samples kept per coin, seconds each sample covers, coins kept; fixed memory of slots * 16 bytes per coin. Unset path keeps it in memory,
+# otherwise it's memory-mapped from that file so it survives restarts)
+PRICE_HISTORY_SLOTS = int(os.getenv('PRICE_HISTORY_SLOTS', '1440'))
+PRICE_HISTORY_RESOLUTION = float(os.getenv('PRICE_HISTORY_RESOLUTION', '60'))
+PRICE_HISTORY_COINS = int(os.getenv('PRICE_HISTORY_COINS', '500'))
+PRICE_HISTORY_PATH = os.getenv('PRICE_HISTORY_PATH')
+
+# Chart image cache settings (directory rendered charts are kept in, unset or empty to not keep them; megabytes it may use before the oldest are deleted)
+CHART_CACHE_DIR = os.getenv('CHART_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'charts'))
+CHART_CACHE_MB = float(os.getenv('CHART_CACHE_MB', '64'))
 
-# Create class
-class CryptoBot(commands.Bot):
+# Live price feed (off unless a WebSocket url is set, e.g. wss://stream.binance.com:9443/stream?streams={streams}; which coins it streams, as
+# coin id=pair pairs or unset for the most popular ones; what to call it in footers; seconds a streamed price is trusted for)
+LIVE_FEED_URL = os.getenv('LIVE_FEED_URL')
+LIVE_FEED_PAIRS = os.getenv('LIVE_FEED_PAIRS')
+LIVE_FEED_NAME = os.getenv('LIVE_FEED_NAME', 'Binance')
+LIVE_FEED_MAX_AGE = float(os.getenv('LIVE_FEED_MAX_AGE', '10'))
+
+# Background price sampling (most coins sampled every PRICE_HISTORY_RESOLUTION seconds, and for how long after someone last asked about them)
+PRICE_SAMPLE_COINS = int(os.getenv('PRICE_SAMPLE_COINS', '100'))
+PRICE_SAMPLE_HOURS = float(os.getenv('PRICE_SAMPLE_HOURS', '24'))
+
+# Price alert settings (seconds between price checks, alerts each user can have, alert messages per second we let ourselves send)
+ALERT_POLL_SECONDS = float(os.getenv('ALERT_POLL_SECONDS', '60'))
+MAX_ALERTS_PER_USER = int(os.getenv('MAX_ALERTS_PER_USER', '25'))
+ALERT_NOTIFY_RATE = float(os.getenv('ALERT_NOTIFY_RATE', '1'))
+
+# CPU pool settings (worker threads for registry builds, worker processes for fuzzy search (0 runs it inline), most CPU jobs allowed to wait, past which typo suggestions answer "busy")
+CPU_POOL_THREADS = int(os.getenv('CPU_POOL_THREADS', '2'))
+CPU_POOL_PROCESSES = int(os.getenv('CPU_POOL_PROCESSES', '1'))
+CPU_POOL_QUEUE = int(os.getenv('CPU_POOL_QUEUE', '64'))
+
+# Sharding settings (total shards, or unset to use Discord's recommendation; bot processes to spread them over; how often cluster workers check for the
+# primary's registry snapshot and other workers' alert changes)
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+CLUSTER_PROCESSES = int(os.getenv('CLUSTER_PROCESSES', '1'))
+REGISTRY_FOLLOW_SECONDS = float(os.getenv('REGISTRY_FOLLOW_SECONDS', '60'))
+ALERT_SYNC_SECONDS = float(os.getenv('ALERT_SYNC_SECONDS', '5'))
+
+# Shared cache backend for quotes and the top listings (e.g. redis://127.0.0.1:6379/0; unset means every process keeps its own)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND')
+
+# Prometheus metrics endpoint (off unless a port is set; only listens on localhost unless told otherwise)
+METRICS_PORT = os.getenv('METRICS_PORT')
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+# Command metrics
+COMMAND_SECONDS = metrics.histogram('command_seconds', 'Command latency from dispatch to completion', ('command',))
+COMMAND_ERRORS = metrics.counter('command_errors_total', 'Commands that raised an error, by error type', ('command', 'error'))
+COMMANDS_IN_FLIGHT = metrics.gauge('commands_in_flight', 'Commands currently running')
+
+# Create class (auto-sharded; in a cluster each process runs its own slice of the shards, and worker 0 is the primary that does the background upstream work)
+class CryptoBot(commands.AutoShardedBot):
 
     # Init method (set important variables)
-    def __init__(self, command_prefix, intents):
-        super().__init__(command_prefix=command_prefix, intents=intents) # Call commands.bot init method for this bot
-        self.data_manager = DataManager()                                # Set up singular database class
+    def __init__(self, command_prefix, intents, shard_ids=None, shard_count=SHARD_COUNT, cluster_index=0, cluster_count=1, profile_startup=False):
+        self.startup = StartupProfile(STARTED) # When each startup phase ran (printed in full with --profile-startup)
+        self.startup.mark('imports', STARTED)
+        setup_start = time.perf_counter()
+        super().__init__(command_prefix=command_prefix, intents=intents, shard_ids=shard_ids, shard_count=shard_count) # Call commands.AutoShardedBot init method for this bot
+        self.cluster_index = cluster_index
+        self.cluster_count = cluster_count
+        self.primary = cluster_index == 0 # Refreshes the registry and checks price alerts for the whole cluster
+        self.cache_backend = make_backend(CACHE_BACKEND) # Set up the shared cache, if there is one (so the cluster fetches each quote once, not once per process)
+        self.cpu_pool = CPUPool(threads=CPU_POOL_THREADS, processes=CPU_POOL_PROCESSES, max_queue=CPU_POOL_QUEUE) # Set up singular pool for CPU-heavy work (keeps it off the event loop)
+        self.api_client = APIClient(gecko_key=GECKO_KEY, cmc_key=CMC_KEY, gecko_rate_per_min=GECKO_RATE_PER_MIN, cmc_rate_per_min=CMC_RATE_PER_MIN) # Set up singular pooled HTTP client (shared by every cog)
+        self.providers = Providers(self.api_client, hedging=HEDGE_REQUESTS, window=HEDGE_WINDOW, min_samples=HEDGE_MIN_SAMPLES) # Set up singular front door to both providers (hedges slow requests, fails over on errors)
+        self.data_manager = DataManager(self.api_client, REGISTRY_SNAPSHOT, cmc_map_ttl=CMC_MAP_TTL_HOURS * 3600, top_listings_size=TOP_LISTINGS_SIZE, max_alerts_per_user=MAX_ALERTS_PER_USER, subscriptions_path=SUBSCRIPTIONS_DB, cpu_pool=self.cpu_pool,
+                                        cache_backend=self.cache_backend, top_listings_ttl=TOP_LISTINGS_REFRESH_MINUTES * 60, cluster_index=cluster_index, cluster_count=cluster_count, providers=self.providers) # Set up singular database class
+        self.price_history = PriceHistory(slots=PRICE_HISTORY_SLOTS, max_coins=PRICE_HISTORY_COINS, resolution=PRICE_HISTORY_RESOLUTION,
+                                          path=f"{PRICE_HISTORY_PATH}.{cluster_index}" if PRICE_HISTORY_PATH and cluster_count > 1 else PRICE_HISTORY_PATH) # Set up singular price history (one file per cluster worker, since a mapped file can't have two writers)
+        self.quote_service = QuoteService(self.api_client, ttl=QUOTE_TTL, maxsize=QUOTE_CACHE_SIZE, batch_window=QUOTE_BATCH_WINDOW, max_batch=QUOTE_BATCH_SIZE, backend=self.cache_backend, history=self.price_history, providers=self.providers) # Set up singular quote cache (shared by every cog; records every quote in the price history)
+        self.render_cache = RenderCache(maxsize=EMBED_CACHE_SIZE) # Set up singular cache of rendered answers (shared by every cog)
+        self.chart_cache = ChartCache(os.path.join(CHART_CACHE_DIR, str(cluster_index)) if CHART_CACHE_DIR and cluster_count > 1 else CHART_CACHE_DIR,
+                                      max_bytes=int(CHART_CACHE_MB * 1024 * 1024)) # Set up singular chart image cache (one directory per cluster worker, so each one's size limit holds)
+        self.live_prices = LivePrices(max_age=LIVE_FEED_MAX_AGE, history=self.price_history) # Set up singular table of streamed prices (empty unless the live feed is on)
+        self.live_feed = LiveFeed(LIVE_FEED_URL, parse_pairs(LIVE_FEED_PAIRS), self.live_prices, name=LIVE_FEED_NAME) if LIVE_FEED_URL else None
+        self.alert_engine = AlertEngine(self.data_manager.subscriptions_data, self.quote_service, self.send_alerts, get_name=self.data_manager.get_display_name, notify_rate=ALERT_NOTIFY_RATE) # Set up singular price alert poller
+        self.metrics = metrics # Process-wide metrics registry (read by !stats and the optional Prometheus endpoint)
+        self.metrics_runner = None
+        self.profile_startup = profile_startup # Print the startup profile and shut down once the bot is ready
+        self.services_ready = asyncio.Event() # Set once the registry and everyone's alerts are loaded (commands wait on it; logging in doesn't)
+        self.startup_tasks = [] # Startup work running alongside logging in (see run_bot)
+        self.login_started = None
+        self.gateway_started = None
+
+        # Have the shared services copy their own stats into the metrics whenever they're read
+        for collector in (self.api_client.collect_metrics, self.providers.collect_metrics, self.data_manager.collect_metrics, self.quote_service.collect_metrics, self.render_cache.collect_metrics, self.price_history.collect_metrics, self.chart_cache.collect_metrics):
+            self.metrics.add_collector(collector)
+        if self.live_feed is not None:
+            self.metrics.add_collector(self.live_feed.collect_metrics)
+        self.startup.mark('setup', setup_start)
+
+    # Called by discord.py once it has logged in, right before it connects to the gateway
+    async def setup_hook(self):
+        if self.login_started is not None:
+            self.startup.mark('login', self.login_started)
+        self.gateway_started = time.perf_counter()
 
     # Log function when bot is running
     async def on_ready(self):
         print("We have logged in as {0.user}".format(self))
+        if 'gateway' not in self.startup.phases and self.gateway_started is not None:
+            self.startup.mark('gateway', self.gateway_started)
+
+    # Log each shard as it connects
+    async def on_shard_ready(self, shard_id):
+        print(f"Shard {shard_id} ready.")
 
     # Bot says hi to the user
     @commands.command()
     async def hello(self, ctx):
         await ctx.send("hi")
 
+    # Function to run a command (timed, and counted as in flight while it runs)
+    async def invoke(self, ctx):
+        if ctx.command is None:
+            return await super().invoke(ctx)
+
+        COMMANDS_IN_FLIGHT.labels().inc()
+        try:
+            with COMMAND_SECONDS.labels(ctx.command.qualified_name).time():
+                # Commands that come in while the registry and alerts are still loading wait for them (only possible in the first moments after startup)
+                if not self.services_ready.is_set():
+                    await self.services_ready.wait()
+                await super().invoke(ctx)
+        finally:
+            COMMANDS_IN_FLIGHT.labels().dec()
+
+    # Count failed commands by error type (then report them the usual way)
+    async def on_command_error(self, ctx, error):
+        command = ctx.command.qualified_name if ctx.command else 'unknown'
+        cause = getattr(error, 'original', error)
+        COMMAND_ERRORS.labels(command, type(cause).__name__).inc()
+        await super().on_command_error(ctx, error)
+
     # Function to load cogs into the bot
     async def load_cogs(self):
         # List of all the cog files (to be loaded into the bot below)
-        cogs_list = ['cogs.prices_cog', 'cogs.volume_cog']
+        cogs_list = ['cogs.prices_cog', 'cogs.volume_cog', 'cogs.alerts_cog', 'cogs.history_cog', 'cogs.stats_cog']
 
         # Load the extensions into the bot
         for cog in cogs_list:
@@ -44,24 +221,204 @@ class CryptoBot(commands.Bot):
                 print(f"Failed to load cog: {cog}")
                 print(f"[ERROR] {e}")
     
+    # Function to load the registry and everyone's saved alerts (runs alongside logging in; shuts the bot down if they can't be loaded, as nothing would work without them)
+    async def load_services(self):
+        try:
+            await asyncio.gather(self.startup.timed('subscriptions', self.data_manager.load_subscriptions()),
+                                 self.startup.timed('registry', self.data_manager.load_registry()),
+                                 self.startup.timed('price_history', asyncio.to_thread(self.price_history.open)),
+                                 self.startup.timed('chart_cache', asyncio.to_thread(self.chart_cache.open)))
+        except Exception as e:
+            print(f"Failed to load the registry and alerts: {e!r}")
+            await self.close()
+            return
+        self.services_ready.set()
+
+        # Keep the registry fresh in the background (the first refresh happens right away if it came from the snapshot; other cluster workers reload the primary's snapshot instead)
+        if self.primary:
+            self.refresh_registry.start()
+        else:
+            self.follow_registry.start()
+
+        # Load the CMC map and match it up with the registry in the background (until then, CoinGecko requests have nowhere to fail over to)
+        self.refresh_cross_reference.start()
+
+        # Keep the top market cap snapshot fresh in the background too, while people are using it (the first !topcap fetches it; with a shared cache, one process per interval actually fetches it)
+        self.refresh_top_listings.start()
+
+        # Keep recording the coins people ask about
+        self.sample_prices.start()
+
+        # Stream the most popular coins' prices instead of polling for them (they also land in the price history, so the sampler skips them)
+        if self.live_feed is not None:
+            self.live_feed.start()
+
+        # Check price alerts on a schedule (the primary checks everyone's; in a cluster every worker picks up the others' alert changes)
+        if self.primary:
+            self.poll_alerts.start()
+        if self.cluster_count > 1 and self.data_manager.subscription_store is not None:
+            self.sync_alerts.start()
+
+    # Function to report how long startup took once the bot is ready (everything loaded, and connected if we're logging in at all)
+    async def report_startup(self, connect=True):
+        await self.services_ready.wait()
+        if connect:
+            await self.wait_until_ready()
+        if self.profile_startup:
+            print(self.startup.report())
+            await self.close()
+        else:
+            print(f"Ready in {self.startup.elapsed():.2f}s.")
+
     # Function to start necessary processes and run the bot
     async def run_bot(self):
+        # Enter the client first (sets up what discord.py needs to close cleanly, even if we never get as far as logging in)
+        async with self:
+            await self.api_client.start()
+            try:
+                # Serve metrics to a local Prometheus, if asked to
+                if METRICS_PORT:
+                    self.metrics_runner = await start_metrics_server(self.metrics, METRICS_HOST, int(METRICS_PORT))
+                    print(f"Serving metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+                # Load the registry and everyone's alerts in the background, while the cogs load and the bot logs in (commands wait for them, logging in doesn't)
+                self.startup_tasks.append(asyncio.create_task(self.load_services()))
+                with self.startup.phase('cogs'):
+                    await self.load_cogs()
+
+                # Profiling without a token just times everything up to the gateway
+                connect = bool(BOT_TOKEN) or not self.profile_startup
+                report = asyncio.create_task(self.report_startup(connect))
+                self.startup_tasks.append(report)
+                if connect:
+                    self.login_started = time.perf_counter()
+                    await self.start(BOT_TOKEN)
+                else:
+                    print("No TOKEN set, so the startup profile stops short of logging in.")
+                    await asyncio.wait([report])
+            finally:
+                await self.close()
+
+    # Background task to refresh the coin registry on a schedule
+    @tasks.loop(hours=REGISTRY_REFRESH_HOURS)
+    async def refresh_registry(self):
         await self.data_manager.populate_cache()
-        await self.load_cogs()
-        await self.start(BOT_TOKEN)
 
-# Main function to be ran
-async def main():
+    # Wait out the rest of the interval first if the registry was just fetched from the network
+    @refresh_registry.before_loop
+    async def before_refresh_registry(self):
+        if self.data_manager.last_refresh is not None:
+            delay = self.data_manager.last_refresh + REGISTRY_REFRESH_HOURS * 3600 - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    # Background task to reload the registry when the primary saves a new snapshot (cluster workers only)
+    @tasks.loop(seconds=REGISTRY_FOLLOW_SECONDS)
+    async def follow_registry(self):
+        try:
+            await self.data_manager.follow_snapshot()
+        except Exception as e:
+            print(f"Failed to reload the coin registry snapshot: {e!r}")
+
+    # Background task to pick up alerts other cluster workers added or removed (the primary also clears out changelog entries everyone has long seen)
+    @tasks.loop(seconds=ALERT_SYNC_SECONDS)
+    async def sync_alerts(self):
+        try:
+            await self.data_manager.subscriptions_data.sync()
+            if self.primary:
+                self.data_manager.subscription_store.prune_alert_changes(max(3600, ALERT_SYNC_SECONDS * 100))
+        except Exception as e:
+            print(f"Failed to sync price alerts: {e!r}")
+
+    # Background task to keep the CMC map fresh and cross-referenced with the registry (checked hourly, so a failed fetch gets retried, but the map is only
+    # re-fetched once it's CMC_MAP_TTL_HOURS old; registry changes re-match it on their own)
+    @tasks.loop(hours=min(1, CMC_MAP_TTL_HOURS))
+    async def refresh_cross_reference(self):
+        try:
+            await self.data_manager.update_cross_reference()
+        except Exception as e:
+            print(f"Failed to cross-reference CoinMarketCap: {e!r}")
+
+    # Background task to refresh the top market cap snapshot once it's stale, if anyone has used it since the last refresh (checks every minute)
+    @tasks.loop(minutes=min(1, TOP_LISTINGS_REFRESH_MINUTES))
+    async def refresh_top_listings(self):
+        await self.data_manager.top_listings.scheduled_refresh()
+
+    # Background task to sample the prices of the coins people have been asking about (only the ones nothing else has recorded lately; also saves the history to disk)
+    @tasks.loop(seconds=PRICE_HISTORY_RESOLUTION)
+    async def sample_prices(self):
+        try:
+            coin_ids = self.price_history.stale(self.price_history.popular(PRICE_SAMPLE_COINS, PRICE_SAMPLE_HOURS * 3600))
+            if coin_ids:
+                await self.quote_service.refresh_simple(coin_ids)
+            await self.price_history.flush()
+        except Exception as e:
+            print(f"Price sampling failed: {e!r}")
+
+    # Background task to check every price alert on a schedule
+    @tasks.loop(seconds=ALERT_POLL_SECONDS)
+    async def poll_alerts(self):
+        try:
+            await self.alert_engine.poll()
+        except Exception as e:
+            print(f"Price alert poll failed: {e!r}")
+
+    # Wait for the bot to be connected before sending any alerts
+    @poll_alerts.before_loop
+    async def before_poll_alerts(self):
+        await self.wait_until_ready()
+
+    # Function to deliver one batch of alert notifications to a channel (only the users being alerted get pinged)
+    async def send_alerts(self, channel_id, content):
+        channel = self.get_channel(channel_id) or await self.fetch_channel(channel_id)
+        await channel.send(content, allowed_mentions=discord.AllowedMentions(everyone=False, roles=False, users=True))
+
+    # Function to shut the bot down (also stops the background tasks and closes the pooled HTTP client)
+    async def close(self):
+        for task in self.startup_tasks:
+            if task is not asyncio.current_task():
+                task.cancel()
+        self.refresh_registry.cancel()
+        self.refresh_top_listings.cancel()
+        self.poll_alerts.cancel()
+        self.follow_registry.cancel()
+        self.sync_alerts.cancel()
+        self.sample_prices.cancel()
+        self.refresh_cross_reference.cancel()
+        if self.live_feed is not None:
+            await self.live_feed.close()
+        await super().close()
+        await self.api_client.close()
+        if self.data_manager.subscription_store is not None:
+            await self.data_manager.subscription_store.close()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+            self.metrics_runner = None
+        if self.cache_backend is not None:
+            await self.cache_backend.close()
+        self.price_history.close()
+        self.cpu_pool.close()
+
+# Main function to be ran (cluster workers pass in their slice of the shards)
+async def main(shard_ids=None, shard_count=SHARD_COUNT, cluster_index=0, cluster_count=1, profile_startup=False):
     # Add instance of discord client with intents
     intents = discord.Intents.default()
     intents.message_content = True
 
     # Create CryptoBot instance 
-    bot = CryptoBot(command_prefix='/', intents=intents)
+    bot = CryptoBot(command_prefix='/', intents=intents, shard_ids=shard_ids, shard_count=shard_count, cluster_index=cluster_index, cluster_count=cluster_count, profile_startup=profile_startup)
 
     # Start bot
     await bot.run_bot()
 
-# Run the asynchronous main method (containing bot initialization)
+# Run the asynchronous main method (containing bot initialization), or a whole cluster of them if asked to
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='CryptoBot')
+    parser.add_argument('--profile-startup', action='store_true', help='print how long each startup phase took once the bot is ready, then shut down')
+    args = parser.parse_args()
+
+    if CLUSTER_PROCESSES > 1 and not args.profile_startup:
+        from cluster import run_cluster
+        run_cluster(BOT_TOKEN, CLUSTER_PROCESSES, SHARD_COUNT)
+    else:
+        asyncio.run(main(profile_startup=args.profile_startup))
@@ -0,0 +1,92 @@
+# Runs the bot as a cluster: one process per slice of the shards, so the bot can use more than one core and gateway connection
+# (started by bot.py when CLUSTER_PROCESSES > 1). Worker 0 is the primary: it refreshes the coin registry and checks price alerts for everyone.
+# Set CACHE_BACKEND to a Redis url so the workers share quotes and the top listings instead of each fetching their own.
+
+# Imports
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+import aiohttp
+
+# Where to ask Discord how many shards it recommends
+DISCORD_API_URL = os.getenv('DISCORD_API_URL', 'https://discord.com/api/v10')
+
+# Discord allows one shard to identify every 5 seconds (per concurrency bucket), so each worker's start is staggered by its shards' worth of that
+IDENTIFY_INTERVAL = 5.5
+
+# Seconds to wait before restarting a worker that died
+RESTART_DELAY = 5
+
+# Function to ask Discord how many shards it recommends for this bot
+async def recommended_shards(token) -> int:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{DISCORD_API_URL}/gateway/bot", headers={'Authorization': f"Bot {token}"}) as response:
+            response.raise_for_status()
+            return (await response.json())['shards']
+
+# Function to deal the shards out to the workers (worker i gets shards i, i + n, i + 2n, ...)
+def split_shards(shard_count, processes) -> list:
+    return [list(range(index, shard_count, processes)) for index in range(processes)]
+
+# Function to turn SIGTERM into the same clean shutdown as Ctrl+C
+def interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+# Function to run one worker (the entry point of each worker process; closes the bot cleanly when the cluster stops it, so queued alert writes get saved)
+def run_worker(cluster_index, cluster_count, shard_ids, shard_count):
+    from bot import main
+    signal.signal(signal.SIGTERM, interrupt)
+    print(f"Cluster worker {cluster_index} starting with shards {shard_ids} of {shard_count}.")
+    try:
+        asyncio.run(main(shard_ids=shard_ids, shard_count=shard_count, cluster_index=cluster_index, cluster_count=cluster_count))
+    except KeyboardInterrupt:
+        pass
+
+# Function to start the workers and keep them running until we're told to stop
+def run_cluster(token, processes, shard_count=None):
+    # One shard per worker at the very least (a worker with no shards would have nothing to do)
+    if shard_count is None:
+        shard_count = asyncio.run(recommended_shards(token))
+    shard_count = max(shard_count, processes)
+    slices = split_shards(shard_count, processes)
+    print(f"Starting a cluster of {processes} workers for {shard_count} shards.")
+
+    context = multiprocessing.get_context('spawn')
+    workers = [None] * processes
+
+    # Function to (re)start one worker
+    def start(index):
+        worker = context.Process(target=run_worker, args=(index, processes, slices[index], shard_count), name=f"cryptobot-{index}")
+        worker.start()
+        workers[index] = worker
+
+    signal.signal(signal.SIGTERM, interrupt)
+    try:
+        # Start the workers one after the other, giving each one's shards time to identify
+        for index in range(processes):
+            start(index)
+            if index < processes - 1:
+                time.sleep(IDENTIFY_INTERVAL * len(slices[index]))
+
+        # Restart any worker that dies
+        while True:
+            time.sleep(1)
+            for index, worker in enumerate(workers):
+                if not worker.is_alive():
+                    print(f"Cluster worker {index} exited with code {worker.exitcode}. Restarting in {RESTART_DELAY}s.")
+                    time.sleep(RESTART_DELAY)
+                    start(index)
+    except KeyboardInterrupt:
+        print("Stopping the cluster.")
+    finally:
+        # Give every worker the chance to close cleanly (SIGTERM), then make sure they're gone
+        for worker in workers:
+            if worker is not None and worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            if worker is not None:
+                worker.join(timeout=10)
+                if worker.is_alive():
+                    worker.kill()
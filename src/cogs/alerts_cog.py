@@ -0,0 +1,134 @@
+# Imports
+import math
+import discord
+from discord.ext import commands
+from utils.alert_engine import ABOVE, BELOW
+from utils.formatting import format_crypto_price
+
+# Words users can use for each alert direction
+DIRECTIONS = {
+    'above': ABOVE, 'over': ABOVE, '>': ABOVE, '>=': ABOVE,
+    'below': BELOW, 'under': BELOW, '<': BELOW, '<=': BELOW,
+}
+
+# Create class
+class AlertsCog(commands.Cog):
+
+    # Init method (set important variables)
+    def __init__(self, bot):
+        self.bot = bot
+        self.data_manager = bot.data_manager
+        self.alert_book = bot.data_manager.subscriptions_data
+
+    # Function to send an error embed (every bad input here gets the same treatment)
+    async def send_error(self, ctx, name, value):
+        # Make a pretty embed for the user's unfortunate news
+        embed = discord.Embed(
+            title="ERROR",
+            color=0xC41E3A
+        )
+
+        # Add field with details
+        embed.add_field(name=name, value=value, inline=False)
+
+        # Send the message
+        await ctx.send(embed=embed)
+
+    # Function to set a price alert, e.g. `!alert ethereum below 2000` (pings the user in this channel once the price gets there)
+    @commands.command()
+    async def alert(self, ctx, name: str, direction: str, price: str):
+        # Check the direction
+        direction_value = DIRECTIONS.get(direction.lower())
+        if direction_value is None:
+            await self.send_error(ctx, "Invalid direction", "Use `above` or `below`, e.g. `!alert ethereum below 2000`.")
+            return
+
+        # Check the price (allow things like `$2,000`)
+        try:
+            threshold = float(price.replace('$', '').replace(',', ''))
+        except ValueError:
+            threshold = math.nan
+        if not math.isfinite(threshold) or threshold <= 0:
+            await self.send_error(ctx, "Invalid price", "Please enter a price above 0, e.g. `!alert ethereum below 2000`.")
+            return
+
+        # Check the user-inputted coin for validity (as a name first, then as an id)
+        checked_id = self.data_manager.get_coin_name(name) or self.data_manager.get_coin_id(name)
+
+        # If no coin found, try to find other name
+        if checked_id == None:
+            checked_id = await self.data_manager.get_corrected_name(ctx, name)
+
+        # If none found after that, quit function
+        if checked_id == None:
+            return
+
+        # Add the alert (each user has a cap)
+        try:
+            alert = self.alert_book.add(ctx.author.id, ctx.channel.id, checked_id, direction_value, threshold)
+        except ValueError as e:
+            await self.send_error(ctx, "Too many alerts", f"{e} Remove one with `!unalert <number>` first.")
+            return
+
+        # Create the embed to hold the message
+        embed = discord.Embed(
+            title="Price Alert Set",
+            description=f"I'll ping you here when {self.data_manager.get_display_name(checked_id)} is {'above' if direction_value == ABOVE else 'below'} {format_crypto_price(threshold)}.",
+            color=discord.Color.dark_purple()
+        )
+
+        # Set a footer with the alert's number (for removing it later)
+        embed.set_footer(text=f"Alert #{alert.alert_id} | Remove it with !unalert {alert.alert_id}")
+
+        # Send the message
+        await ctx.send(embed=embed)
+
+    # Function to list the user's price alerts
+    @commands.command()
+    async def alerts(self, ctx):
+        user_alerts = self.alert_book.for_user(ctx.author.id)
+
+        # Create the embed to hold the message
+        embed = discord.Embed(
+            title="Your Price Alerts",
+            color=discord.Color.dark_purple()
+        )
+
+        # One line per alert
+        if user_alerts:
+            embed.description = "\n".join(f"#{alert.alert_id}: {self.data_manager.get_display_name(alert.coin_id) or alert.coin_id} {'above' if alert.direction == ABOVE else 'below'} {format_crypto_price(alert.threshold)}" for alert in user_alerts)
+        else:
+            embed.description = "You don't have any alerts. Set one with e.g. `!alert ethereum below 2000`."
+
+        # Set a footer with the user's allowance
+        embed.set_footer(text=f"{len(user_alerts)}/{self.alert_book.max_per_user} alerts")
+
+        # Send the message
+        await ctx.send(embed=embed)
+
+    # Function to remove one of the user's price alerts by its number
+    @commands.command()
+    async def unalert(self, ctx, alert_id: int):
+        alert = self.alert_book.remove(alert_id, user_id=ctx.author.id)
+
+        # Only the alert's owner can remove it
+        if alert is None:
+            await self.send_error(ctx, "Alert not found", "You don't have an alert with that number. See your alerts with `!alerts`.")
+            return
+
+        # Create the embed to hold the message
+        embed = discord.Embed(
+            title="Price Alert Removed",
+            description=f"Alert #{alert.alert_id} for {self.data_manager.get_display_name(alert.coin_id) or alert.coin_id} is gone.",
+            color=discord.Color.dark_purple()
+        )
+
+        # Send the message
+        await ctx.send(embed=embed)
+
+# Setup function to load the cog into the bot
+async def setup(bot):
+    try:
+        await bot.add_cog(AlertsCog(bot))
+    except Exception as e:
+        print(f"Error when loading cog: {e}")
@@ -0,0 +1,210 @@
+# Imports
+import io
+import math
+import time
+import discord
+from concurrent.futures import BrokenExecutor
+from discord.ext import commands
+from utils.api_client import UpstreamError
+from utils.chart import render_chart
+from utils.cpu_pool import CPUPoolFullError
+from utils.formatting import format_crypto_price, format_duration
+from utils.price_history import parse_window
+
+# Window used when the user doesn't give one
+DEFAULT_WINDOW = '24h'
+
+# Function to format a price for these answers (prices too small to show say so)
+def format_price(price) -> str:
+    price_value_string = format_crypto_price(price)
+    return price_value_string if price_value_string != "0" else "too small to display"
+
+# Create class (answers from the bot's own price history instead of asking the api again)
+class HistoryCog(commands.Cog):
+
+    # Init method (set important variables)
+    def __init__(self, bot):
+        self.bot = bot
+        self.data_manager = bot.data_manager
+        self.quote_service = bot.quote_service
+        self.price_history = bot.price_history
+        self.cpu_pool = bot.cpu_pool
+        self.chart_cache = bot.chart_cache
+
+    # Function to send an error embed (every bad input here gets the same treatment)
+    async def send_error(self, ctx, name, value):
+        # Make a pretty embed for the user's unfortunate news
+        embed = discord.Embed(
+            title="ERROR",
+            color=0xC41E3A
+        )
+
+        # Add field with details
+        embed.add_field(name=name, value=value, inline=False)
+
+        # Send the message
+        await ctx.send(embed=embed)
+
+    # Function to find the coin a user means (name, then id, then a ticker symbol we have history for, then the usual typo prompt)
+    async def resolve_coin(self, ctx, name) -> str:
+        checked_id = self.data_manager.get_coin_name(name) or self.data_manager.get_coin_id(name)
+        if checked_id is None:
+            registry = self.data_manager.registry
+            tracked = [registry.ids[row] for row in registry.rows_for_symbol(name) if registry.ids[row] in self.price_history.rows]
+            checked_id = tracked[0] if tracked else None
+        if checked_id is None:
+            checked_id = await self.data_manager.get_corrected_name(ctx, name)
+        return checked_id
+
+    # Function to sum up a coin's recent prices for a command (returns (coin id, window summary), or None once the user has been told why not)
+    async def load_window(self, ctx, name, window):
+        # Check the window (and that we keep that much history)
+        seconds = parse_window(window)
+        if seconds is None:
+            await self.send_error(ctx, "Invalid window", "Use something like `30m`, `1h`, `24h` or `7d`.")
+            return None
+        if seconds > self.price_history.span:
+            await self.send_error(ctx, "Window too long", f"I keep up to {format_duration(self.price_history.span)} of prices per coin.")
+            return None
+
+        # Check the user-inputted coin for validity (quit if none found)
+        checked_id = await self.resolve_coin(ctx, name)
+        if checked_id == None:
+            return None
+
+        # Top up with a current quote if our newest sample is out of date (usually straight from the quote cache; recorded like every other quote)
+        if self.price_history.stale([checked_id]):
+            try:
+                await self.quote_service.get_simple(checked_id)
+            except UpstreamError:
+                pass # Whatever we have locally still answers the question
+        else:
+            self.price_history.want(checked_id)
+
+        # Nothing recorded for this coin yet (asking about it just started the recording)
+        summary = self.price_history.window(checked_id, seconds)
+        if summary is None:
+            await self.send_error(ctx, "No price history", "I don't have any prices for this coin yet. It's being recorded from now on, so try again in a bit.")
+            return None
+        return checked_id, summary
+
+    # Function to build the embed every history answer shares (title, footer saying where the numbers came from and how far back they go)
+    def history_embed(self, checked_id, summary):
+        # Create the embed to hold the message
+        embed = discord.Embed(
+            title=f"{self.data_manager.get_display_name(checked_id) or checked_id}",
+            color=discord.Color.dark_purple()
+        )
+
+        # Set a footer with where the numbers came from (and a warning if the history doesn't reach back the whole window yet)
+        footer = f"From local price history | {summary['samples']} samples"
+        if not summary['covered']:
+            footer += f" | Only {format_duration(summary['end_at'] - summary['start_at'])} of history so far"
+        embed.set_footer(text=footer)
+        return embed
+
+    # Function to show how much a coin's price moved over a window, e.g. `!change bitcoin 1h` (24h if no window given)
+    @commands.command()
+    async def change(self, ctx, name: str, window: str = DEFAULT_WINDOW):
+        loaded = await self.load_window(ctx, name, window)
+        if loaded is None:
+            return
+        checked_id, summary = loaded
+        embed = self.history_embed(checked_id, summary)
+
+        # Add the change and the prices it's between
+        change = summary['change']
+        embed.add_field(name=f"Change ({window.strip().lower()}):", value=f"{change * 100:+.2f}%" if math.isfinite(change) else "N/A", inline=False)
+        embed.add_field(name="Price (USD):", value=f"{format_price(summary['start_price'])} → {format_price(summary['end_price'])}", inline=False)
+
+        # Send the message
+        await ctx.send(embed=embed)
+
+    # Function to show a coin's highest price over a window, e.g. `!high bitcoin 7d` (24h if no window given)
+    @commands.command()
+    async def high(self, ctx, name: str, window: str = DEFAULT_WINDOW):
+        loaded = await self.load_window(ctx, name, window)
+        if loaded is None:
+            return
+        checked_id, summary = loaded
+        embed = self.history_embed(checked_id, summary)
+
+        # Add the high and when it was
+        embed.add_field(name=f"High ({window.strip().lower()}):", value=f"{format_price(summary['high'])} ({format_duration(time.time() - summary['high_at'])} ago)", inline=False)
+
+        # Send the message
+        await ctx.send(embed=embed)
+
+    # Function to show a coin's lowest price over a window, e.g. `!low bitcoin 7d` (24h if no window given)
+    @commands.command()
+    async def low(self, ctx, name: str, window: str = DEFAULT_WINDOW):
+        loaded = await self.load_window(ctx, name, window)
+        if loaded is None:
+            return
+        checked_id, summary = loaded
+        embed = self.history_embed(checked_id, summary)
+
+        # Add the low and when it was
+        embed.add_field(name=f"Low ({window.strip().lower()}):", value=f"{format_price(summary['low'])} ({format_duration(time.time() - summary['low_at'])} ago)", inline=False)
+
+        # Send the message
+        await ctx.send(embed=embed)
+
+    # Function to get the PNG chart of a coin's last `seconds` up to its newest sample (from the disk cache if this exact chart was drawn before; raises CPUPoolFullError if the pool is swamped)
+    async def chart_image(self, checked_id, seconds, summary) -> bytes:
+        # The newest sample's time pins down exactly what's in the chart (any new sample moves it), so it doubles as the data version
+        chart_key = (checked_id, seconds, summary['end_at'])
+        png = await self.chart_cache.get(chart_key)
+        if png is not None:
+            return png
+
+        # Take the window's samples, plus the one before it so the line starts at the window's starting price
+        times, prices = self.price_history.series(checked_id, since=summary['end_at'] - seconds)
+
+        # Draw it on a process worker (they're pre-warmed with the chart code when they start), or a worker thread if there are no process workers or they died
+        png = None
+        if self.cpu_pool.process_pool is not None:
+            try:
+                png = await self.cpu_pool.run_in_process('chart', render_chart, times, prices)
+            except BrokenExecutor as e:
+                print(f"Chart worker failed, drawing on a thread instead: {e!r}")
+        if png is None:
+            png = await self.cpu_pool.run('chart', render_chart, times, prices)
+
+        # Keep it for the next time someone asks for the same chart before a new sample comes in
+        await self.chart_cache.put(chart_key, png)
+        return png
+
+    # Function to draw a coin's price over a window, e.g. `!chart bitcoin 7d` (24h if no window given)
+    @commands.command()
+    async def chart(self, ctx, name: str, window: str = DEFAULT_WINDOW):
+        loaded = await self.load_window(ctx, name, window)
+        if loaded is None:
+            return
+        checked_id, summary = loaded
+
+        # Get the chart (the draw queue is bounded, so a flood of charts gets turned away instead of piling up)
+        try:
+            png = await self.chart_image(checked_id, parse_window(window), summary)
+        except CPUPoolFullError:
+            await self.send_error(ctx, "Busy", "The bot is drawing a lot of charts right now. Please try again in a few seconds.")
+            return
+        embed = self.history_embed(checked_id, summary)
+
+        # Add the latest price and the change over the window
+        change = summary['change']
+        embed.add_field(name="Price (USD):", value=format_price(summary['end_price']), inline=False)
+        embed.add_field(name=f"Change ({window.strip().lower()}):", value=f"{change * 100:+.2f}%" if math.isfinite(change) else "N/A", inline=False)
+
+        # Show the chart inside the embed (it's attached to the message and the embed points at the attachment)
+        embed.set_image(url="attachment://chart.png")
+
+        # Send the message
+        await ctx.send(embed=embed, file=discord.File(io.BytesIO(png), filename='chart.png'))
+
+# Setup function to load the cog into the bot
+async def setup(bot):
+    try:
+        await bot.add_cog(HistoryCog(bot))
+    except Exception as e:
+        print(f"Error when loading cog: {e}")
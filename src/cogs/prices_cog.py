@@ -1,9 +1,17 @@
 # Imports
+import math
+import time
 import discord
 from discord.ext import commands
-from decimal import *
-import os
-import aiohttp
+from utils.api_client import RateLimitedError, UpstreamError
+from utils.data_manager import MAX_COINS_PER_COMMAND, split_coins
+from utils.formatting import format_crypto_price
+from utils.providers import quote_source
+from utils.render_cache import with_footer
+from utils.paginator import EmbedPaginator
+
+# Coins per page of a !topcap answer
+TOPCAP_PAGE_SIZE = 10
 
 # Create class
 class PricesCog(commands.Cog):
@@ -12,68 +20,127 @@ class PricesCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.data_manager = bot.data_manager
-        self.api_key = os.getenv('KEY')
-        self.gecko_key = os.getenv('GECKO_KEY')
-
-    # Internal helper function for price display (to display prices below $0.01, instead of just `0.00`) to be used inside of other functions
-    @staticmethod
-    def format_crypto_price(price) -> str:
-        # Check if the price exists
-        if price is None:
-            return "0"
-
-        # Convert the price (from the CMC API call) to a Decimal object (instead of float. Gives us more precision instead of worrying about float rounding conventions)
-        price = Decimal(str(price))
-        
-        # If price is >= $1.00, format with two decimal places and return (ezpz)
-        if price >= Decimal('1.00'):
-            return f"${price:,.2f}"
-        # If price is between $1.00 and $0.01, show 4 decimal places exactly (ezpz)
-        elif Decimal('1.00') > price >= Decimal('0.01'):
-            # Format the price exactly as-is; cut off at 4 decimals
-            formatted_price = f"${price.quantize(Decimal('0.0001'), rounding=ROUND_DOWN)}"
-            # Return the price with no trailing zeros
-            return formatted_price.rstrip('0')
-        # If less than $0.01,
-        else:
-            # Define the number of digits to cut off the number at (to avoid overflow or Discord message errors) (I use 15 arbitrarily; beginning-string slicing is non-inclusive)
-            MAX_DIGITS = 16
+        self.api_client = bot.api_client
+        self.quote_service = bot.quote_service
+        self.render_cache = bot.render_cache
+        self.live_prices = bot.live_prices
+        self.live_feed = bot.live_feed
+
+    # Function to answer a single coin straight from the live feed (returns False if the feed has no fresh price for it, so the caller fetches a quote instead)
+    async def send_live_price(self, ctx, coin_id) -> bool:
+        # Look in the streamed prices
+        live = self.live_prices.get(coin_id)
+        if live is None:
+            return False
+        price, age = live
+
+        # Use the helper function to format it (a price too small to show goes the normal way, which knows how to explain that)
+        price_value_string = format_crypto_price(price)
+        if price_value_string == "0":
+            return False
+
+        # Create the embed to hold the message
+        embed = discord.Embed(
+            title=f"{self.data_manager.get_display_name(coin_id) or coin_id}",
+            color=discord.Color.dark_purple()
+        )
+
+        # Add it to the embed
+        embed.add_field(name="Price (USD):", value=price_value_string, inline=False)
+
+        # Set a professional footer to the message (with where the price was streamed from and how old it is)
+        embed.set_footer(text=f"Live from {self.live_feed.name if self.live_feed is not None else 'the live feed'} | Tick age: {age:.1f}s")
+
+        # Send the message
+        await ctx.send(embed=embed)
+        return True
+
+    # Function to send the prices of several coins in one compact embed (resolves every name/id at once, prompts only for typos, and makes one upstream call for all of them)
+    async def send_prices(self, ctx, queries, kind):
+        # Too many coins for one embed
+        if len(queries) > MAX_COINS_PER_COMMAND:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
 
-            # Convert the price to string (within the fixed-point context 'f') for further breakdown/analysis
-            raw_price_str = format(price, 'f')
+            # Add field with details
+            embed.add_field(name="Too many coins", value=f"Please ask for at most {MAX_COINS_PER_COMMAND} coins at once.", inline=False)
 
-            # Extract the decimal portion out of the string (because we only care about the decimal here, being that the price is less than 1 cent)
-            raw_decimal_str = raw_price_str.split('.')[1]
+            # Send the message
+            await ctx.send(embed=embed)
+            return
 
-            # Create variable to store the first non-zero index in our decimal point (beyond the hundreths place obv)
-            # Set to None as we do not know the first non-zero index yet
-            non_zero_index = None
-            
-            # Use a for loop (with enumerate) to iterate over to 'digits' (characters) in our string to see if we can find a non-zero index in our first 15 indices
-            for i, digit in enumerate(raw_decimal_str[:MAX_DIGITS], 1):
-                # Check if digit is non-zero (remember, we are enumerating over a string!)
-                if digit != '0':
-                    # Store this non-zero index
-                    non_zero_index = i
-                    # Exit loop; we got what we need
-                    break
-            
-            # If the number cannot be formatted, return None and handle the issue in the calling function
-            if non_zero_index == None:
-                return "0"
+        # Resolve every coin (quit if the user gave up on all of them)
+        coin_ids = await self.data_manager.resolve_many(ctx, queries, kind)
+        if not coin_ids:
+            return
+
+        # Fetch every quote with markets endpoint through the shared quote cache (everything stale goes out in one request)
+        try:
+            quotes = await self.quote_service.get_many('markets', coin_ids)
+        # If the request was not successful,
+        except UpstreamError as e:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
 
-            # Otherwise,
+            # Add field with details (being rate limited gets its own message, since trying again shortly will work)
+            if isinstance(e, RateLimitedError):
+                embed.add_field(name="Rate limited", value="The bot is getting a lot of requests right now. Please try again in a few seconds.", inline=False)
             else:
-                # Choose the number's display cutoff (using non_zero_index + 2 for context beyond just the one decimal place found; MAX_DIGITS for max-length arbitrary cutoff)
-                displayed_sigfigs = min(non_zero_index + 2, MAX_DIGITS)
-                # Format as string
-                formatted_number = f"${price:.{displayed_sigfigs}f}"
-                # And return
-                return formatted_number
-
-    # Function to automatically fetch the price of any cryptocurrency using its name as the arg
+                embed.add_field(name="API Error", value="An error occurred while fecthing the data from CoinGecko API. Please try again later.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+            return
+
+        # Answer with the embed already rendered from these exact quotes, if there is one
+        footer = f"Powered by {quote_source(*(quotes[coin_id][0] for coin_id in coin_ids))} | Quote age: up to {max(age for _, age in quotes.values()):.0f}s"
+        render_key = ('prices', tuple(coin_ids))
+        embed = self.render_cache.get(render_key, [quotes[coin_id][0] for coin_id in coin_ids])
+        if embed is not None:
+            await ctx.send(embed=with_footer(embed, footer))
+            return
+
+        # One line per coin (coins without a displayable price say so on their own line)
+        lines = []
+        for coin_id in coin_ids:
+            crypto_data, quote_age = quotes[coin_id]
+            if not crypto_data:
+                lines.append(f"**{self.data_manager.get_display_name(coin_id) or coin_id}**: not found")
+                continue
+            price_value_string = format_crypto_price(crypto_data['current_price'])
+            if price_value_string == "0":
+                price_value_string = "too small to display"
+            lines.append(f"**{crypto_data['name']}** ({crypto_data['symbol'].upper()}): {price_value_string}")
+
+        # Create the embed to hold the message
+        embed = discord.Embed(
+            title="Prices (USD)",
+            description="\n".join(lines),
+            color=discord.Color.dark_purple()
+        )
+
+        # Keep it for the next time someone asks for the same coins before their quotes change (without the footer, since the quote age changes every second)
+        self.render_cache.put(render_key, [quotes[coin_id][0] for coin_id in coin_ids], embed)
+
+        # Send the message, with a professional footer (who the quotes came from and how old the oldest one is)
+        await ctx.send(embed=with_footer(embed, footer))
+
+    # Function to automatically fetch the price of any cryptocurrency using its name as the arg (or several at once, e.g. `!price bitcoin ethereum solana`)
     @commands.command()
-    async def price(self, ctx, name: str):
+    async def price(self, ctx, name: str, *names: str):
+        # More than one coin asked for, so answer them all in one embed
+        queries = split_coins((name, *names))
+        if len(queries) > 1:
+            await self.send_prices(ctx, queries, 'name')
+            return
+        name = queries[0] if queries else name
+
         # Check the user-inputted name for validity
         checked_name = self.data_manager.get_coin_name(name)
 
@@ -85,102 +152,100 @@ class PricesCog(commands.Cog):
         if checked_name == None:
             return
 
-        # Fetch cryptocurrencies with markets endpoint (provides some better data than simple/price endpoint)
-        url = 'https://api.coingecko.com/api/v3/coins/markets'
-        
-        # Headers for CoinGecko API authentication
-        headers = { 
-            'x-cg-demo-api-key': self.gecko_key,
-        }
-
-        # Parameters for the search to query the url
-        parameters = { 
-            'vs_currency': 'usd',
-            'ids': checked_name,
-            'precision': '15',
-        }
-
-        # Asynchronously create a ClientSession (so the bot can make multiple HTTP calls and not get blocked from just one call)
-        async with aiohttp.ClientSession() as session:
-            # Make the aynchronous request to the api
-            async with session.get(url, params=parameters, headers=headers) as response:
-                # If request successsful,
-                if response.status == 200:
-                    # Parse the response as JSON data
-                    data = await response.json()
-
-                    # Check if our parameter is in the response data,
-                    if data:
-
-                        # Reassign the JSON data to a variable for easier token access (because we GET a list of one dict)
-                        crypto_data = data[0]
-
-                        # Find the price of the specified crypto and use the helper function that I spent 8 years on to format it
-                        price_value_string = self.format_crypto_price(crypto_data['current_price'])
-
-                        # Check if the price is too small (or null) and create an embed
-                        if price_value_string == "0":
-
-                            # Make a pretty embed for the user's unfortunate news
-                            embed = discord.Embed(
-                                title="ERROR",
-                                color=0xC41E3A
-                            )
-
-                            # Add field with details
-                            embed.add_field(name="Price display error", value="The price of this coin does not exist, or is too small to display. For more accurate results, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
-
-                            # Send the message
-                            await ctx.send(embed=embed)
-                        # If price can be displayed,
-                        else:
-
-                            # Create the embed to hold the message
-                            embed = discord.Embed(
-                                title=f"{crypto_data['name']}",
-                                color=discord.Color.dark_purple()
-                            )
-
-                            # Add it to the embed
-                            embed.add_field(name="Price (USD):", value=price_value_string, inline=False)
-
-                            # Set a professional footer to the message
-                            embed.set_footer(text="Powered by CoinGecko")
-
-                            # Send the message
-                            await ctx.send(embed=embed)
-
-                    # If id not in response data (user messed up)
-                    else:
-                        # Make a pretty embed for the user's unfortunate news
-                        embed = discord.Embed(
-                            title="ERROR",
-                            color=0xC41E3A
-                        )
-                        
-                        # Add field with details
-                        embed.add_field(name="Cryptocurrency not found", value="The name you provided is not recognized. Please check the name and try again.", inline=False)
-
-                        # Send the message
-                        await ctx.send(embed=embed)
-                
-                # If the request was not successful,
-                else:
-                    # Make a pretty embed for the user's unfortunate news
-                    embed = discord.Embed(
-                        title="ERROR",
-                        color=0xC41E3A
-                    )
+        # Answer from the live feed if it has a fresh price for this coin (the most popular coins never have to wait on the api)
+        if await self.send_live_price(ctx, checked_name):
+            return
+
+        # Fetch the quote with markets endpoint (provides some better data than simple/price endpoint) through the shared quote cache (only hits the api if our copy is stale)
+        try:
+            crypto_data, quote_age = await self.quote_service.get_market(checked_name)
+        # If the request was not successful,
+        except UpstreamError as e:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add field with details (being rate limited gets its own message, since trying again shortly will work)
+            if isinstance(e, RateLimitedError):
+                embed.add_field(name="Rate limited", value="The bot is getting a lot of requests right now. Please try again in a few seconds.", inline=False)
+            else:
+                embed.add_field(name="API Error", value="An error occurred while fecthing the data from CoinGecko API. Please try again later.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+            return
+
+        # Check if our parameter is in the response data,
+        if crypto_data:
 
-                    # Add field with details
-                    embed.add_field(name="API Error", value="An error occurred while fecthing the data from CoinGecko API. Please try again later.", inline=False)
+            # Answer with the embed already rendered from this exact quote, if there is one (a hot coin gets asked about over and over before its quote changes)
+            footer = f"Powered by {quote_source(crypto_data)} | Quote age: {quote_age:.0f}s"
+            embed = self.render_cache.get(('price', checked_name), (crypto_data,))
+            if embed is not None:
+                await ctx.send(embed=with_footer(embed, footer))
+                return
 
-                    # Send the message
-                    await ctx.send(embed=embed)
+            # Find the price of the specified crypto and use the helper function that I spent 8 years on to format it
+            price_value_string = format_crypto_price(crypto_data['current_price'])
+
+            # Check if the price is too small (or null) and create an embed
+            if price_value_string == "0":
+
+                # Make a pretty embed for the user's unfortunate news
+                embed = discord.Embed(
+                    title="ERROR",
+                    color=0xC41E3A
+                )
+
+                # Add field with details
+                embed.add_field(name="Price display error", value="The price of this coin does not exist, or is too small to display. For more accurate results, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
+
+                # Send the message
+                await ctx.send(embed=embed)
+            # If price can be displayed,
+            else:
 
-    # Function to automatically fetch the price of any cryptocurrency using its (CoinGecko) id as the arg
+                # Create the embed to hold the message
+                embed = discord.Embed(
+                    title=f"{crypto_data['name']}",
+                    color=discord.Color.dark_purple()
+                )
+
+                # Add it to the embed
+                embed.add_field(name="Price (USD):", value=price_value_string, inline=False)
+
+                # Keep it for the next time someone asks before the quote changes (without the footer, since the quote age changes every second)
+                self.render_cache.put(('price', checked_name), (crypto_data,), embed)
+
+                # Send the message, with a professional footer (who the quote came from and how old it is)
+                await ctx.send(embed=with_footer(embed, footer))
+
+        # If id not in response data (user messed up)
+        else:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+                
+            # Add field with details
+            embed.add_field(name="Cryptocurrency not found", value="The name you provided is not recognized. Please check the name and try again.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+
+    # Function to automatically fetch the price of any cryptocurrency using its (CoinGecko) id as the arg (or several at once)
     @commands.command()
-    async def priceid(self, ctx, id: str):
+    async def priceid(self, ctx, id: str, *ids: str):
+        # More than one coin asked for, so answer them all in one embed
+        queries = split_coins((id, *ids))
+        if len(queries) > 1:
+            await self.send_prices(ctx, queries, 'id')
+            return
+        id = queries[0] if queries else id
+
         # Check the user-inputted id for validity
         checked_id = self.data_manager.get_coin_id(id)
 
@@ -191,171 +256,153 @@ class PricesCog(commands.Cog):
         # If none found after that, quit function
         if checked_id == None:
             return
+
+        # Answer from the live feed if it has a fresh price for this coin (the most popular coins never have to wait on the api)
+        if await self.send_live_price(ctx, checked_id):
+            return
         
-        # Fetch cryptocurrencies with markets endpoint (provides some better data than simple/price endpoint)
-        url = 'https://api.coingecko.com/api/v3/coins/markets'
-        
-        # Headers for CoinGecko API authentication
-        headers = { 
-            'x-cg-demo-api-key': self.gecko_key,
-        }
-
-        # Parameters for the search to query the url
-        parameters = { 
-            'vs_currency': 'usd',
-            'ids': checked_id,
-            'precision': '15',
-        }
-
-        # Asynchronously create a ClientSession (so the bot can make multiple HTTP calls and not get blocked from just one call)
-        async with aiohttp.ClientSession() as session:
-            # Make the aynchronous request to the api
-            async with session.get(url, params=parameters, headers=headers) as response:
-                # If request successsful,
-                if response.status == 200:
-                    # Parse the response as JSON data
-                    data = await response.json()
-
-                    # Check if our parameter is in the response data,
-                    if data:
-
-                        # Reassign the JSON data to a variable for easier token access (because we GET a list of one dict)
-                        crypto_data = data[0]
-
-                        # Find the price of the specified crypto and use the helper function that I spent 8 years on to format it
-                        price_value_string = self.format_crypto_price(crypto_data['current_price'])
-
-                        # Check if the price is too small (or null) and create an embed
-                        if price_value_string == "0":
-
-                            # Make a pretty embed for the user's unfortunate news
-                            embed = discord.Embed(
-                                title="ERROR",
-                                color=0xC41E3A
-                            )
-
-                            # Add field with details
-                            embed.add_field(name="Price display error", value="The price of this coin does not exist, or is too small to display. For more accurate results, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
-
-                            # Send the message
-                            await ctx.send(embed=embed)
-                        # If price can be displayed,
-                        else:
-
-                            # Create the embed to hold the message
-                            embed = discord.Embed(
-                                title=f"{crypto_data['name']}",
-                                color=discord.Color.dark_purple()
-                            )
-
-                            # Add it to the embed
-                            embed.add_field(name="Price (USD):", value=price_value_string, inline=False)
-
-                            # Set a professional footer to the message
-                            embed.set_footer(text="Powered by CoinGecko")
-
-                            # Send the message
-                            await ctx.send(embed=embed)
-
-                    # If id not in response data (user messed up)
-                    else:
-                        # Make a pretty embed for the user's unfortunate news
-                        embed = discord.Embed(
-                            title="ERROR",
-                            color=0xC41E3A
-                        )
-                        
-                        # Add field with details
-                        embed.add_field(name="Cryptocurrency not found", value="The id you provided is not recognized. Please check the id and try again.", inline=False)
-
-                        # Send the message
-                        await ctx.send(embed=embed)
-                
-                # If the request was not successful,
-                else:
-                    # Make a pretty embed for the user's unfortunate news
-                    embed = discord.Embed(
-                        title="ERROR",
-                        color=0xC41E3A
-                    )
+        # Fetch the quote with markets endpoint (provides some better data than simple/price endpoint) through the shared quote cache (only hits the api if our copy is stale)
+        try:
+            crypto_data, quote_age = await self.quote_service.get_market(checked_id)
+        # If the request was not successful,
+        except UpstreamError as e:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
 
-                    # Add field with details
-                    embed.add_field(name="API Error", value="An error occurred while fecthing the data from CoinGecko API. Please try again later.", inline=False)
+            # Add field with details (being rate limited gets its own message, since trying again shortly will work)
+            if isinstance(e, RateLimitedError):
+                embed.add_field(name="Rate limited", value="The bot is getting a lot of requests right now. Please try again in a few seconds.", inline=False)
+            else:
+                embed.add_field(name="API Error", value="An error occurred while fecthing the data from CoinGecko API. Please try again later.", inline=False)
 
-                    # Send the message
-                    await ctx.send(embed=embed)
+            # Send the message
+            await ctx.send(embed=embed)
+            return
+
+        # Check if our parameter is in the response data,
+        if crypto_data:
+
+            # Answer with the embed already rendered from this exact quote, if there is one (a hot coin gets asked about over and over before its quote changes)
+            footer = f"Powered by {quote_source(crypto_data)} | Quote age: {quote_age:.0f}s"
+            embed = self.render_cache.get(('price', checked_id), (crypto_data,))
+            if embed is not None:
+                await ctx.send(embed=with_footer(embed, footer))
+                return
+
+            # Find the price of the specified crypto and use the helper function that I spent 8 years on to format it
+            price_value_string = format_crypto_price(crypto_data['current_price'])
+
+            # Check if the price is too small (or null) and create an embed
+            if price_value_string == "0":
+
+                # Make a pretty embed for the user's unfortunate news
+                embed = discord.Embed(
+                    title="ERROR",
+                    color=0xC41E3A
+                )
+
+                # Add field with details
+                embed.add_field(name="Price display error", value="The price of this coin does not exist, or is too small to display. For more accurate results, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
+
+                # Send the message
+                await ctx.send(embed=embed)
+            # If price can be displayed,
+            else:
+
+                # Create the embed to hold the message
+                embed = discord.Embed(
+                    title=f"{crypto_data['name']}",
+                    color=discord.Color.dark_purple()
+                )
 
-    # Function to display custom (up to 10) amount of top cryptocurrencies by market cap (includes symbol, name, price as well)
+                # Add it to the embed
+                embed.add_field(name="Price (USD):", value=price_value_string, inline=False)
+
+                # Keep it for the next time someone asks before the quote changes (without the footer, since the quote age changes every second)
+                self.render_cache.put(('price', checked_id), (crypto_data,), embed)
+
+                # Send the message, with a professional footer (who the quote came from and how old it is)
+                await ctx.send(embed=with_footer(embed, footer))
+
+        # If id not in response data (user messed up)
+        else:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+                
+            # Add field with details
+            embed.add_field(name="Cryptocurrency not found", value="The id you provided is not recognized. Please check the id and try again.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+
+    # Function to display custom amount of top cryptocurrencies by market cap (includes symbol, name, price as well; answered from the local snapshot, with pages for long lists)
     @commands.command()
     async def topcap(self, ctx, number: int):
-        # Check if input is valid, proceed if so
-        if 10 >= number >= 1:
+        top_listings = self.data_manager.top_listings
 
-            # Fetch cryptocurrencies (sorted by market cap) with url below
-            url = 'https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest'
-            
-            # Headers for CoinMarketCap API authentication
-            headers = { 
-                'X-CMC_PRO_API_KEY': self.api_key,
-                'Accepts': 'application/json'
-            }
-
-            # Only access the top 5 of those listings, and return their prices in USD
-            parameters = {
-                'start': '1',
-                'limit': number, 
-                'convert': 'USD'
-            }
-
-            # Asynchronously create a ClientSession (so the bot can make multiple HTTP calls and not get blocked from just one call)
-            async with aiohttp.ClientSession() as session:
-                # The actual request
-                async with session.get(url, params=parameters, headers=headers) as response:
-                    # Request successsful,
-                    if response.status == 200:
-                        # Parse the response as JSON data
-                        data = await response.json()
-
-                        # Check user input before we create embed (for accurate grammar in title)
-                        if number == 1:
-                            title = "Top Cryptocurrency by Market Cap"
-                        else:
-                            title = f"Top {str(number)} Cryptocurrencies by Market Cap"
-
-                        # Create the embed to hold the message
-                        embed = discord.Embed(
-                            title=title,
-                            color=discord.Color.dark_purple()
-                        )
-
-                        # Iterate through every value in the JSON data (each coin's data)
-                        for coin in data['data']:
-                            # Add name and symbol to one field; price and market cap in another
-                            name_symbol = f"{coin['cmc_rank']}. {coin['name']} ({coin['symbol']})"
-                            price_market_cap = f"Price: {self.format_crypto_price(coin['quote']['USD']['price'])}\nMarket Cap: ${coin['quote']['USD']['market_cap']:,.0f}"
-                            
-                            # Each cryptocurrency is added as a new field
-                            embed.add_field(name=name_symbol, value=price_market_cap, inline=False)
-
-                            # Set a professional footer to the message
-                            embed.set_footer(text="Data retrieved from CoinMarketCap")
-
-                        # Send the message
-                        await ctx.send(embed=embed)
-
-                    # HTTP request is not successful, display error message
-                    else:
-                        # Make a pretty embed for the user's unfortunate news
-                        embed = discord.Embed(
-                            title="ERROR",
-                            color=0xC41E3A
-                        )
-
-                        # Add the bad news
-                        embed.add_field(name="There was an error fetching the cryptocurrency list", value=f"Error Code: {response.status_code}", inline=False)
-
-                        # Deliver
-                        await ctx.send(embed=embed)
+        # Check if input is valid, proceed if so
+        if top_listings.size >= number >= 1:
+
+            # Make sure there's a snapshot to answer from (only waits on the api if the background refresh hasn't managed to fetch one yet)
+            try:
+                await top_listings.ensure_loaded()
+            # HTTP request is not successful, display error message
+            except UpstreamError as e:
+                # Make a pretty embed for the user's unfortunate news
+                embed = discord.Embed(
+                    title="ERROR",
+                    color=0xC41E3A
+                )
+
+                # Add the bad news
+                embed.add_field(name="There was an error fetching the cryptocurrency list", value=f"Error Code: {e.status or 'no response'}", inline=False)
+
+                # Deliver
+                await ctx.send(embed=embed)
+                return
+
+            # Grab the pre-formatted rows (holding on to this snapshot's rows and timestamp, so every page shows the same data even if a refresh lands meanwhile)
+            rows = top_listings.top(number)
+            fetched_at, source = top_listings.fetched_at, top_listings.source
+            pages = max(1, math.ceil(len(rows) / TOPCAP_PAGE_SIZE))
+
+            # Check user input before we create embed (for accurate grammar in title)
+            if number == 1:
+                title = "Top Cryptocurrency by Market Cap"
+            else:
+                title = f"Top {str(number)} Cryptocurrencies by Market Cap"
+
+            # Function to build one page of the answer
+            def make_page(page):
+                # Create the embed to hold the message
+                embed = discord.Embed(
+                    title=title,
+                    color=discord.Color.dark_purple()
+                )
+
+                # Each cryptocurrency is added as a new field (name and symbol in one; price and market cap in the other)
+                for name_symbol, price_market_cap in rows[page * TOPCAP_PAGE_SIZE:(page + 1) * TOPCAP_PAGE_SIZE]:
+                    embed.add_field(name=name_symbol, value=price_market_cap, inline=False)
+
+                # Set a professional footer to the message (with who the snapshot came from, how old it is, and where we are in the pages)
+                footer = f"Data retrieved from {source} | Snapshot age: {time.monotonic() - fetched_at:.0f}s"
+                if pages > 1:
+                    footer += f" | Page {page + 1}/{pages}"
+                embed.set_footer(text=footer)
+                return embed
+
+            # Send the message (with page buttons if it doesn't fit on one page)
+            if pages == 1:
+                await ctx.send(embed=make_page(0))
+            else:
+                view = EmbedPaginator(ctx.author.id, pages, make_page)
+                view.message = await ctx.send(embed=make_page(0), view=view)
 
         # If the user input was invalid, tell the user to try again
         else:
@@ -366,66 +413,98 @@ class PricesCog(commands.Cog):
             )
 
             # Add the bad news
-            embed.add_field(name="Invalid input", value="Please enter a valid input (1-10)", inline=False)
+            embed.add_field(name="Invalid input", value=f"Please enter a valid input (1-{top_listings.size})", inline=False)
 
             # Deliver
             await ctx.send(embed=embed)
 
+    # Function to refresh the top market cap snapshot right now (bot owner only)
+    @commands.command()
+    @commands.is_owner()
+    async def topcaprefresh(self, ctx):
+        top_listings = self.data_manager.top_listings
+
+        # Refresh ahead of anything queued in the background
+        try:
+            start = time.perf_counter()
+            await top_listings.force_refresh()
+        # HTTP request is not successful, display error message (the old snapshot keeps being served)
+        except UpstreamError as e:
+            # Make a pretty embed for the owner's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add the bad news
+            embed.add_field(name="There was an error refreshing the cryptocurrency list", value=f"Error Code: {e.status or 'no response'}", inline=False)
+
+            # Deliver
+            await ctx.send(embed=embed)
+            return
+
+        # Create the embed to hold the message
+        embed = discord.Embed(
+            title="Top Market Cap Snapshot Refreshed",
+            description=f"{len(top_listings.rows)} coins in {(time.perf_counter() - start) * 1000:.0f} ms.",
+            color=discord.Color.dark_purple()
+        )
+
+        # Send the message
+        await ctx.send(embed=embed)
+
     # Function to display the 'id' value of a specific coin from CMC API
     @commands.command()
     async def id(self, ctx, name: str):
-        # Fetch specified crypto using this url + extension (it has every crypto easily accessible) 
-        url = 'https://pro-api.coinmarketcap.com/v1/cryptocurrency/map'
-
-        # Headers for CoinMarketCap API authentication
-        headers = { 
-            'X-CMC_PRO_API_KEY': self.api_key,
-            'Accepts': 'application/json'
-        }
-
-        # Asynchronously create a ClientSession (so the bot can make multiple HTTP calls and not get blocked from just one call)
-        async with aiohttp.ClientSession() as session:
-            # The actual request
-            async with session.get(url, headers=headers) as response:
-                # Request successsful,
-                if response.status == 200:
-                    # Parse the response as JSON data
-                    data = await response.json()
-
-                    # Search for id in crypto map (so efficient and amazing omg I defintely don't wish there was a better way to do this!)
-                    crypto_id = next((item for item in data['data'] if item['name'].lower() == name.lower()), None)
-
-                    # Create logic for crypto being found in map
-                    if crypto_id:
-
-                        # Create the embed to hold the message
-                        embed = discord.Embed(
-                            title="Coin-Specific CMC API id",
-                            color=discord.Color.dark_purple()
-                        )
-
-                        # Add info to embed
-                        embed.add_field(name=f"{crypto_id['name']} id:", value=f"{crypto_id['id']}", inline=False)
-
-                        # Add footer to embed
-                        embed.set_footer(text="Data retrieved from CoinMarketCap")
-
-                        # Send message
-                        await ctx.send(embed=embed)
-                    
-                    # If crypto not found in map,
-                    else:
-                        # Make a pretty embed for the user's unfortunate news
-                        embed = discord.Embed(
-                            title="ERROR",
-                            color=0xC41E3A
-                        )
-
-                        # Add the bad news
-                        embed.add_field(name="Invalid input", value="The cryptocurrency you provided is not recognized. Please check the spelling and try again.", inline=False)
-
-                        # Deliver
-                        await ctx.send(embed=embed)
+        # Search for id in the shared crypto map (fetched once and hash-indexed by name/slug/symbol, so this only hits the api when the map is missing or stale)
+        try:
+            crypto_id = await self.data_manager.cmc_map.find(name)
+        # If the map could not be fetched,
+        except UpstreamError as e:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add the bad news
+            embed.add_field(name="There was an error fetching the cryptocurrency map", value=f"Error Code: {e.status or 'no response'}", inline=False)
+
+            # Deliver
+            await ctx.send(embed=embed)
+            return
+
+        # Create logic for crypto being found in map
+        if crypto_id:
+
+            # Create the embed to hold the message
+            embed = discord.Embed(
+                title="Coin-Specific CMC API id",
+                color=discord.Color.dark_purple()
+            )
+
+            # Add info to embed
+            embed.add_field(name=f"{crypto_id['name']} id:", value=f"{crypto_id['id']}", inline=False)
+
+            # Add footer to embed
+            embed.set_footer(text="Data retrieved from CoinMarketCap")
+
+            # Send message
+            await ctx.send(embed=embed)
+            
+        # If crypto not found in map,
+        else:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add the bad news
+            embed.add_field(name="Invalid input", value="The cryptocurrency you provided is not recognized. Please check the spelling and try again.", inline=False)
+
+            # Deliver
+            await ctx.send(embed=embed)
 
 # Setup function to load the cog into the bot
 async def setup(bot):
@@ -0,0 +1,97 @@
+# Imports
+import time
+import discord
+from discord.ext import commands
+from utils.formatting import format_duration
+
+# Function to show a latency in seconds as something readable (µs for index lookups, ms for everything else)
+def format_seconds(seconds) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 0.001:
+        return f"{seconds * 1_000_000:.0f}µs"
+    return f"{seconds * 1000:.1f}ms"
+
+# Create class
+class StatsCog(commands.Cog):
+
+    # Init method (set important variables)
+    def __init__(self, bot):
+        self.bot = bot
+        self.metrics = bot.metrics
+
+    # Function to show the bot's live performance numbers (bot owner only)
+    @commands.command()
+    @commands.is_owner()
+    async def stats(self, ctx):
+        # Grab every metric at once (also refreshes the cache/scheduler/registry numbers)
+        data = self.metrics.snapshot()
+
+        # Helper to pull one value out of a metric by its labels (0 if it hasn't been recorded yet)
+        def value(name, **labels):
+            for row_labels, row_value in data.get(name, []):
+                if row_labels == labels:
+                    return row_value
+            return 0
+
+        # Create the embed to hold the message
+        embed = discord.Embed(
+            title="Bot Stats",
+            color=discord.Color.dark_purple()
+        )
+
+        # Commands (busiest first)
+        command_rows = sorted(data.get('command_seconds', []), key=lambda row: row[1]['count'], reverse=True)
+        errors = sum(row_value for _, row_value in data.get('command_errors_total', []))
+        lines = [f"`{labels['command']}` {summary['count']}x · p50 {format_seconds(summary['p50'])} · p95 {format_seconds(summary['p95'])}" for labels, summary in command_rows[:6]]
+        lines.append(f"In flight: {value('commands_in_flight')} · Errors: {errors}")
+        embed.add_field(name="Commands", value="\n".join(lines), inline=False)
+
+        # Upstream APIs
+        lines = []
+        for labels, summary in data.get('upstream_request_seconds', []):
+            provider = labels['provider']
+            statuses = ", ".join(f"{row_labels['status']}: {row_value}" for row_labels, row_value in data.get('upstream_responses_total', []) if row_labels['provider'] == provider)
+            lines.append(f"`{provider}` {summary['count']} calls · p50 {format_seconds(summary['p50'])} · p95 {format_seconds(summary['p95'])} · in flight {value('upstream_in_flight', provider=provider)}")
+            lines.append(f"↳ queue {value('scheduler_queue_depth', provider=provider)} · tokens {value('scheduler_tokens', provider=provider)} · statuses {statuses or '-'}")
+        hedges = {winner: sum(row_value for row_labels, row_value in data.get('provider_hedges_total', []) if row_labels['winner'] == winner) for winner in ('gecko', 'cmc')}
+        failovers = {result: sum(row_value for row_labels, row_value in data.get('provider_failovers_total', []) if row_labels['result'] == result) for result in ('ok', 'failed')}
+        if lines:
+            lines.append(f"Hedged: {hedges['gecko'] + hedges['cmc']} (CMC first {hedges['cmc']}, CoinGecko first {hedges['gecko']}) · Failovers: {failovers['ok']} ok, {failovers['failed']} failed · Cross-referenced: {value('cross_referenced_coins')} coins")
+        embed.add_field(name="Upstream", value="\n".join(lines) or "No upstream calls yet", inline=False)
+
+        # Quote cache and batching
+        hits, misses, coalesced = value('quote_cache_requests_total', result='hit'), value('quote_cache_requests_total', result='miss'), value('quote_cache_requests_total', result='coalesced')
+        lines = [
+            f"Hit ratio: {value('quote_cache_hit_ratio') * 100:.1f}% ({hits} hits, {coalesced} coalesced, {misses} misses)",
+            f"Entries: {value('quote_cache_entries')} · Fetching: {value('quote_fetches_in_flight')}",
+            f"Avg batch: markets {value('quote_batch_avg_size', endpoint='markets'):.1f} · simple {value('quote_batch_avg_size', endpoint='simple'):.1f}",
+            f"Rendered embeds reused: {value('render_cache_requests_total', result='hit')} of {value('render_cache_requests_total', result='hit') + value('render_cache_requests_total', result='miss')} · Entries: {value('render_cache_entries')}",
+        ]
+        embed.add_field(name="Quote cache", value="\n".join(lines), inline=False)
+
+        # Coin registry
+        lookups = {kind: (value('registry_lookups_total', kind=kind, result='hit'), value('registry_lookups_total', kind=kind, result='miss')) for kind in ('name', 'id')}
+        lookup_p95 = {labels['kind']: summary['p95'] for labels, summary in data.get('registry_lookup_seconds', [])}
+        fuzzy_p95 = {labels['kind']: summary['p95'] for labels, summary in data.get('fuzzy_search_seconds', [])}
+        age = value('registry_age_seconds')
+        lines = [f"Coins: {value('registry_coins')} · Last refresh: {format_duration(age) + ' ago' if age >= 0 else 'snapshot only'}"]
+        for kind, (kind_hits, kind_misses) in lookups.items():
+            lines.append(f"`{kind}` lookups {kind_hits + kind_misses} ({kind_misses} misses) · p95 {format_seconds(lookup_p95.get(kind))} · fuzzy p95 {format_seconds(fuzzy_p95.get(kind))}")
+        embed.add_field(name="Registry", value="\n".join(lines), inline=False)
+
+        # Set a footer with the uptime (and which slice of the cluster answered, since these numbers are per process)
+        footer = f"Uptime: {format_duration(time.time() - self.metrics.started)}"
+        if self.bot.cluster_count > 1:
+            footer += f" | Worker {self.bot.cluster_index + 1}/{self.bot.cluster_count}, shards {', '.join(map(str, self.bot.shard_ids or []))} of {self.bot.shard_count}"
+        embed.set_footer(text=footer)
+
+        # Send the message
+        await ctx.send(embed=embed)
+
+# Setup function to load the cog into the bot
+async def setup(bot):
+    try:
+        await bot.add_cog(StatsCog(bot))
+    except Exception as e:
+        print(f"Error when loading cog: {e}")
@@ -1,9 +1,11 @@
 # Imports
 import discord
 from discord.ext import commands
-from decimal import *
-import os
-import aiohttp
+from utils.api_client import RateLimitedError, UpstreamError
+from utils.data_manager import MAX_COINS_PER_COMMAND, split_coins
+from utils.formatting import format_crypto_price
+from utils.providers import quote_source
+from utils.render_cache import with_footer
 
 # Create class
 class VolumeCog(commands.Cog):
@@ -12,69 +14,94 @@ class VolumeCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.data_manager = bot.data_manager
-        self.gecko_df = bot.data_manager.gecko_df
-        self.api_key = os.getenv('KEY')
-        self.gecko_key = os.getenv('GECKO_KEY')
-
-    # Internal helper function for price display (to display prices below $0.01, instead of just `0.00`) to be used inside of other functions
-    @staticmethod
-    def format_crypto_price(price) -> str:
-        # Check if the price exists
-        if price is None:
-            return "0"
-
-        # Convert the price (from the CMC API call) to a Decimal object (instead of float. Gives us more precision instead of worrying about float rounding conventions)
-        price = Decimal(str(price))
-        
-        # If price is >= $1.00, format with two decimal places and return (ezpz)
-        if price >= Decimal('1.00'):
-            return f"${price:,.2f}"
-        # If price is between $1.00 and $0.01, show 4 decimal places exactly (ezpz)
-        elif Decimal('1.00') > price >= Decimal('0.01'):
-            # Format the price exactly as-is; cut off at 4 decimals
-            formatted_price = f"${price.quantize(Decimal('0.0001'), rounding=ROUND_DOWN)}"
-            # Return the price with no trailing zeros
-            return formatted_price.rstrip('0')
-        # If less than $0.01,
-        else:
-            # Define the number of digits to cut off the number at (to avoid overflow or Discord message errors) (I use 15 arbitrarily; beginning-string slicing is non-inclusive)
-            MAX_DIGITS = 16
+        self.quote_service = bot.quote_service
+        self.render_cache = bot.render_cache
+
+    # Function to send the 24-hour volumes of several coins in one compact embed (resolves every name/id at once, prompts only for typos, and makes one upstream call for all of them)
+    async def send_volumes(self, ctx, queries, kind):
+        # Too many coins for one embed
+        if len(queries) > MAX_COINS_PER_COMMAND:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add field with details
+            embed.add_field(name="Too many coins", value=f"Please ask for at most {MAX_COINS_PER_COMMAND} coins at once.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+            return
 
-            # Convert the price to string (within the fixed-point context 'f') for further breakdown/analysis
-            raw_price_str = format(price, 'f')
+        # Resolve every coin (quit if the user gave up on all of them)
+        coin_ids = await self.data_manager.resolve_many(ctx, queries, kind)
+        if not coin_ids:
+            return
 
-            # Extract the decimal portion out of the string (because we only care about the decimal here, being that the price is less than 1 cent)
-            raw_decimal_str = raw_price_str.split('.')[1]
+        # Fetch every quote with simple/price endpoint through the shared quote cache (everything stale goes out in one request)
+        try:
+            quotes = await self.quote_service.get_many('simple', coin_ids)
+        # If the request was not successful,
+        except UpstreamError as e:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add field with details (being rate limited gets its own message, since trying again shortly will work)
+            if isinstance(e, RateLimitedError):
+                embed.add_field(name="Rate limited", value="The bot is getting a lot of requests right now. Please try again in a few seconds.", inline=False)
+            else:
+                embed.add_field(name="API Error", value="An error occurred while fetching the data from CoinGecko API. Please try again later.", inline=False)
 
-            # Create variable to store the first non-zero index in our decimal point (beyond the hundreths place obv)
-            # Set to None as we do not know the first non-zero index yet
-            non_zero_index = None
-            
-            # Use a for loop (with enumerate) to iterate over to 'digits' (characters) in our string to see if we can find a non-zero index in our first 15 indices
-            for i, digit in enumerate(raw_decimal_str[:MAX_DIGITS], 1):
-                # Check if digit is non-zero (remember, we are enumerating over a string!)
-                if digit != '0':
-                    # Store this non-zero index
-                    non_zero_index = i
-                    # Exit loop; we got what we need
-                    break
-            
-            # If the number cannot be formatted, return None and handle the issue in the calling function
-            if non_zero_index == None:
-                return "0"
+            # Send the message
+            await ctx.send(embed=embed)
+            return
 
-            # Otherwise,
-            else:
-                # Choose the number's display cutoff (using non_zero_index + 2 for context beyond just the one decimal place found; MAX_DIGITS for max-length arbitrary cutoff)
-                displayed_sigfigs = min(non_zero_index + 2, MAX_DIGITS)
-                # Format as string
-                formatted_number = f"${price:.{displayed_sigfigs}f}"
-                # And return
-                return formatted_number
-
-    # Function to get 24-hour volume of a coin by name
+        # Answer with the embed already rendered from these exact quotes, if there is one
+        footer = f"Powered by {quote_source(*(quotes[coin_id][0] for coin_id in coin_ids))} | Quote age: up to {max(age for _, age in quotes.values()):.0f}s"
+        render_key = ('vol24s', tuple(coin_ids))
+        embed = self.render_cache.get(render_key, [quotes[coin_id][0] for coin_id in coin_ids])
+        if embed is not None:
+            await ctx.send(embed=with_footer(embed, footer))
+            return
+
+        # One line per coin (coins without a displayable volume say so on their own line)
+        lines = []
+        for coin_id in coin_ids:
+            crypto_data, quote_age = quotes[coin_id]
+            name = self.data_manager.get_display_name(coin_id) or coin_id
+            if not crypto_data or crypto_data.get('usd_24h_vol') is None:
+                lines.append(f"**{name}**: not available")
+                continue
+            volume = format_crypto_price(crypto_data['usd_24h_vol'])
+            lines.append(f"**{name}**: {volume if volume != '0' else 'too small to display'}")
+
+        # Create the embed to hold the message
+        embed = discord.Embed(
+            title="24h Volume (USD)",
+            description="\n".join(lines),
+            color=discord.Color.dark_purple()
+        )
+
+        # Keep it for the next time someone asks for the same coins before their quotes change (without the footer, since the quote age changes every second)
+        self.render_cache.put(render_key, [quotes[coin_id][0] for coin_id in coin_ids], embed)
+
+        # Send the message, with a professional footer (who the quotes came from and how old the oldest one is)
+        await ctx.send(embed=with_footer(embed, footer))
+
+    # Function to get 24-hour volume of a coin by name (or several at once, e.g. `!vol24 bitcoin ethereum solana`)
     @commands.command()
-    async def vol24(self, ctx, name:str):
+    async def vol24(self, ctx, name:str, *names:str):
+        # More than one coin asked for, so answer them all in one embed
+        queries = split_coins((name, *names))
+        if len(queries) > 1:
+            await self.send_volumes(ctx, queries, 'name')
+            return
+        name = queries[0] if queries else name
+
         # Check the user-inputted name for validity
         checked_name = self.data_manager.get_coin_name(name)
 
@@ -86,100 +113,97 @@ class VolumeCog(commands.Cog):
         if checked_name == None:
             return
         
-        # Fetch cryptocurrencies with simple/price endpoint
-        url = 'https://api.coingecko.com/api/v3/simple/price'
-        
-        # Headers for CoinGecko API authentication
-        headers = { 
-            'x-cg-demo-api-key': self.gecko_key,
-        }
-        
-        # Parameters for the search to query the url
-        parameters = { 
-            'vs_currencies': 'usd',
-            'ids': checked_name,
-            'include_24hr_vol' : 'true',
-        }
-        
-        # Asynchronously create a ClientSession (so the bot can make multiple HTTP calls and not get blocked from just one call)
-        async with aiohttp.ClientSession() as session:
-            # Make the aynchronous request to the api
-            async with session.get(url, params=parameters, headers=headers) as response:
-                # If request successsful,
-                if response.status == 200:
-                    # Parse the response as JSON data
-                    crypto_data = await response.json()
-                    
-                    # Check if our parameter is in the response data,
-                    if crypto_data and checked_name in crypto_data and 'usd_24h_vol' in crypto_data[checked_name] and crypto_data[checked_name]['usd_24h_vol'] is not None:
-
-                        # Find the volume of the specified crypto and use the helper function that I spent 8 years on to format it
-                        volume = self.format_crypto_price(crypto_data[checked_name]['usd_24h_vol'])
-
-                        # Check if the volume is too small (or null) and create an embed
-                        if volume == "0":
-
-                            # Make a pretty embed for the user's unfortunate news
-                            embed = discord.Embed(
-                                title="ERROR",
-                                color=0xC41E3A
-                            )
-
-                            # Add field with details
-                            embed.add_field(name="Volume display error", value="The volume of this coin does not exist, or is too small to display. For more accurate results, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
-
-                            # Send the message
-                            await ctx.send(embed=embed)
-
-                        # If volume can be displayed,
-                        else:
-                            
-                            # Create the embed to hold the message
-                            embed = discord.Embed(
-                                title=f"{self.gecko_df.loc[self.gecko_df['id'] == checked_name, 'name'].iloc[0]}",
-                                color=discord.Color.dark_purple()
-                            )
-
-                            # Add it to the embed
-                            embed.add_field(name="24h Volume (USD):", value=volume, inline=False)
-
-                            # Set a professional footer to the message
-                            embed.set_footer(text="Powered by CoinGecko")
-
-                            # Send the message
-                            await ctx.send(embed=embed)
-
-                    # If id not in response data (user messed up)
-                    else:
-                        # Make a pretty embed for the user's unfortunate news
-                        embed = discord.Embed(
-                            title="ERROR",
-                            color=0xC41E3A
-                        )
-                        
-                        # Add field with details
-                        embed.add_field(name="Cryptocurrency Data Not Found", value="The data for the provided cryptocurrency name is not available. For more information, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
-
-                        # Send the message
-                        await ctx.send(embed=embed)
+        # Fetch the quote with simple/price endpoint through the shared quote cache (only hits the api if our copy is stale)
+        try:
+            crypto_data, quote_age = await self.quote_service.get_simple(checked_name)
+        # If the request was not successful,
+        except UpstreamError as e:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add field with details (being rate limited gets its own message, since trying again shortly will work)
+            if isinstance(e, RateLimitedError):
+                embed.add_field(name="Rate limited", value="The bot is getting a lot of requests right now. Please try again in a few seconds.", inline=False)
+            else:
+                embed.add_field(name="API Error", value="An error occurred while fetching the data from CoinGecko API. Please try again later.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+            return
+
+        # Check if our parameter is in the response data,
+        if crypto_data and 'usd_24h_vol' in crypto_data and crypto_data['usd_24h_vol'] is not None:
+
+            # Answer with the embed already rendered from this exact quote, if there is one (a hot coin gets asked about over and over before its quote changes)
+            footer = f"Powered by {quote_source(crypto_data)} | Quote age: {quote_age:.0f}s"
+            embed = self.render_cache.get(('vol24', checked_name), (crypto_data,))
+            if embed is not None:
+                await ctx.send(embed=with_footer(embed, footer))
+                return
+
+            # Find the volume of the specified crypto and use the helper function that I spent 8 years on to format it
+            volume = format_crypto_price(crypto_data['usd_24h_vol'])
+
+            # Check if the volume is too small (or null) and create an embed
+            if volume == "0":
+
+                # Make a pretty embed for the user's unfortunate news
+                embed = discord.Embed(
+                    title="ERROR",
+                    color=0xC41E3A
+                )
+
+                # Add field with details
+                embed.add_field(name="Volume display error", value="The volume of this coin does not exist, or is too small to display. For more accurate results, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
+
+                # Send the message
+                await ctx.send(embed=embed)
+
+            # If volume can be displayed,
+            else:
                 
-                # If the request was not successful,
-                else:
-                    # Make a pretty embed for the user's unfortunate news
-                    embed = discord.Embed(
-                        title="ERROR",
-                        color=0xC41E3A
-                    )
+                # Create the embed to hold the message
+                embed = discord.Embed(
+                    title=f"{self.data_manager.get_display_name(checked_name)}",
+                    color=discord.Color.dark_purple()
+                )
+
+                # Add it to the embed
+                embed.add_field(name="24h Volume (USD):", value=volume, inline=False)
 
-                    # Add field with details
-                    embed.add_field(name="API Error", value="An error occurred while fetching the data from CoinGecko API. Please try again later.", inline=False)
+                # Keep it for the next time someone asks before the quote changes (without the footer, since the quote age changes every second)
+                self.render_cache.put(('vol24', checked_name), (crypto_data,), embed)
 
-                    # Send the message
-                    await ctx.send(embed=embed)
+                # Send the message, with a professional footer (who the quote came from and how old it is)
+                await ctx.send(embed=with_footer(embed, footer))
 
-    # Function to get 24-hour volume of a coin by id
+        # If id not in response data (user messed up)
+        else:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+            
+            # Add field with details
+            embed.add_field(name="Cryptocurrency Data Not Found", value="The data for the provided cryptocurrency name is not available. For more information, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+
+    # Function to get 24-hour volume of a coin by id (or several at once)
     @commands.command()
-    async def vol24id(self, ctx, id:str):
+    async def vol24id(self, ctx, id:str, *ids:str):
+        # More than one coin asked for, so answer them all in one embed
+        queries = split_coins((id, *ids))
+        if len(queries) > 1:
+            await self.send_volumes(ctx, queries, 'id')
+            return
+        id = queries[0] if queries else id
+
         # Check the user-inputted id for validity
         checked_id = self.data_manager.get_coin_id(id)
 
@@ -191,96 +215,86 @@ class VolumeCog(commands.Cog):
         if checked_id == None:
             return
         
-        # Fetch cryptocurrencies with simple/price endpoint
-        url = 'https://api.coingecko.com/api/v3/simple/price'
-        
-        # Headers for CoinGecko API authentication
-        headers = { 
-            'x-cg-demo-api-key': self.gecko_key,
-        }
-        
-        # Parameters for the search to query the url
-        parameters = { 
-            'vs_currencies': 'usd',
-            'ids': checked_id,
-            'include_24hr_vol' : 'true',
-        }
-        
-        # Asynchronously create a ClientSession (so the bot can make multiple HTTP calls and not get blocked from just one call)
-        async with aiohttp.ClientSession() as session:
-            # Make the aynchronous request to the api
-            async with session.get(url, params=parameters, headers=headers) as response:
-                # If request successsful,
-                if response.status == 200:
-                    # Parse the response as JSON data
-                    crypto_data = await response.json()
-                    
-                    # Check if our parameter is in the response data,
-                    if crypto_data and checked_id in crypto_data and 'usd_24h_vol' in crypto_data[checked_id] and crypto_data[checked_id]['usd_24h_vol'] is not None:
-
-                        # Find the volume of the specified crypto and use the helper function that I spent 8 years on to format it
-                        volume = self.format_crypto_price(crypto_data[checked_id]['usd_24h_vol'])
-
-                        # Check if the volume is too small (or null) and create an embed
-                        if volume == "0":
-
-                            # Make a pretty embed for the user's unfortunate news
-                            embed = discord.Embed(
-                                title="ERROR",
-                                color=0xC41E3A
-                            )
-
-                            # Add field with details
-                            embed.add_field(name="Volume display error", value="The volume of this coin does not exist, or is too small to display. For more accurate results, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
-
-                            # Send the message
-                            await ctx.send(embed=embed)
-
-                        # If volume can be displayed,
-                        else:
-                            
-                            # Create the embed to hold the message
-                            embed = discord.Embed(
-                                title=f"{self.gecko_df.loc[self.gecko_df['id'] == checked_id, 'name'].iloc[0]}",
-                                color=discord.Color.dark_purple()
-                            )
-
-                            # Add it to the embed
-                            embed.add_field(name="24h Volume (USD):", value=volume, inline=False)
-
-                            # Set a professional footer to the message
-                            embed.set_footer(text="Powered by CoinGecko")
-
-                            # Send the message
-                            await ctx.send(embed=embed)
-
-                    # If id not in response data (user messed up)
-                    else:
-                        # Make a pretty embed for the user's unfortunate news
-                        embed = discord.Embed(
-                            title="ERROR",
-                            color=0xC41E3A
-                        )
-                        
-                        # Add field with details
-                        embed.add_field(name="Cryptocurrency Data Not Found", value="The data for the provided cryptocurrency id is not available. For more information, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
-
-                        # Send the message
-                        await ctx.send(embed=embed)
+        # Fetch the quote with simple/price endpoint through the shared quote cache (only hits the api if our copy is stale)
+        try:
+            crypto_data, quote_age = await self.quote_service.get_simple(checked_id)
+        # If the request was not successful,
+        except UpstreamError as e:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add field with details (being rate limited gets its own message, since trying again shortly will work)
+            if isinstance(e, RateLimitedError):
+                embed.add_field(name="Rate limited", value="The bot is getting a lot of requests right now. Please try again in a few seconds.", inline=False)
+            else:
+                embed.add_field(name="API Error", value="An error occurred while fetching the data from CoinGecko API. Please try again later.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+            return
+
+        # Check if our parameter is in the response data,
+        if crypto_data and 'usd_24h_vol' in crypto_data and crypto_data['usd_24h_vol'] is not None:
+
+            # Answer with the embed already rendered from this exact quote, if there is one (a hot coin gets asked about over and over before its quote changes)
+            footer = f"Powered by {quote_source(crypto_data)} | Quote age: {quote_age:.0f}s"
+            embed = self.render_cache.get(('vol24', checked_id), (crypto_data,))
+            if embed is not None:
+                await ctx.send(embed=with_footer(embed, footer))
+                return
+
+            # Find the volume of the specified crypto and use the helper function that I spent 8 years on to format it
+            volume = format_crypto_price(crypto_data['usd_24h_vol'])
+
+            # Check if the volume is too small (or null) and create an embed
+            if volume == "0":
+
+                # Make a pretty embed for the user's unfortunate news
+                embed = discord.Embed(
+                    title="ERROR",
+                    color=0xC41E3A
+                )
+
+                # Add field with details
+                embed.add_field(name="Volume display error", value="The volume of this coin does not exist, or is too small to display. For more accurate results, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
+
+                # Send the message
+                await ctx.send(embed=embed)
+
+            # If volume can be displayed,
+            else:
                 
-                # If the request was not successful,
-                else:
-                    # Make a pretty embed for the user's unfortunate news
-                    embed = discord.Embed(
-                        title="ERROR",
-                        color=0xC41E3A
-                    )
-
-                    # Add field with details
-                    embed.add_field(name="API Error", value="An error occurred while fetching the data from CoinGecko API. Please try again later.", inline=False)
-
-                    # Send the message
-                    await ctx.send(embed=embed)
+                # Create the embed to hold the message
+                embed = discord.Embed(
+                    title=f"{self.data_manager.get_display_name(checked_id)}",
+                    color=discord.Color.dark_purple()
+                )
+
+                # Add it to the embed
+                embed.add_field(name="24h Volume (USD):", value=volume, inline=False)
+
+                # Keep it for the next time someone asks before the quote changes (without the footer, since the quote age changes every second)
+                self.render_cache.put(('vol24', checked_id), (crypto_data,), embed)
+
+                # Send the message, with a professional footer (who the quote came from and how old it is)
+                await ctx.send(embed=with_footer(embed, footer))
+
+        # If id not in response data (user messed up)
+        else:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+            
+            # Add field with details
+            embed.add_field(name="Cryptocurrency Data Not Found", value="The data for the provided cryptocurrency id is not available. For more information, visit [coingecko.com](https://www.coingecko.com/).", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
 
 # Setup function to load the cog into the bot
 async def setup(bot):
@@ -0,0 +1,228 @@
+# Imports
+import asyncio
+import math
+from utils.formatting import format_crypto_price
+from utils.rate_limiter import TokenBucket
+
+# Alert directions
+ABOVE = 1
+BELOW = -1
+
+# Discord caps a message at 2000 characters; keep batched notifications comfortably under it
+MAX_MESSAGE_LENGTH = 1900
+
+# Create class (one price alert; kept as plain data so it's easy to list, remove and later persist)
+class Alert:
+    __slots__ = ('alert_id', 'user_id', 'channel_id', 'coin_id', 'direction', 'threshold')
+
+    # Init method (set important variables)
+    def __init__(self, alert_id, user_id, channel_id, coin_id, direction, threshold):
+        self.alert_id = alert_id
+        self.user_id = user_id
+        self.channel_id = channel_id
+        self.coin_id = coin_id
+        self.direction = direction
+        self.threshold = threshold
+
+    def __repr__(self):
+        return f"Alert({self.alert_id}, user={self.user_id}, {self.coin_id} {'>=' if self.direction == ABOVE else '<='} {self.threshold})"
+
+# Create class (every subscribed alert, plus columnar NumPy arrays of them so one vectorized pass checks them all)
+class AlertBook:
+
+    # Init method (`store` is an optional SubscriptionStore every change is saved to; bot processes sharing a store hand out ids from their own
+    # residue class, `id_offset` mod `id_stride`, so two of them can't pick the same new id)
+    def __init__(self, max_per_user=25, store=None, id_stride=1, id_offset=0):
+        self.max_per_user = max_per_user
+        self.store = store
+        self.id_stride = id_stride
+        self.id_offset = id_offset
+        self.synced_seq = 0              # Store changelog position this book has caught up to (see sync())
+        self.alerts = {}                 # alert id -> Alert
+        self.by_user = {}                # user id -> set of their alert ids
+        self.by_coin = {}                # coin id -> set of alert ids watching it
+        self.last_id = 0                 # Highest alert id handed out (or loaded) so far
+
+        # Columnar view used for evaluation (rebuilt lazily after any change, so adds/removes stay O(1); the arrays are made by the first compile())
+        self.dirty = True
+        self.coin_ids = []               # slot -> coin id (one slot per distinct subscribed coin)
+        self.alert_ids = None
+        self.coin_slots = None
+        self.directions = None
+        self.thresholds = None
+
+    # Number of alerts
+    def __len__(self):
+        return len(self.alerts)
+
+    # Function to add a new alert (returns the new Alert; raises ValueError if the user already has too many)
+    def add(self, user_id, channel_id, coin_id, direction, threshold):
+        if len(self.by_user.get(user_id, ())) >= self.max_per_user:
+            raise ValueError(f"You can only have {self.max_per_user} alerts at once.")
+        alert_id = self.last_id + 1
+        alert_id += (self.id_offset - alert_id) % self.id_stride
+        alert = Alert(alert_id, user_id, channel_id, coin_id, direction, float(threshold))
+        self.insert(alert)
+        if self.store is not None:
+            self.store.save_alert(alert)
+        return alert
+
+    # Function to put an existing alert into the book (no cap check, nothing saved; used by add() and when loading from the store)
+    def insert(self, alert):
+        self.alerts[alert.alert_id] = alert
+        self.by_user.setdefault(alert.user_id, set()).add(alert.alert_id)
+        self.by_coin.setdefault(alert.coin_id, set()).add(alert.alert_id)
+        self.last_id = max(self.last_id, alert.alert_id)
+        self.dirty = True
+
+    # Function to load every saved alert from the store (streams the rows in chunks instead of reading the whole table at once; returns how many were loaded)
+    async def load(self) -> int:
+        if self.store.changelog:
+            self.synced_seq = await self.store.last_alert_change()
+        count = 0
+        async for rows in self.store.stream_alerts():
+            for alert_id, user_id, channel_id, coin_id, direction, threshold in rows:
+                self.insert(Alert(alert_id, user_id, channel_id, coin_id, direction, threshold))
+            count += len(rows)
+        return count
+
+    # Function to catch up with alerts other bot processes added or removed in the shared store (returns how many changes were applied)
+    async def sync(self) -> int:
+        changes = await self.store.alert_changes(self.synced_seq)
+        for seq, alert_id, user_id, channel_id, coin_id, direction, threshold in changes:
+            # Each change carries the alert as it is now, so applying it again (or out of order) is harmless
+            self.remove(alert_id, save=False)
+            if user_id is not None:
+                self.insert(Alert(alert_id, user_id, channel_id, coin_id, direction, threshold))
+        if changes:
+            self.synced_seq = changes[-1][0]
+        return len(changes)
+
+    # Function to remove an alert (returns the removed Alert, or None if it doesn't exist or belongs to someone else; `save=False` leaves the store alone)
+    def remove(self, alert_id, user_id=None, save=True):
+        alert = self.alerts.get(alert_id)
+        if alert is None or (user_id is not None and alert.user_id != user_id):
+            return None
+        del self.alerts[alert_id]
+        for index, key in ((self.by_user, alert.user_id), (self.by_coin, alert.coin_id)):
+            ids = index[key]
+            ids.discard(alert_id)
+            if not ids:
+                del index[key]
+        self.dirty = True
+        if self.store is not None and save:
+            self.store.delete_alert(alert_id)
+        return alert
+
+    # Function to get a user's alerts (oldest first)
+    def for_user(self, user_id) -> list:
+        return sorted((self.alerts[alert_id] for alert_id in self.by_user.get(user_id, ())), key=lambda alert: alert.alert_id)
+
+    # Function to get every distinct coin someone is watching (what the poller needs to fetch; scales with coins, not subscribers)
+    def subscribed_coins(self) -> list:
+        return list(self.by_coin)
+
+    # Function to rebuild the columnar arrays from the alerts
+    def compile(self):
+        import numpy as np # Imported on first use, so NumPy stays out of the bot's startup
+        slots = {}
+        self.coin_ids = []
+        count = len(self.alerts)
+        alert_ids = np.empty(count, dtype=np.int64)
+        coin_slots = np.empty(count, dtype=np.int32)
+        directions = np.empty(count, dtype=np.int8)
+        thresholds = np.empty(count, dtype=np.float64)
+        for i, alert in enumerate(self.alerts.values()):
+            slot = slots.get(alert.coin_id)
+            if slot is None:
+                slot = slots[alert.coin_id] = len(self.coin_ids)
+                self.coin_ids.append(alert.coin_id)
+            alert_ids[i], coin_slots[i], directions[i], thresholds[i] = alert.alert_id, slot, alert.direction, alert.threshold
+        self.alert_ids, self.coin_slots, self.directions, self.thresholds = alert_ids, coin_slots, directions, thresholds
+        self.dirty = False
+
+    # Function to find every alert whose condition holds at the given prices (coin id -> price; coins missing from `prices` never fire; returns the Alerts, which stay subscribed)
+    def triggered(self, prices) -> list:
+        if self.dirty:
+            self.compile()
+        if not len(self.alert_ids):
+            return []
+        import numpy as np
+
+        # One price per coin slot (NaN where we have no price, and NaN never compares true)
+        slot_prices = np.array([prices.get(coin_id, math.nan) for coin_id in self.coin_ids], dtype=np.float64)
+        alert_prices = slot_prices[self.coin_slots]
+
+        # Vectorized check of every threshold at once
+        with np.errstate(invalid='ignore'):
+            fired = ((self.directions == ABOVE) & (alert_prices >= self.thresholds)) | ((self.directions == BELOW) & (alert_prices <= self.thresholds))
+        return [self.alerts[alert_id] for alert_id in self.alert_ids[fired].tolist()]
+
+# Create class (polls prices for every subscribed coin in as few upstream calls as possible, fires alerts and sends the notifications in rate-limited batches)
+class AlertEngine:
+
+    # Init method (`send(channel_id, content)` delivers one notification message; `get_name(coin_id)` gives a display name)
+    def __init__(self, alert_book, quote_service, send, get_name=None, notify_rate=1.0, notify_burst=5):
+        self.alert_book = alert_book
+        self.quote_service = quote_service
+        self.send = send
+        self.get_name = get_name or (lambda coin_id: coin_id)
+        self.notify_bucket = TokenBucket(notify_rate, notify_burst)  # Messages per second we allow ourselves to send (bursts up to notify_burst)
+
+        # Simple counters for logging
+        self.polls = 0
+        self.fired = 0
+
+    # Function to run one polling round (returns the Alerts that fired)
+    async def poll(self) -> list:
+        coin_ids = self.alert_book.subscribed_coins()
+        if not coin_ids:
+            return []
+        self.polls += 1
+
+        # One multi-id request per batch of coins (a failed batch just means those coins get checked next round)
+        quotes = await self.quote_service.refresh_simple(coin_ids)
+        prices = {coin_id: quote['usd'] for coin_id, quote in quotes.items() if quote and quote.get('usd') is not None}
+
+        # Check every alert at once, then retire the ones that fired (alerts are one-shot)
+        fired = self.alert_book.triggered(prices)
+        for alert in fired:
+            self.alert_book.remove(alert.alert_id)
+        self.fired += len(fired)
+
+        await self.notify(fired, prices)
+        return fired
+
+    # Function to group fired alerts into as few messages as possible per channel and send them without flooding Discord
+    async def notify(self, fired, prices):
+        by_channel = {}
+        for alert in fired:
+            by_channel.setdefault(alert.channel_id, []).append(alert)
+
+        for channel_id, alerts in by_channel.items():
+            for content in self.batch_messages(alerts, prices):
+                # Wait for a send token
+                wait = self.notify_bucket.wait_time()
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = self.notify_bucket.wait_time()
+                self.notify_bucket.take()
+
+                try:
+                    await self.send(channel_id, content)
+                except Exception as e:
+                    print(f"Failed to send price alerts to channel {channel_id}: {e!r}")
+
+    # Function to turn a channel's fired alerts into message texts (one line per alert, split to fit Discord's length limit)
+    def batch_messages(self, alerts, prices) -> list:
+        messages = []
+        current = "**Price alerts**"
+        for alert in alerts:
+            word = "above" if alert.direction == ABOVE else "below"
+            line = f"\n<@{alert.user_id}> {self.get_name(alert.coin_id)} is {word} {format_crypto_price(alert.threshold)} (now {format_crypto_price(prices[alert.coin_id])})"
+            if len(current) + len(line) > MAX_MESSAGE_LENGTH:
+                messages.append(current)
+                current = "**Price alerts (continued)**"
+            current += line
+        messages.append(current)
+        return messages
@@ -0,0 +1,180 @@
+# Imports
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+import aiohttp
+from utils.metrics import metrics
+from utils.rate_limiter import INTERACTIVE, QueueFullError, RequestScheduler
+
+# Base urls for every upstream API the bot talks to (overridable, e.g. to point the bot at the local fake server in bench/)
+GECKO_BASE_URL = os.getenv('GECKO_API_URL', 'https://api.coingecko.com/api/v3')
+CMC_BASE_URL = os.getenv('CMC_API_URL', 'https://pro-api.coinmarketcap.com')
+
+# Statuses worth retrying (rate limited, or the upstream is having a moment)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Upstream metrics (one sample per HTTP attempt, so retries show up too)
+UPSTREAM_SECONDS = metrics.histogram('upstream_request_seconds', 'Upstream HTTP request latency per attempt', ('provider',))
+UPSTREAM_RESPONSES = metrics.counter('upstream_responses_total', 'Upstream HTTP responses by status code ("error" means no response at all)', ('provider', 'status'))
+UPSTREAM_IN_FLIGHT = metrics.gauge('upstream_in_flight', 'Upstream HTTP requests currently in flight', ('provider',))
+UPSTREAM_QUEUE_SECONDS = metrics.histogram('upstream_queue_seconds', 'Time spent waiting on the rate limiter before an upstream request', ('provider',))
+UPSTREAM_REJECTED = metrics.counter('upstream_rejected_total', 'Upstream requests refused straight away because the rate limiter queue was full', ('provider',))
+SCHEDULER_QUEUE_DEPTH = metrics.gauge('scheduler_queue_depth', 'Requests waiting on the rate limiter', ('provider',))
+SCHEDULER_TOKENS = metrics.gauge('scheduler_tokens', 'Rate limiter tokens currently banked', ('provider',))
+SCHEDULER_WAIT_SECONDS = metrics.gauge('scheduler_wait_seconds', 'Seconds until the rate limiter hands out its next token', ('provider',))
+
+# Error raised when an upstream API answers with anything other than a 200 (status is None if it never answered at all)
+class UpstreamError(Exception):
+
+    # Init method (keep the status code around so callers can show it)
+    def __init__(self, status):
+        super().__init__(f"Upstream request failed with status code {status}")
+        self.status = status
+
+# Error raised when we're being rate limited (by upstream, or by our own request queue being full)
+class RateLimitedError(UpstreamError):
+
+    # Init method (keep the suggested wait around so callers can show it)
+    def __init__(self, retry_after=None):
+        super().__init__(429)
+        self.retry_after = retry_after
+
+# Function to read a Retry-After header (either seconds or an HTTP date) as seconds from now (None if missing or unreadable)
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+# Create class
+class APIClient:
+
+    # Init method (set important variables)
+    def __init__(self, gecko_key=None, cmc_key=None, limit=100, limit_per_host=20, dns_cache_ttl=300, keepalive_timeout=30, total_timeout=15, connect_timeout=5,
+                 gecko_rate_per_min=30, cmc_rate_per_min=30, burst=10, max_queue=100, max_retries=3, max_retry_wait=10):
+        # Connection pool settings (total sockets, sockets per upstream host, seconds to cache DNS answers, seconds to keep idle sockets open)
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+
+        # Timeouts so one slow upstream can't hang a command forever
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+
+        # Shared auth headers for each provider (only send a key if we actually have one)
+        self.gecko_headers = {}
+        if gecko_key:
+            self.gecko_headers['x-cg-demo-api-key'] = gecko_key
+        self.cmc_headers = {'Accepts': 'application/json'}
+        if cmc_key:
+            self.cmc_headers['X-CMC_PRO_API_KEY'] = cmc_key
+
+        # One token-bucket scheduler per provider (every upstream call waits its turn here)
+        self.schedulers = {
+            'gecko': RequestScheduler('CoinGecko', gecko_rate_per_min / 60, burst, max_queue=max_queue),
+            'cmc': RequestScheduler('CoinMarketCap', cmc_rate_per_min / 60, burst, max_queue=max_queue),
+        }
+
+        # Retry settings (attempts after the first one, and the longest we'll sit on a retry before giving up)
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+
+        # The pooled session itself (created in start() because aiohttp wants a running event loop)
+        self.session = None
+
+    # Function to open the shared session (safe to call more than once)
+    async def start(self):
+        if self.session is None or self.session.closed:
+            # Keep-alive connector that pools sockets and caches DNS lookups across every command
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    # Function to close the shared session on shutdown (safe to call more than once)
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    # Function to GET an upstream endpoint and parse the JSON body, paced by the provider's scheduler (raises UpstreamError/RateLimitedError if it doesn't work out)
+    async def get_json(self, provider, path, params=None, priority=INTERACTIVE):
+        scheduler = self.schedulers[provider]
+        url = f"{GECKO_BASE_URL if provider == 'gecko' else CMC_BASE_URL}{path}"
+        headers = self.gecko_headers if provider == 'gecko' else self.cmc_headers
+
+        for attempt in range(self.max_retries + 1):
+            # Wait for our turn (or fail fast if the queue is already full)
+            queued = time.perf_counter()
+            try:
+                await scheduler.acquire(priority)
+            except QueueFullError as e:
+                UPSTREAM_REJECTED.labels(provider).inc()
+                raise RateLimitedError(e.wait) from e
+            started = time.perf_counter()
+            UPSTREAM_QUEUE_SECONDS.labels(provider).observe(started - queued)
+
+            # Make the request
+            retry_after = None
+            in_flight = UPSTREAM_IN_FLIGHT.labels(provider)
+            in_flight.inc()
+            try:
+                async with self.session.get(url, params=params, headers=headers) as response:
+                    UPSTREAM_RESPONSES.labels(provider, str(response.status)).inc()
+                    if response.status == 200:
+                        return await response.json()
+                    if response.status not in RETRY_STATUSES:
+                        raise UpstreamError(response.status)
+                    status = response.status
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                UPSTREAM_RESPONSES.labels(provider, 'error').inc()
+                status = None
+            finally:
+                in_flight.dec()
+                UPSTREAM_SECONDS.labels(provider).observe(time.perf_counter() - started)
+
+            # Back off exponentially with jitter (or for as long as upstream asked), and hold the whole provider back if we got a 429
+            delay = retry_after if retry_after is not None else min(self.max_retry_wait, 0.5 * 2 ** attempt)
+            delay *= random.uniform(1.0, 1.25)
+            if status == 429:
+                scheduler.backoff(delay)
+
+            # Out of attempts, or upstream wants us to wait longer than is reasonable for someone waiting on a command
+            if attempt == self.max_retries or delay > self.max_retry_wait:
+                if status == 429:
+                    raise RateLimitedError(delay)
+                raise UpstreamError(status)
+
+            # A 429 already held the scheduler back, so the next acquire() does the waiting
+            if status != 429:
+                await asyncio.sleep(delay)
+
+    # Function to GET CoinGecko and parse the JSON body (raises UpstreamError if the request was not successful)
+    async def gecko_json(self, path, params=None, priority=INTERACTIVE):
+        return await self.get_json('gecko', path, params=params, priority=priority)
+
+    # Function to GET CoinMarketCap and parse the JSON body (raises UpstreamError if the request was not successful)
+    async def cmc_json(self, path, params=None, priority=INTERACTIVE):
+        return await self.get_json('cmc', path, params=params, priority=priority)
+
+    # Function to summarize every provider's scheduler (queue depth, tokens banked, seconds until the next token)
+    def scheduler_stats(self) -> dict:
+        return {provider: scheduler.stats() for provider, scheduler in self.schedulers.items()}
+
+    # Function to copy the scheduler state into the metrics registry (registered as a collector by the bot)
+    def collect_metrics(self, metrics):
+        for provider, stats in self.scheduler_stats().items():
+            SCHEDULER_QUEUE_DEPTH.labels(provider).set(stats['queue_depth'])
+            SCHEDULER_TOKENS.labels(provider).set(stats['tokens'])
+            SCHEDULER_WAIT_SECONDS.labels(provider).set(stats['wait_seconds'])
@@ -0,0 +1,233 @@
+# Imports
+import asyncio
+import json
+import time
+from urllib.parse import urlparse
+
+# Prefix on every key we store, so the bot can share a Redis with other things
+KEY_PREFIX = 'cryptobot:'
+
+# Error raised when the shared backend can't be reached or answers with an error (callers carry on without it)
+class BackendError(Exception):
+    pass
+
+# Error raised when the backend is down or its circuit breaker is open (the backend logs when that starts and stops, so callers don't have to)
+class BackendUnavailableError(BackendError):
+    pass
+
+# Create class (tiny Redis client speaking RESP over one pipelined connection; only what the shared caches need, so there's no extra dependency)
+# Any backend just needs the same async methods: get, get_many, set, set_many, add, delete and close (values are bytes, ttl is seconds)
+class RedisBackend:
+
+    # Init method (set important variables)
+    def __init__(self, host='127.0.0.1', port=6379, db=0, password=None, timeout=2.0, retry_after=10.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout           # Most seconds any one round trip can take before we give up on it
+        self.reader = None
+        self.writer = None
+        self.lock = asyncio.Lock()       # One round trip on the connection at a time (each round trip can carry many commands)
+
+        # Circuit breaker (after a failure the backend is skipped for `retry_after` seconds, so every caller fetches locally right away instead of queueing
+        # up behind timeouts; then one round trip at a time tries it again)
+        self.retry_after = retry_after
+        self.down = False                # Whether the breaker is open (the backend failed and hasn't answered since)
+        self.skip_until = 0.0            # time.monotonic() until which nobody even tries the backend
+
+    # Function to encode one command in RESP
+    @staticmethod
+    def encode(args) -> bytes:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode('utf-8')
+            elif isinstance(arg, (int, float)):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    # Function to read one RESP reply (errors come back as BackendError objects, so one bad command doesn't lose the rest of a pipeline)
+    async def read_reply(self):
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the backend")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            return BackendError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            return None if length < 0 else (await self.reader.readexactly(length + 2))[:-2]
+        if kind == b'*':
+            length = int(rest)
+            return None if length < 0 else [await self.read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from the backend: {line[:50]!r}")
+
+    # Function to connect (and log in / pick the database if asked to)
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(('AUTH', self.password))
+        if self.db:
+            setup.append(('SELECT', self.db))
+        for reply in await self.round_trip(setup):
+            if isinstance(reply, BackendError):
+                raise reply
+
+    # Function to send a batch of commands and read every reply (no locking or reconnecting; see execute_many)
+    async def round_trip(self, commands) -> list:
+        if not commands:
+            return []
+        self.writer.write(b''.join(self.encode(command) for command in commands))
+        await self.writer.drain()
+        return [await self.read_reply() for _ in commands]
+
+    # Function to run several commands in one round trip (reconnects if needed; raises BackendUnavailableError straight away while the breaker is open,
+    # or if the backend turns out to be unreachable or slow)
+    async def execute_many(self, commands) -> list:
+        if time.monotonic() < self.skip_until:
+            raise BackendUnavailableError("Cache backend unavailable (retrying later)")
+        async with self.lock:
+            # Whoever went first may have found it down while we waited
+            if time.monotonic() < self.skip_until:
+                raise BackendUnavailableError("Cache backend unavailable (retrying later)")
+
+            # Only one retry at a time while it's down (everyone else skips it until this one is answered)
+            if self.down:
+                self.skip_until = time.monotonic() + self.timeout
+            try:
+                if self.writer is None:
+                    await asyncio.wait_for(self.connect(), self.timeout)
+                replies = await asyncio.wait_for(self.round_trip(commands), self.timeout)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, BackendError) as e:
+                # The connection is in an unknown state now, so start over next time (and leave the backend alone for a while)
+                self.drop()
+                self.skip_until = time.monotonic() + self.retry_after
+                if not self.down:
+                    self.down = True
+                    print(f"Cache backend unavailable, fetching locally for the next {self.retry_after:.0f}s: {e!r}")
+                raise BackendUnavailableError(f"Cache backend unavailable: {e!r}") from e
+            except asyncio.CancelledError:
+                # Replies may still be on their way, and they'd get read as the answers to the next commands
+                self.drop()
+                if self.down:
+                    self.skip_until = time.monotonic() + self.retry_after
+                raise
+
+            # Back up again
+            if self.down:
+                self.down = False
+                self.skip_until = 0.0
+                print("Cache backend is back, sharing caches again.")
+            return replies
+
+    # Function to run one command (raises BackendError if the backend said no)
+    async def execute(self, *args):
+        reply = (await self.execute_many([args]))[0]
+        if isinstance(reply, BackendError):
+            raise reply
+        return reply
+
+    # Function to forget the current connection
+    def drop(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def get(self, key):
+        return await self.execute('GET', KEY_PREFIX + key)
+
+    async def get_many(self, keys) -> list:
+        if not keys:
+            return []
+        return await self.execute('MGET', *(KEY_PREFIX + key for key in keys))
+
+    async def set(self, key, value, ttl):
+        await self.execute('SET', KEY_PREFIX + key, value, 'PX', max(1, int(ttl * 1000)))
+
+    # Function to set many keys with the same ttl in one round trip
+    async def set_many(self, items, ttl):
+        await self.execute_many([('SET', KEY_PREFIX + key, value, 'PX', max(1, int(ttl * 1000))) for key, value in items])
+
+    # Function to set a key only if it isn't there yet (returns whether we set it; used as a short-lived lock)
+    async def add(self, key, value, ttl) -> bool:
+        return await self.execute('SET', KEY_PREFIX + key, value, 'NX', 'PX', max(1, int(ttl * 1000))) is not None
+
+    async def delete(self, key):
+        await self.execute('DEL', KEY_PREFIX + key)
+
+    # Function to close the connection (on shutdown)
+    async def close(self):
+        async with self.lock:
+            if self.writer is not None:
+                writer = self.writer
+                self.drop()
+                try:
+                    await writer.wait_closed()
+                except (OSError, ConnectionError):
+                    pass
+
+# Function to make a backend from a url like `redis://:password@host:6379/0` (None means every process keeps its own caches)
+def make_backend(url):
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme != 'redis':
+        raise ValueError(f"Unsupported cache backend: {url} (only redis:// is supported)")
+    return RedisBackend(host=parsed.hostname or '127.0.0.1', port=parsed.port or 6379, db=int(parsed.path.lstrip('/') or 0), password=parsed.password)
+
+# Function to pack a value with the wall-clock time it was fetched (wall clock, since monotonic clocks don't line up across processes)
+def encode_entry(value, fetched_at=None) -> bytes:
+    return json.dumps([value, time.time() if fetched_at is None else fetched_at], separators=(',', ':')).encode()
+
+# Function to unpack a value (returns (value, seconds since it was fetched))
+def decode_entry(raw):
+    value, fetched_at = json.loads(raw)
+    return value, max(0.0, time.time() - fetched_at)
+
+# Function to get a value through the shared backend, with at most one process fetching it at a time (everyone else waits for that process to publish it;
+# returns (value, seconds since it was fetched)). A backend that's down just means this process fetches for itself, same as without one.
+async def shared_fetch(backend, key, ttl, fetch, lock_ttl=10.0, wait=2.0, poll_interval=0.05):
+    locked = False
+    try:
+        # Someone already fetched it recently
+        raw = await backend.get(key)
+        if raw is not None:
+            return decode_entry(raw)
+
+        # Claim the fetch, or wait for whoever already has it to publish their answer
+        locked = await backend.add(f'lock:{key}', b'1', lock_ttl)
+        if not locked:
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                await asyncio.sleep(poll_interval)
+                raw = await backend.get(key)
+                if raw is not None:
+                    return decode_entry(raw)
+    except BackendUnavailableError:
+        pass # The backend logs when it goes down and comes back
+    except BackendError as e:
+        print(f"Shared cache error, fetching {key} locally: {e}")
+
+    # Fetch it ourselves and publish it for everyone else
+    try:
+        value = await fetch()
+        try:
+            await backend.set(key, encode_entry(value), ttl)
+        except BackendUnavailableError:
+            pass
+        except BackendError as e:
+            print(f"Failed to share {key}: {e}")
+        return value, 0.0
+    finally:
+        if locked:
+            try:
+                await backend.delete(f'lock:{key}')
+            except BackendError:
+                pass
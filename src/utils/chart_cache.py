@@ -0,0 +1,121 @@
+# Imports
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from utils.metrics import metrics
+
+# Chart cache metrics (copied over from the cache counters whenever metrics are read)
+CHART_CACHE_REQUESTS = metrics.counter('chart_cache_requests_total', 'Chart disk cache lookups by result', ('result',))
+CHART_CACHE_FILES = metrics.gauge('chart_cache_files', 'Chart images currently held on disk')
+CHART_CACHE_BYTES = metrics.gauge('chart_cache_bytes', 'Bytes of chart images currently held on disk')
+CHART_CACHE_EVICTIONS = metrics.counter('chart_cache_evictions_total', 'Chart images deleted to stay under the size limit')
+
+# Create class (rendered chart images kept on disk, one file per key, so the same chart for the same data is only ever drawn once, even across restarts;
+# the least recently used files are deleted once they add up to more than `max_bytes`)
+class ChartCache:
+
+    # Init method (set important variables; `directory` of None turns the cache off)
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.files = OrderedDict()       # file name -> size in bytes, least recently used first
+        self.bytes = 0
+
+        # Simple counters for hit ratio logging
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Function to get the file name for a key (any repr-able tuple, e.g. (coin id, window seconds, newest sample time))
+    def file_name(self, key) -> str:
+        return hashlib.sha1(repr(key).encode()).hexdigest() + '.png'
+
+    # Function to find the charts a previous run left behind, oldest use first (blocking; run it off the event loop)
+    def open(self):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.png') and entry.is_file():
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name, stat.st_size))
+                elif entry.name.endswith('.tmp'):
+                    os.remove(entry.path) # Half-written leftovers from a crash
+        for _, name, size in sorted(found):
+            self.files[name] = size
+            self.bytes += size
+
+        # The limit may have gone down since last time
+        self.evict()
+
+    # Function to get a cached chart's bytes (None if it isn't cached)
+    async def get(self, key):
+        name = self.file_name(key)
+        if name not in self.files:
+            self.misses += 1
+            return None
+        try:
+            data = await asyncio.to_thread(self.read, name)
+        except FileNotFoundError:
+            # Deleted behind our back (or by another cluster worker sharing the directory)
+            self.forget(name)
+            self.misses += 1
+            return None
+        self.files.move_to_end(name)
+        self.hits += 1
+        return data
+
+    # Function to store a freshly rendered chart (written to a temp file and renamed into place, so nobody ever reads half a chart)
+    async def put(self, key, data):
+        if not self.directory:
+            return
+        name = self.file_name(key)
+        await asyncio.to_thread(self.write, name, data)
+        self.forget(name)
+        self.files[name] = len(data)
+        self.bytes += len(data)
+        self.evict()
+
+    # Function to read one cached file (blocking; also bumps its time, so the next run's scan keeps the order)
+    def read(self, name) -> bytes:
+        path = os.path.join(self.directory, name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        os.utime(path)
+        return data
+
+    # Function to write one file atomically (blocking)
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+    # Function to drop a file from the bookkeeping (not from disk)
+    def forget(self, name):
+        size = self.files.pop(name, None)
+        if size is not None:
+            self.bytes -= size
+
+    # Function to delete the least recently used files until we're back under the size limit (deleting a small file is quick, so this runs inline)
+    def evict(self):
+        while self.bytes > self.max_bytes and self.files:
+            name, size = self.files.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    # Function to copy the cache counters into the metrics registry (registered as a collector by the bot)
+    def collect_metrics(self, metrics):
+        CHART_CACHE_REQUESTS.labels('hit').value = self.hits
+        CHART_CACHE_REQUESTS.labels('miss').value = self.misses
+        CHART_CACHE_FILES.labels().set(len(self.files))
+        CHART_CACHE_BYTES.labels().set(self.bytes)
+        CHART_CACHE_EVICTIONS.labels().value = self.evictions
@@ -0,0 +1,69 @@
+# Imports
+import asyncio
+import time
+from utils.rate_limiter import INTERACTIVE
+
+# Create class
+class CMCMap:
+
+    # Init method (set important variables)
+    def __init__(self, api_client, ttl=86400):
+        self.api_client = api_client
+        self.ttl = ttl                   # Seconds before the map is re-fetched
+        self.fetched_at = None           # When the current map was fetched (None until the first fetch)
+        self.lock = asyncio.Lock()       # Only one refresh at a time (everyone else waits for it)
+
+        # Every /v1/cryptocurrency/map entry, in map order (the CoinGecko cross-reference is built from these)
+        self.entries = []
+
+        # Lowercase-keyed hash indexes into the /v1/cryptocurrency/map entries
+        self.name_index = {}             # name -> first entry with that name (same pick as the old linear scan)
+        self.slug_index = {}             # slug -> entry
+        self.symbol_index = {}           # symbol -> every entry with that symbol, in map order
+
+    # Function to check whether the map needs (re-)fetching
+    def is_stale(self) -> bool:
+        return self.fetched_at is None or time.monotonic() - self.fetched_at >= self.ttl
+
+    # Function to fetch the whole map once and index it (raises UpstreamError if the request was not successful)
+    async def refresh(self, priority=INTERACTIVE):
+        data = await self.api_client.cmc_json('/v1/cryptocurrency/map', priority=priority)
+        entries = data.get('data') or []
+
+        # Build fresh indexes, then swap them all in at once
+        name_index, slug_index, symbol_index = {}, {}, {}
+        for entry in entries:
+            if isinstance(entry.get('name'), str):
+                name_index.setdefault(entry['name'].lower(), entry)
+            if isinstance(entry.get('slug'), str):
+                slug_index.setdefault(entry['slug'].lower(), entry)
+            if isinstance(entry.get('symbol'), str):
+                symbol_index.setdefault(entry['symbol'].lower(), []).append(entry)
+
+        self.entries, self.name_index, self.slug_index, self.symbol_index = entries, name_index, slug_index, symbol_index
+        self.fetched_at = time.monotonic()
+        print(f"CMC map refresh successful. {len(name_index)} names indexed.")
+
+    # Function to make sure the map is loaded and fresh (a failed refresh keeps serving the old map if there is one)
+    async def ensure_fresh(self, priority=INTERACTIVE):
+        if not self.is_stale():
+            return
+        async with self.lock:
+            # Someone else may have refreshed it while we waited on the lock
+            if not self.is_stale():
+                return
+            try:
+                await self.refresh(priority)
+            except Exception as e:
+                if self.fetched_at is None:
+                    raise
+                print(f"CMC map refresh failed, keeping the old map. Error: {e!r}")
+
+    # Function to find a coin's map entry by name, then slug, then symbol (returns None if it isn't in the map)
+    async def find(self, query):
+        await self.ensure_fresh()
+        query = query.lower()
+        entry = self.name_index.get(query) or self.slug_index.get(query)
+        if entry is None and query in self.symbol_index:
+            entry = self.symbol_index[query][0]
+        return entry
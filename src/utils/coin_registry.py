@@ -0,0 +1,209 @@
+# Imports
+import sys
+from bisect import bisect_left
+from utils.fuzzy_index import FuzzyIndex
+
+# Column names, in /coins/list order
+COLUMNS = ('id', 'symbol', 'name')
+
+# Function to intern a value from the coin list (identical strings across columns and index keys then share one object; junk values become None)
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else None
+
+# Function to add a row to a compact index (a key maps to a bare int for one row, or a tuple of rows in registry order; always builds a new value so older registries sharing the dict entry are left alone).
+# The row goes in at its place in row order, not at the end, so a renamed coin can't jump ahead of (or behind) the coins it shares a name with
+def index_add(index, key, row):
+    current = index.get(key)
+    if current is None:
+        index[key] = row
+    elif isinstance(current, int):
+        index[key] = (current, row) if current < row else (row, current)
+    else:
+        position = bisect_left(current, row)
+        index[key] = current[:position] + (row,) + current[position:]
+
+# Function to take a row out of a compact index (same copy-on-write rules as index_add)
+def index_remove(index, key, row):
+    current = index.get(key)
+    if current is None:
+        return
+    rows = tuple(other for other in ((current,) if isinstance(current, int) else current) if other != row)
+    if not rows:
+        del index[key]
+    else:
+        index[key] = rows[0] if len(rows) == 1 else rows
+
+# Create class (lightweight view of one registry row; doesn't copy anything out of the registry)
+class CoinRow:
+    __slots__ = ('registry', 'row')
+
+    # Init method (set important variables)
+    def __init__(self, registry, row):
+        self.registry = registry
+        self.row = row
+
+    @property
+    def id(self):
+        return self.registry.ids[self.row]
+
+    @property
+    def symbol(self):
+        return self.registry.symbols[self.row]
+
+    @property
+    def name(self):
+        return self.registry.names[self.row]
+
+    def __repr__(self):
+        return f"CoinRow({self.row}, id={self.id!r}, symbol={self.symbol!r}, name={self.name!r})"
+
+# Create class
+class CoinRegistry:
+    __slots__ = ('ids', 'symbols', 'names', 'removed', 'name_index', 'id_index', 'symbol_index', 'name_search', 'id_search')
+
+    # Init method (build every lookup index once, up front, so lookups never have to scan anything)
+    def __init__(self, ids=(), symbols=(), names=()):
+        # One contiguous array per column, holding interned strings (integer row id -> value; removed coins become None until the next full rebuild)
+        self.ids = [intern(value) for value in ids]
+        self.symbols = [intern(value) for value in symbols]
+        self.names = [intern(value) for value in names]
+        self.removed = 0
+
+        # Lowercase-keyed hash indexes (name/symbol -> every matching row in registry order; id -> first matching row)
+        self.name_index = {}
+        self.id_index = {}
+        self.symbol_index = {}
+
+        # Fill the indexes in one pass over the rows (skip any junk values CoinGecko might send)
+        for row in range(len(self.ids)):
+            self.index(row)
+
+        # Precomputed fuzzy-search engines for typo correction (positions line up with row numbers)
+        self.name_search = FuzzyIndex(self.names)
+        self.id_search = FuzzyIndex(self.ids)
+
+    # Function to build the registry straight from /coins/list entries (list of dicts)
+    @classmethod
+    def from_records(cls, records):
+        return cls([record.get('id') for record in records], [record.get('symbol') for record in records], [record.get('name') for record in records])
+
+    # Function to build the registry from a /coins/list style df (pandas is optional; only callers that already have a df use this)
+    @classmethod
+    def from_df(cls, df):
+        if df.empty:
+            return cls()
+        return cls(df['id'].tolist(), df['symbol'].tolist(), df['name'].tolist())
+
+    # Function to export the live rows as a df (imports pandas only when someone actually asks for one)
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(dict(zip(COLUMNS, self.columns())), columns=list(COLUMNS))
+
+    # Number of (live) coins in the registry
+    def __len__(self):
+        return len(self.ids) - self.removed
+
+    # Function to get the row number for a name (duplicate names resolve to the coin that has been in the registry longest, i.e. first in /coins/list order after a full build)
+    def row_for_name(self, name):
+        rows = self.name_index.get(name.lower())
+        return rows if rows is None or isinstance(rows, int) else rows[0]
+
+    # Function to get the row number for an id
+    def row_for_id(self, coin_id):
+        return self.id_index.get(coin_id.lower())
+
+    # Function to get every row number sharing a symbol (symbols are not unique at all, so return them all)
+    def rows_for_symbol(self, symbol):
+        rows = self.symbol_index.get(symbol.lower(), ())
+        return (rows,) if isinstance(rows, int) else rows
+
+    # Function to get the (id, name, symbol) of a row
+    def row(self, row):
+        return self.ids[row], self.names[row], self.symbols[row]
+
+    # Function to get a view of a row (e.g. `registry.view(row).name`)
+    def view(self, row):
+        return CoinRow(self, row)
+
+    # Function to get the live columns (no removed rows) as (ids, symbols, names), e.g. for saving a snapshot
+    def columns(self):
+        if not self.removed:
+            return list(self.ids), list(self.symbols), list(self.names)
+        live = [row for row, coin_id in enumerate(self.ids) if coin_id is not None]
+        return [self.ids[row] for row in live], [self.symbols[row] for row in live], [self.names[row] for row in live]
+
+    # Function to compare a fresh /coins/list against the registry (returns (added, removed, renamed): new (id, symbol, name) tuples, removed rows, and (row, symbol, name) tuples for coins whose name or symbol changed)
+    def diff(self, ids, symbols, names):
+        fresh = {coin_id: (symbol, name) for coin_id, symbol, name in zip(ids, symbols, names)}
+
+        removed = []
+        renamed = []
+        known = set()
+        for row, coin_id in enumerate(self.ids):
+            if coin_id is None:
+                continue
+            known.add(coin_id)
+            entry = fresh.get(coin_id)
+            if entry is None:
+                removed.append(row)
+            elif entry != (self.symbols[row], self.names[row]):
+                renamed.append((row, entry[0], entry[1]))
+
+        added = [(coin_id, symbol, name) for coin_id, (symbol, name) in fresh.items() if coin_id not in known]
+        return added, removed, renamed
+
+    # Function to get a copy of the registry with a diff applied (copy-on-write: only the touched index entries are rebuilt, and this registry is never modified, so it can keep serving lookups until the new one is swapped in)
+    def apply_diff(self, added, removed, renamed):
+        new = object.__new__(CoinRegistry)
+        new.ids, new.symbols, new.names = list(self.ids), list(self.symbols), list(self.names)
+        new.removed = self.removed + len(removed)
+        new.name_index, new.id_index, new.symbol_index = dict(self.name_index), dict(self.id_index), dict(self.symbol_index)
+
+        # Row -> new text for each fuzzy index (None clears the row)
+        name_changes, id_changes = {}, {}
+
+        # Drop removed coins from every index and leave a tombstone in their row
+        for row in removed:
+            new.unindex(row)
+            new.ids[row] = new.symbols[row] = new.names[row] = None
+            name_changes[row] = id_changes[row] = None
+
+        # Re-index coins whose name or symbol changed (their id and row stay the same)
+        for row, symbol, name in renamed:
+            new.unindex(row)
+            new.symbols[row], new.names[row] = intern(symbol), intern(name)
+            new.index(row)
+            name_changes[row] = new.names[row]
+
+        # Append new coins at the end (so an existing coin keeps winning any duplicate-name lookup)
+        for coin_id, symbol, name in added:
+            row = len(new.ids)
+            new.ids.append(intern(coin_id))
+            new.symbols.append(intern(symbol))
+            new.names.append(intern(name))
+            new.index(row)
+            name_changes[row], id_changes[row] = new.names[row], new.ids[row]
+
+        new.name_search = self.name_search.updated(name_changes)
+        new.id_search = self.id_search.updated(id_changes)
+        return new
+
+    # Function to add a row to the hash indexes (keys are interned too, so an already-lowercase id shares its object with the id column)
+    def index(self, row):
+        coin_id, name, symbol = self.row(row)
+        if name is not None:
+            index_add(self.name_index, sys.intern(name.lower()), row)
+        if coin_id is not None:
+            self.id_index.setdefault(sys.intern(coin_id.lower()), row)
+        if symbol is not None:
+            index_add(self.symbol_index, sys.intern(symbol.lower()), row)
+
+    # Function to take a row out of the hash indexes
+    def unindex(self, row):
+        coin_id, name, symbol = self.row(row)
+        if name is not None:
+            index_remove(self.name_index, name.lower(), row)
+        if symbol is not None:
+            index_remove(self.symbol_index, symbol.lower(), row)
+        if coin_id is not None and self.id_index.get(coin_id.lower()) == row:
+            del self.id_index[coin_id.lower()]
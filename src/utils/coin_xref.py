@@ -0,0 +1,70 @@
+# Imports
+from collections import Counter
+
+# Function to match CoinGecko coins to CoinMarketCap map entries (runs on the CPU pool; returns (gecko id -> CMC id, CMC id -> gecko id)).
+# A coin matches when its id is the entry's slug and the symbols agree, or failing that when its symbol and name match exactly one entry (and no other
+# CoinGecko coin), so lookalike tokens never get each other's prices
+def build_cross_reference(ids, symbols, names, entries):
+    # Index the CMC entries by slug, and by (symbol, name) pairs that only one entry has
+    by_slug = {}
+    pair_counts = Counter()
+    by_pair = {}
+    for entry in entries:
+        slug, symbol, name = entry.get('slug'), entry.get('symbol'), entry.get('name')
+        if not isinstance(symbol, str) or entry.get('id') is None:
+            continue
+        if isinstance(slug, str):
+            by_slug.setdefault(slug.lower(), entry)
+        if isinstance(name, str):
+            pair = (symbol.lower(), name.lower())
+            pair_counts[pair] += 1
+            by_pair[pair] = entry
+
+    # Same for the CoinGecko side (a pair two of our coins share can't tell them apart)
+    gecko_pairs = Counter((symbol.lower(), name.lower()) for symbol, name in zip(symbols, names) if isinstance(symbol, str) and isinstance(name, str))
+
+    # Slug matches first (they're the surest), then unique pairs for whatever CMC id is still free
+    gecko_to_cmc, cmc_to_gecko = {}, {}
+    for coin_id, symbol in zip(ids, symbols):
+        entry = by_slug.get(coin_id) if coin_id is not None else None
+        if entry is not None and isinstance(symbol, str) and entry['symbol'].lower() == symbol.lower() and entry['id'] not in cmc_to_gecko:
+            gecko_to_cmc[coin_id] = entry['id']
+            cmc_to_gecko[entry['id']] = coin_id
+    for coin_id, symbol, name in zip(ids, symbols, names):
+        if coin_id is None or coin_id in gecko_to_cmc or not isinstance(symbol, str) or not isinstance(name, str):
+            continue
+        pair = (symbol.lower(), name.lower())
+        entry = by_pair.get(pair)
+        if entry is not None and pair_counts[pair] == 1 and gecko_pairs[pair] == 1 and entry['id'] not in cmc_to_gecko:
+            gecko_to_cmc[coin_id] = entry['id']
+            cmc_to_gecko[entry['id']] = coin_id
+    return gecko_to_cmc, cmc_to_gecko
+
+# Create class (which CoinGecko id is which CoinMarketCap id, so either provider can be asked about a coin without any lookup calls first)
+class CoinCrossReference:
+
+    # Init method (set important variables)
+    def __init__(self):
+        self.gecko_to_cmc = {}
+        self.cmc_to_gecko = {}
+        self.built_from = None           # (registry version, CMC map fetch time) the current maps were built from
+
+    def __len__(self):
+        return len(self.gecko_to_cmc)
+
+    # Function to swap freshly built maps in (both at once, so they always agree)
+    def swap(self, gecko_to_cmc, cmc_to_gecko, built_from):
+        self.gecko_to_cmc, self.cmc_to_gecko, self.built_from = gecko_to_cmc, cmc_to_gecko, built_from
+
+    # Function to get a CoinGecko coin's CMC id (None if we couldn't match it)
+    def cmc_id(self, gecko_id):
+        return self.gecko_to_cmc.get(gecko_id)
+
+    # Function to get a CMC id's CoinGecko coin (None if we couldn't match it)
+    def gecko_id(self, cmc_id):
+        return self.cmc_to_gecko.get(cmc_id)
+
+    # Function to check whether every one of these coins has a CMC id (a request can only go to CMC if the whole answer can come back from there)
+    def covers(self, gecko_ids) -> bool:
+        gecko_to_cmc = self.gecko_to_cmc
+        return bool(gecko_to_cmc) and all(coin_id in gecko_to_cmc for coin_id in gecko_ids)
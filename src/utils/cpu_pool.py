@@ -0,0 +1,107 @@
+# Imports
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import metrics
+
+# Offload metrics
+CPU_QUEUE_SECONDS = metrics.histogram('cpu_pool_queue_seconds', 'Time CPU work waited for a free worker', ('task',))
+CPU_RUN_SECONDS = metrics.histogram('cpu_pool_run_seconds', 'Time CPU work took on its worker', ('task',))
+CPU_REJECTED = metrics.counter('cpu_pool_rejected_total', 'CPU work refused because the pool queue was full', ('task',))
+CPU_IN_FLIGHT = metrics.gauge('cpu_pool_in_flight', 'CPU work queued or running on the pool')
+
+# Error raised when the pool already has as much work waiting as it's allowed to (callers decide whether to run inline or give up)
+class CPUPoolFullError(Exception):
+
+    # Init method (keep the task name around for the caller)
+    def __init__(self, task):
+        super().__init__(f"CPU pool queue is full (task: {task})")
+        self.task = task
+
+# Function to run a call and note when it started and finished (runs on the worker; module level so process workers can unpickle it)
+def timed_call(fn, args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, started, time.perf_counter()
+
+# Create class (bounded pool for CPU-heavy work, so it never runs on the event loop; threads always, plus optional worker processes with preloaded state)
+class CPUPool:
+
+    # Init method (`processes` > 0 adds a process pool for run_in_process(); `max_queue` caps queued + running work across both)
+    def __init__(self, threads=2, processes=0, max_queue=64):
+        self.threads = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='cpu')
+        self.processes = processes
+        self.process_pool = None         # Made by preload() (workers are spawned with the preloaded state already built)
+        self.preload_version = None      # Version of the state the current process workers hold
+        self.preload_lock = threading.Lock() # preload() can run on a thread (see DataManager.swap_registry), so installing the new workers is guarded
+        self.closed = False
+        self.max_queue = max_queue
+        self.pending = 0
+
+    # Function to run `fn(*args)` on a worker thread (raises CPUPoolFullError straight away if the queue is full)
+    async def run(self, task, fn, *args):
+        return await self.submit(self.threads, task, fn, args)
+
+    # Function to run `fn(*args)` on a worker process (fn must be a module-level function; raises CPUPoolFullError, or RuntimeError if there's no process pool)
+    async def run_in_process(self, task, fn, *args):
+        if self.process_pool is None:
+            raise RuntimeError("No process pool (set processes > 0 and call preload() first)")
+        return await self.submit(self.process_pool, task, fn, args)
+
+    # Function to hand work to an executor and time it
+    async def submit(self, executor, task, fn, args):
+        if self.pending >= self.max_queue:
+            CPU_REJECTED.labels(task).inc()
+            raise CPUPoolFullError(task)
+
+        self.pending += 1
+        CPU_IN_FLIGHT.labels().inc()
+        queued = time.perf_counter()
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(executor, timed_call, fn, args)
+        finally:
+            self.pending -= 1
+            CPU_IN_FLIGHT.labels().dec()
+
+        # perf_counter is system-wide on the platforms we run on, so times from process workers line up with ours
+        CPU_QUEUE_SECONDS.labels(task).observe(max(0.0, started - queued))
+        CPU_RUN_SECONDS.labels(task).observe(finished - started)
+        return result
+
+    # Function to (re)start the process workers with new preloaded state, e.g. after the coin registry changes (`initializer(*initargs)` runs once in each worker;
+    # spawning takes a while, so it's fine to call this on a thread, and the new workers only take over once they're started, and only if `version` is newer)
+    def preload(self, version, initializer, initargs):
+        if not self.processes:
+            return
+
+        # Only pulled in when there are process workers to start (multiprocessing is slow to import, and the bot's startup doesn't need it)
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context('spawn'), initializer=initializer, initargs=initargs)
+
+        # Start every worker now (spawning and preloading takes a moment, and nobody should be waiting on it)
+        for _ in range(self.processes):
+            pool.submit(int)
+
+        # Swap the new workers in, unless we've been closed or newer ones got there first
+        with self.preload_lock:
+            if self.closed or (self.preload_version is not None and self.preload_version >= version):
+                old = pool
+            else:
+                old = self.process_pool
+                self.process_pool, self.preload_version = pool, version
+
+        # Let the old workers finish whatever they're doing in the background
+        if old is not None:
+            old.shutdown(wait=False, cancel_futures=False)
+
+    # Function to shut every worker down
+    def close(self):
+        self.threads.shutdown(wait=False, cancel_futures=True)
+        with self.preload_lock:
+            self.closed = True
+            if self.process_pool is not None:
+                self.process_pool.shutdown(wait=False, cancel_futures=True)
+                self.process_pool = None
+            self.preload_version = None # Nobody holds any state now (a search racing the shutdown mustn't think the workers are still there)
@@ -0,0 +1,25 @@
+# CPU work that runs inside CPUPool process workers (module-level functions and state, so they can be pickled over and preloaded once per worker)
+
+# Imports
+from utils.fuzzy_index import FuzzyIndex
+from utils.chart import render_chart
+
+# Per-worker state (set once by load_fuzzy when the worker starts)
+VERSION = None
+INDEXES = {}
+
+# Function to build the fuzzy indexes inside a worker (the pool's initializer; runs once per worker process)
+def load_fuzzy(version, names, ids):
+    global VERSION, INDEXES
+    VERSION = version
+    INDEXES = {'name': FuzzyIndex(names), 'id': FuzzyIndex(ids)}
+
+# Function to get a worker ready for everything we send it (the pool's initializer: builds the fuzzy indexes, then draws a tiny throwaway chart so NumPy
+# and the chart code are already loaded when the first real !chart comes in)
+def load_worker(version, names, ids):
+    load_fuzzy(version, names, ids)
+    render_chart([0.0, 1.0], [1.0, 2.0], width=8, height=4)
+
+# Function to run a fuzzy search against the worker's preloaded index (returns (version, results) so the caller can tell if the worker's registry was out of date)
+def fuzzy_search(kind, query, limit=3):
+    return VERSION, INDEXES[kind].search(query, limit=limit)
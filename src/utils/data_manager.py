@@ -2,69 +2,337 @@
 import discord
 from discord.ext import commands
 import asyncio
-import aiohttp
-import pandas as pd
-from rapidfuzz import process
+import os
+import time
+from utils.api_client import UpstreamError
+from utils.coin_registry import CoinRegistry
+from utils.rate_limiter import BACKGROUND
+from utils.cmc_map import CMCMap
+from utils.coin_xref import build_cross_reference
+from utils.providers import Providers
+from utils.top_listings import TopListings
+from utils.alert_engine import AlertBook
+from utils.subscription_store import SubscriptionStore
+from utils.metrics import metrics
+from utils.registry_snapshot import load_snapshot, save_snapshot
+from utils.cpu_pool import CPUPoolFullError
+from utils import cpu_tasks
+from concurrent.futures import BrokenExecutor
+
+# Most coins one multi-coin command can ask for (one embed line each)
+MAX_COINS_PER_COMMAND = 25
+
+# Fraction of the registry that can change (or sit removed) before a refresh rebuilds every index from scratch instead of patching them
+REBUILD_FRACTION = 0.2
+
+# Registry metrics (children looked up once here, so the lookup hot path only pays for the clock reads)
+REGISTRY_LOOKUP_SECONDS = metrics.histogram('registry_lookup_seconds', 'Exact registry lookup latency', ('kind',))
+REGISTRY_LOOKUPS = metrics.counter('registry_lookups_total', 'Exact registry lookups by result', ('kind', 'result'))
+FUZZY_SEARCH_SECONDS = metrics.histogram('fuzzy_search_seconds', 'Fuzzy typo-correction search latency', ('kind',))
+REGISTRY_REFRESHES = metrics.counter('registry_refreshes_total', 'Coin registry refreshes by result', ('result',))
+REGISTRY_REFRESH_SECONDS = metrics.histogram('registry_refresh_seconds', 'Time to build and swap in a refreshed coin registry')
+REGISTRY_COINS = metrics.gauge('registry_coins', 'Coins in the live registry')
+CROSS_REFERENCED_COINS = metrics.gauge('cross_referenced_coins', 'Coins matched between CoinGecko and CoinMarketCap (the ones CMC can answer for)')
+REGISTRY_AGE_SECONDS = metrics.gauge('registry_age_seconds', 'Seconds since the registry was last refreshed from the network (-1 if only loaded from a snapshot)')
+NAME_LOOKUP_SECONDS, ID_LOOKUP_SECONDS = REGISTRY_LOOKUP_SECONDS.labels('name'), REGISTRY_LOOKUP_SECONDS.labels('id')
+NAME_HITS, NAME_MISSES = REGISTRY_LOOKUPS.labels('name', 'hit'), REGISTRY_LOOKUPS.labels('name', 'miss')
+ID_HITS, ID_MISSES = REGISTRY_LOOKUPS.labels('id', 'hit'), REGISTRY_LOOKUPS.labels('id', 'miss')
+
+# Function to split a command's arguments into coin names/ids (`!price btc eth`, `!price btc, eth` and `!price "bitcoin cash" eth` all work)
+def split_coins(args) -> list:
+    return [part.strip() for arg in args for part in arg.split(',') if part.strip()]
 
 # Create class
 class DataManager:
 
     # Init function 
-    def __init__(self):
-        self.gecko_df = pd.DataFrame()
-        self.subscriptions_data = None
+    def __init__(self, api_client, snapshot_path=None, cmc_map_ttl=86400, top_listings_size=200, max_alerts_per_user=25, subscriptions_path=None, cpu_pool=None,
+                 cache_backend=None, top_listings_ttl=900, cluster_index=0, cluster_count=1, providers=None):
+        self.api_client = api_client
+        self.providers = providers or Providers(api_client) # Both upstream providers (we keep their CoinGecko <-> CMC cross-reference up to date)
+        self.cpu_pool = cpu_pool # Where CPU-heavy work (registry builds, fuzzy search) runs, off the event loop (None runs it on plain threads / inline)
+        self.cmc_map = CMCMap(api_client, ttl=cmc_map_ttl)
+        self.top_listings = TopListings(api_client, size=top_listings_size, backend=cache_backend, share_ttl=top_listings_ttl, providers=self.providers)
+        self.snapshot_path = snapshot_path
+        self.snapshot_stamp = None # Modification time of the snapshot file the registry last came from (or went to)
+        self.registry = CoinRegistry()
+        self.registry_version = 0 # Bumped on every registry swap (tells process workers' preloaded copies apart)
+        self.preloading = None # Latest handover of the registry to the process workers (runs on a thread)
+        self.cross_referencing = None # Latest rebuild of the cross-reference for a new registry
+        self.last_refresh = None
+        self.subscription_store = SubscriptionStore(subscriptions_path, changelog=cluster_count > 1) if subscriptions_path else None # Durable alerts/watchlists/preferences (memory only without a path; logs changes for the other processes in a cluster)
+        self.subscriptions_data = AlertBook(max_per_user=max_alerts_per_user, store=self.subscription_store, id_stride=cluster_count, id_offset=cluster_index) # Every user's price alerts
     
-    # Function to populate gecko cache (to be run daily soon... for data integrity & accuracy)
+    # Function to populate gecko cache (run on startup and then on a schedule by the bot, for data integrity & accuracy)
     async def populate_cache(self):
-            # Obtain API link to request & receive the data from
-            url = 'https://api.coingecko.com/api/v3/coins/list'
-
-            # Asynchronously create a ClientSession (so the bot can make multiple HTTP calls and not get blocked from just one call)
-            async with aiohttp.ClientSession() as session:
-                # The actual request
-                async with session.get(url) as response:
-                    # Request successsful,
-                    if response.status == 200:
-                        # Parse the response as JSON data
-                        data = await response.json()
-
-                        # Assign the updated df cache to the empty df
-                        self.gecko_df = pd.DataFrame(data)
-
-                        # Log the successful population
-                        print("Cache population successful.")
-
-                    # If the request was not successful,
-                    else:
-                        # Log the error
-                        print(f"Failed to retrieve coin data. Status code: {response.status}")
-
-    # Function to get coin data from the df when called upon
+            # The actual request (through the bot's shared, pooled client, queued behind any commands users are waiting on)
+            try:
+                data = await self.api_client.gecko_json('/coins/list', priority=BACKGROUND)
+            # If the request was not successful (the bot keeps whatever registry it already has),
+            except UpstreamError as e:
+                # Log the error
+                print(f"Failed to retrieve coin data. Status code: {e.status}")
+                REGISTRY_REFRESHES.labels('failed').inc()
+                return
+
+            # Build the updated registry (off the event loop, so the bot never stalls)
+            start = time.perf_counter()
+            registry, added, removed, renamed = await self.run_cpu('registry_build', self.build_registry, data)
+
+            # Swap it in (commands mid-lookup keep using the old registry object they already have)
+            self.swap_registry(registry)
+            self.last_refresh = time.monotonic()
+            REGISTRY_REFRESHES.labels('ok').inc()
+            REGISTRY_REFRESH_SECONDS.labels().observe(time.perf_counter() - start)
+
+            # Log the successful population
+            print(f"Cache population successful. {len(registry)} coins (+{added} added, -{removed} removed, ~{renamed} renamed) in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+            # Save the new registry to disk for the next startup
+            if self.snapshot_path:
+                try:
+                    await asyncio.to_thread(save_snapshot, self.snapshot_path, *registry.columns())
+                    self.snapshot_stamp = self.read_snapshot_stamp()
+                except OSError as e:
+                    print(f"Failed to save coin registry snapshot: {e}")
+
+    # Function to build the next registry from a fresh /coins/list payload (returns (registry, added, removed, renamed) counts)
+    def build_registry(self, data):
+        ids, symbols, names = [coin.get('id') for coin in data], [coin.get('symbol') for coin in data], [coin.get('name') for coin in data]
+
+        # Work out what changed since the current registry
+        added, removed, renamed = self.registry.diff(ids, symbols, names)
+        counts = (len(added), len(removed), len(renamed))
+
+        # Small diffs only touch the affected index entries; big ones (or too many tombstones piling up from past removals) get a full rebuild in /coins/list order
+        changed = sum(counts)
+        if len(self.registry) == 0 or changed > REBUILD_FRACTION * len(ids) or self.registry.removed + len(removed) > REBUILD_FRACTION * len(ids):
+            return (CoinRegistry(ids, symbols, names), *counts)
+        return (self.registry.apply_diff(added, removed, renamed), *counts)
+
+    # Function to open the subscription database and load everyone's alerts from it (streamed in chunks, so a big table never sits in memory twice)
+    async def load_subscriptions(self):
+        if self.subscription_store is None:
+            return
+        start = time.perf_counter()
+        await self.subscription_store.open()
+        count = await self.subscriptions_data.load()
+        self.subscription_store.start()
+        print(f"Loaded {count} price alerts in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+    # Function to populate gecko cache from the on-disk snapshot (takes milliseconds instead of a full /coins/list download, read and indexed off the event loop
+    # so the bot can log in meanwhile; returns whether it worked)
+    async def load_snapshot(self) -> bool:
+        # No snapshot configured
+        if not self.snapshot_path:
+            return False
+
+        # Missing, outdated or corrupt snapshot (the caller falls back to the network)
+        stamp = self.read_snapshot_stamp()
+        columns = await asyncio.to_thread(load_snapshot, self.snapshot_path)
+        if columns is None:
+            print("No usable coin registry snapshot found.")
+            return False
+
+        # Build the registry and its indexes from the snapshot columns
+        registry = await self.run_cpu('registry_build', CoinRegistry, columns['id'], columns['symbol'], columns['name'])
+        self.swap_registry(registry)
+        self.snapshot_stamp = stamp
+
+        # Log the successful load
+        print(f"Loaded {len(registry)} coins from registry snapshot.")
+        return True
+
+    # Function to load the registry at startup (from the snapshot, only waiting on the network if there's no usable snapshot)
+    async def load_registry(self):
+        if not await self.load_snapshot():
+            await self.populate_cache()
+
+    # Function to get the snapshot file's modification time (None if there isn't one)
+    def read_snapshot_stamp(self):
+        try:
+            return os.stat(self.snapshot_path).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    # Function to pick up a snapshot another bot process saved (cluster workers follow the primary's registry instead of each downloading /coins/list; returns whether it changed)
+    async def follow_snapshot(self) -> bool:
+        stamp = self.read_snapshot_stamp()
+        if stamp is None or stamp == self.snapshot_stamp:
+            return False
+
+        # A half-written file can't happen, save_snapshot swaps the new file in whole
+        if not await self.load_snapshot():
+            return False
+        self.last_refresh = time.monotonic()
+        return True
+
+    # Function to make a new registry live (and hand a copy of its fuzzy indexes to any process workers)
+    def swap_registry(self, registry):
+        self.registry = registry
+        self.registry_version += 1
+        if self.cpu_pool is not None and self.cpu_pool.processes:
+            # Spawning the workers takes longer than the rest of startup put together, so it happens on a thread (searches run inline until they're up)
+            self.preloading = asyncio.ensure_future(asyncio.to_thread(self.cpu_pool.preload, self.registry_version, cpu_tasks.load_worker, (self.registry_version, registry.names, registry.ids)))
+
+        # Match the new registry up with the CMC map too (once the map has been loaded; until then there's nothing to match against)
+        if self.cmc_map.entries:
+            self.cross_referencing = asyncio.ensure_future(self.update_cross_reference(refresh_map=False))
+
+    # Function to rebuild the CoinGecko <-> CMC cross-reference if the registry or the CMC map changed since it was built (fetches the map first if it's
+    # missing or stale, unless told not to; raises UpstreamError if the map can't be fetched and we don't have one)
+    async def update_cross_reference(self, refresh_map=True):
+        if refresh_map:
+            await self.cmc_map.ensure_fresh(priority=BACKGROUND)
+        cross_reference = self.providers.cross_reference
+        registry, entries = self.registry, self.cmc_map.entries
+        built_from = (self.registry_version, self.cmc_map.fetched_at)
+        if not len(registry) or not entries or cross_reference.built_from == built_from:
+            return
+
+        # Match every coin off the event loop, then swap both maps in at once (unless a build for a newer registry or map beat this one to it)
+        start = time.perf_counter()
+        gecko_to_cmc, cmc_to_gecko = await self.run_cpu('cross_reference', build_cross_reference, registry.ids, registry.symbols, registry.names, entries)
+        if cross_reference.built_from is not None and cross_reference.built_from >= built_from:
+            return
+        cross_reference.swap(gecko_to_cmc, cmc_to_gecko, built_from)
+        print(f"Cross-referenced {len(gecko_to_cmc)} coins between CoinGecko and CoinMarketCap in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+    # Function to run CPU-heavy work off the event loop (on the CPU pool if there's room, otherwise on a plain thread)
+    async def run_cpu(self, task, fn, *args):
+        if self.cpu_pool is not None:
+            try:
+                return await self.cpu_pool.run(task, fn, *args)
+            except CPUPoolFullError:
+                pass
+        return await asyncio.to_thread(fn, *args)
+
+    # Function to get the closest names/ids to a typo from a given registry (on a process worker holding a preloaded copy of its index, so a slow search can't stall the event loop;
+    # on a pool thread while the workers are still loading this registry; raises CPUPoolFullError if the pool is swamped, since searching on the loop instead is what stalls it)
+    async def fuzzy_search(self, registry, version, kind, query, limit=3):
+        index = registry.name_search if kind == 'name' else registry.id_search
+        with FUZZY_SEARCH_SECONDS.labels(kind).time():
+            # No process workers configured at all (CPU_POOL_PROCESSES=0, or no pool), so the search runs inline; this is the only case that touches the loop
+            if self.cpu_pool is None or not self.cpu_pool.processes:
+                return index.search(query, limit=limit)
+
+            # Only the query goes over to the worker, and its answer only counts if it still holds this registry (a refresh may have swapped it meanwhile)
+            if self.cpu_pool.preload_version == version:
+                try:
+                    worker_version, results = await self.cpu_pool.run_in_process('fuzzy', cpu_tasks.fuzzy_search, kind, query, limit)
+                    if worker_version == version:
+                        return results
+                except BrokenExecutor as e:
+                    print(f"Fuzzy search worker failed, searching on a thread instead: {e!r}")
+
+            # Workers still loading this registry (right after a swap) or gone, so search this registry's index on a pool thread
+            return await self.cpu_pool.run('fuzzy', index.search, query, limit)
+
+    # Function to copy the registry state into the metrics registry (registered as a collector by the bot)
+    def collect_metrics(self, metrics):
+        REGISTRY_COINS.labels().set(len(self.registry))
+        CROSS_REFERENCED_COINS.labels().set(len(self.providers.cross_reference))
+        REGISTRY_AGE_SECONDS.labels().set(time.monotonic() - self.last_refresh if self.last_refresh is not None else -1)
+
+    # The registry as a pandas df, for anything that still wants one (built on demand; needs pandas installed)
+    @property
+    def gecko_df(self):
+        return self.registry.to_dataframe()
+
+    # Function to get coin data from the registry when called upon
     def get_coin_name(self, coin_name) -> str:         
-        # Checks for the matching input from the user in the df and assigns that to a new df
-        match = self.gecko_df[self.gecko_df['name'].str.lower() == coin_name.lower()]
+        # Checks for the matching input from the user in the name index (duplicate names resolve to the first coin in /coins/list order)
+        start = time.perf_counter()
+        row = self.registry.row_for_name(coin_name)
+        NAME_LOOKUP_SECONDS.observe(time.perf_counter() - start)
 
-        if not match.empty:                                             # If there is a match and the df is not empty after the previous code is executed
-            return match.iloc[0]['id']                                  # Return the id from the Series in the df to the calling function
+        if row is not None:                                             # If there is a match in the index
+            NAME_HITS.inc()
+            return self.registry.ids[row]                               # Return the id of that row to the calling function
         else:
+            NAME_MISSES.inc()
             return None
         
-    # Function to get coin data from the df when called upon
+    # Function to get coin data from the registry when called upon
     def get_coin_id(self, coin_id) -> str:                                  
-        # Checks for the matching input from the user in the df and assigns that to a new df
-        match = self.gecko_df[self.gecko_df['id'].str.lower() == coin_id.lower()]
+        # Checks for the matching input from the user in the id index
+        start = time.perf_counter()
+        row = self.registry.row_for_id(coin_id)
+        ID_LOOKUP_SECONDS.observe(time.perf_counter() - start)
 
-        if not match.empty:                                             # If there is a match and the df is not empty after the previous code is executed
-            return match.iloc[0]['id']                                  # Return the id from the Series in the df to the calling function
+        if row is not None:                                             # If there is a match in the index
+            ID_HITS.inc()
+            return self.registry.ids[row]                               # Return the id of that row to the calling function
         else:
+            ID_MISSES.inc()
             return None
+
+    # Function to get the display name of a coin from its (exact) id
+    def get_display_name(self, coin_id) -> str:
+        row = self.registry.row_for_id(coin_id)
+        return self.registry.names[row] if row is not None else None
         
+    # Function to look up the closest names/ids to a typo (returns (registry, list of (name, score, row) tuples, or None if the CPU pool is too busy to search); the registry is the one the rows belong to, so hold on to it
+    # for as long as the rows are in use, even if a refresh lands meanwhile)
+    async def suggest(self, kind, query):
+        registry, version = self.registry, self.registry_version
+        try:
+            return registry, await self.fuzzy_search(registry, version, kind, query)
+        except CPUPoolFullError:
+            return registry, None # Too many searches queued already (the caller tells the user to try again)
+
+    # Function to resolve a list of names/ids to coin ids in one go (exact matches straight from the index, every typo's fuzzy search at once, then one prompt per typo in order;
+    # returns the ids found, without duplicates, leaving out anything the user gave up on)
+    async def resolve_many(self, ctx, queries, kind='name') -> list:
+        lookup = self.get_coin_name if kind == 'name' else self.get_coin_id
+        correct = self.get_corrected_name if kind == 'name' else self.get_corrected_id
+        coin_ids = [lookup(query) for query in queries]
+
+        # Look up suggestions for every miss concurrently (on the CPU pool), so the prompts come back to back
+        misses = [query for query, coin_id in zip(queries, coin_ids) if coin_id is None]
+        suggestions = iter(await asyncio.gather(*(self.suggest(kind, query) for query in misses)))
+
+        # Ask about each miss in turn (the user answers one prompt at a time in this channel)
+        for i, query in enumerate(queries):
+            if coin_ids[i] is None:
+                coin_ids[i] = await correct(ctx, query, next(suggestions))
+
+        return list(dict.fromkeys(coin_id for coin_id in coin_ids if coin_id is not None))
+
     # Function to search through the database if the user gets a name wrong
-    async def get_corrected_name(self, ctx, coin_name) -> str:
-        # Create a lowercase list to compare user input to
-        lowercase_name_list = [name.lower() for name in self.gecko_df['name'].tolist()]
-        # Get top 3 similar values in the gecko_df compared to the coin_name arg (return as list of tuples based on fuzzywuzzy similarity score)
-        similar_coins = process.extract(coin_name.lower(), lowercase_name_list, limit=3)
+    async def get_corrected_name(self, ctx, coin_name, suggestions=None) -> str:
+        # Get top 3 similar names from the precomputed fuzzy index, off the event loop (unless a multi-coin command already looked them up)
+        registry, similar_coins = suggestions or await self.suggest('name', coin_name)
+
+        # The CPU pool is swamped with searches, so rather than searching on the event loop, ask the user to try again
+        if similar_coins is None:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add field with details
+            embed.add_field(name="Busy", value=f"Sorry, I didn't find a match for '{coin_name}', and the bot is too busy to look for similar coins right now. Please try again in a few seconds.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+            return None
+
+        # Nothing even close, so there's nothing to offer
+        if not similar_coins:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add field with details
+            embed.add_field(name="Cryptocurrency not found", value=f"Sorry, I didn't find a match for '{coin_name}', or any name like it. Please check the name and try again.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+            return None
 
         # Create an embed for the user to read their options and choose the next course of action
         embed = discord.Embed(
@@ -74,10 +342,8 @@ class DataManager:
         )
 
         # Create for loop to add coins from similar_coins list into embed
-        for i, (similar_name, score, idx) in enumerate(similar_coins, start=1):
-            original_name_row = self.gecko_df[self.gecko_df['name'].str.lower() == similar_name].iloc[0] # Get the normal-case version of each respective coin's row in the df
-            original_name = original_name_row['name'] # Isolate the name for readability and modularity
-            symbol = original_name_row['symbol']      # Isolate the symbol to be put into the embed
+        for i, (similar_name, score, row) in enumerate(similar_coins, start=1):
+            original_id, original_name, symbol = registry.row(row) # Get the normal-case version of each respective coin's row straight from its row number
             embed.add_field(name=f"{i}. {original_name} ({symbol})", value="\u200b", inline=False) # Add field with info to embed
 
         # Add footer and send embed
@@ -108,8 +374,8 @@ class DataManager:
             # Else,
             choice = int(msg.content)                                                             # Turn message into an int
             if 1 <= choice <= len(similar_coins):                                                 # Check message's validity
-                ans = similar_coins[choice - 1][0]                                                # Return corresponding coin data
-                return self.gecko_df.loc[self.gecko_df['name'].str.lower() == ans, 'id'].iloc[0]  # Return the id that corresponds with that coin name
+                row = similar_coins[choice - 1][2]                                                # Return corresponding coin data
+                return registry.ids[row]                                                     # Return the id that corresponds with that coin name
             else:
                 # Create an embed for user bad input
                 embed = discord.Embed(
@@ -149,11 +415,39 @@ class DataManager:
             return None
         
     # Function to search through the database if the user gets an id wrong
-    async def get_corrected_id(self, ctx, coin_id) -> str:
-        # Create a lowercase list to compare user input to
-        lowercase_name_list = [id.lower() for id in self.gecko_df['id'].tolist()]
-        # Get top 3 similar values in the gecko_df compared to the coin_name arg (return as list of tuples based on fuzzywuzzy similarity score)
-        similar_coins = process.extract(coin_id.lower(), lowercase_name_list, limit=3)
+    async def get_corrected_id(self, ctx, coin_id, suggestions=None) -> str:
+        # Get top 3 similar ids from the precomputed fuzzy index, off the event loop (unless a multi-coin command already looked them up)
+        registry, similar_coins = suggestions or await self.suggest('id', coin_id)
+
+        # The CPU pool is swamped with searches, so rather than searching on the event loop, ask the user to try again
+        if similar_coins is None:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add field with details
+            embed.add_field(name="Busy", value=f"Sorry, I didn't find a match for '{coin_id}', and the bot is too busy to look for similar coins right now. Please try again in a few seconds.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+            return None
+
+        # Nothing even close, so there's nothing to offer
+        if not similar_coins:
+            # Make a pretty embed for the user's unfortunate news
+            embed = discord.Embed(
+                title="ERROR",
+                color=0xC41E3A
+            )
+
+            # Add field with details
+            embed.add_field(name="Cryptocurrency not found", value=f"Sorry, I didn't find a match for '{coin_id}', or any id like it. Please check the id and try again.", inline=False)
+
+            # Send the message
+            await ctx.send(embed=embed)
+            return None
 
         # Create an embed for the user to read their options and choose the next course of action
         embed = discord.Embed(
@@ -163,10 +457,8 @@ class DataManager:
         )
 
         # Create for loop to add coins from similar_coins list into embed
-        for i, (similar_id, score, idx) in enumerate(similar_coins, start=1):
-            original_id_row = self.gecko_df[self.gecko_df['id'].str.lower() == similar_id].iloc[0] # Get the normal-case version of each respective coin's row in the df
-            original_id = original_id_row['id'] # Isolate the name for readability and modularity
-            symbol = original_id_row['symbol']      # Isolate the symbol to be put into the embed
+        for i, (similar_id, score, row) in enumerate(similar_coins, start=1):
+            original_id, original_name, symbol = registry.row(row) # Get the normal-case version of each respective coin's row straight from its row number
             embed.add_field(name=f"{i}. {original_id} ({symbol})", value="\u200b", inline=False) # Add field with info to embed
 
         # Add footer and send embed
@@ -197,8 +489,8 @@ class DataManager:
             # Else,
             choice = int(msg.content)                                                             # Turn message into an int
             if 1 <= choice <= len(similar_coins):                                                 # Check message's validity
-                ans = similar_coins[choice - 1][0]                                                # Return corresponding coin data
-                return self.gecko_df.loc[self.gecko_df['id'].str.lower() == ans, 'id'].iloc[0]  # Return the id that corresponds with that coin name
+                row = similar_coins[choice - 1][2]                                                # Return corresponding coin data
+                return registry.ids[row]                                                     # Return the id that corresponds with that coin id
             else:
                 # Create an embed for user bad input
                 embed = discord.Embed(
@@ -0,0 +1,107 @@
+# Imports
+from decimal import *
+from functools import lru_cache
+
+# Largest float handled by the fast paths (well under the point where float spacing gets anywhere near a cent, so float rounding can't drift from Decimal rounding)
+FAST_PATH_MAX = 1e12
+
+# Largest int that converts to float exactly (int formatting with 'f' goes through float)
+EXACT_INT_MAX = 2 ** 53
+
+# Helper function for price display (to display prices below $0.01, instead of just `0.00`); the original Decimal version, used for anything the fast paths don't cover
+def format_crypto_price_exact(price) -> str:
+    # Check if the price exists
+    if price is None:
+        return "0"
+
+    # Convert the price (from the CMC API call) to a Decimal object (instead of float. Gives us more precision instead of worrying about float rounding conventions)
+    price = Decimal(str(price))
+
+    # If price is >= $1.00, format with two decimal places and return (ezpz)
+    if price >= Decimal('1.00'):
+        return f"${price:,.2f}"
+    # If price is between $1.00 and $0.01, show 4 decimal places exactly (ezpz)
+    elif Decimal('1.00') > price >= Decimal('0.01'):
+        # Format the price exactly as-is; cut off at 4 decimals
+        formatted_price = f"${price.quantize(Decimal('0.0001'), rounding=ROUND_DOWN)}"
+        # Return the price with no trailing zeros
+        return formatted_price.rstrip('0')
+    # If less than $0.01,
+    else:
+        # Define the number of digits to cut off the number at (to avoid overflow or Discord message errors) (I use 15 arbitrarily; beginning-string slicing is non-inclusive)
+        MAX_DIGITS = 16
+
+        # Convert the price to string (within the fixed-point context 'f') for further breakdown/analysis
+        raw_price_str = format(price, 'f')
+
+        # Extract the decimal portion out of the string (because we only care about the decimal here, being that the price is less than 1 cent; a whole zero like `0` has none)
+        raw_decimal_str = raw_price_str.partition('.')[2]
+
+        # Create variable to store the first non-zero index in our decimal point (beyond the hundreths place obv)
+        # Set to None as we do not know the first non-zero index yet
+        non_zero_index = None
+
+        # Use a for loop (with enumerate) to iterate over to 'digits' (characters) in our string to see if we can find a non-zero index in our first 15 indices
+        for i, digit in enumerate(raw_decimal_str[:MAX_DIGITS], 1):
+            # Check if digit is non-zero (remember, we are enumerating over a string!)
+            if digit != '0':
+                # Store this non-zero index
+                non_zero_index = i
+                # Exit loop; we got what we need
+                break
+
+        # If the number cannot be formatted, return None and handle the issue in the calling function
+        if non_zero_index == None:
+            return "0"
+
+        # Otherwise,
+        else:
+            # Choose the number's display cutoff (using non_zero_index + 2 for context beyond just the one decimal place found; MAX_DIGITS for max-length arbitrary cutoff)
+            displayed_sigfigs = min(non_zero_index + 2, MAX_DIGITS)
+            # Format as string
+            formatted_number = f"${price:.{displayed_sigfigs}f}"
+            # And return
+            return formatted_number
+
+# Helper function for price display, shared by every cog (memoized, with fast paths that skip Decimal for the common ranges; output is byte-identical to format_crypto_price_exact)
+@lru_cache(maxsize=4096, typed=True)
+def format_crypto_price(price) -> str:
+    # Plain ints >= $1.00 (format straight away; every int this size converts to float exactly)
+    if type(price) is int and 1 <= price < EXACT_INT_MAX:
+        return f"${price:,.2f}"
+
+    # Only floats get the other fast paths (their repr is exactly the string Decimal would be built from)
+    if type(price) is float:
+        # If price is >= $1.00, float rounding to 2 places matches Decimal rounding of the repr, unless the repr sits exactly on a half-cent tie (Decimal breaks those to even)
+        if 1.0 <= price < FAST_PATH_MAX:
+            decimals = repr(price).partition('.')[2]
+            if decimals[2:] != '5':
+                return f"${price:,.2f}"
+
+        # If price is between $1.00 and $0.01, truncating the repr's digits to 4 places is exactly what the ROUND_DOWN quantize does
+        elif 0.01 <= price < 1.0:
+            decimals = repr(price).partition('.')[2]
+            return f"$0.{decimals[:4].ljust(4, '0')}".rstrip('0')
+
+    # Everything else (sub-cent prices, ties, huge values, strings, None) goes the original Decimal way
+    return format_crypto_price_exact(price)
+
+# Function to format a whole list of prices at once (e.g. every row of a topcap embed)
+def format_prices(prices) -> list:
+    return [format_crypto_price(price) for price in prices]
+
+# Function to format a whole list of market caps at once (whole dollars with thousands separators; upstream sends null for some coins)
+def format_market_caps(market_caps) -> list:
+    return [f"${market_cap:,.0f}" if market_cap is not None else "N/A" for market_cap in market_caps]
+
+# Function to show a duration in seconds as e.g. `3h 12m`
+def format_duration(seconds) -> str:
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m {seconds}s"
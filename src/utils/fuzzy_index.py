@@ -0,0 +1,125 @@
+# Imports
+import sys
+from array import array
+from collections import Counter
+
+# Create class
+class FuzzyIndex:
+
+    # Init method (preprocess every choice once, instead of on every typo)
+    def __init__(self, choices, max_candidates=128, max_posting=2000, score_cutoff=60):
+        # Lowercased (interned) choices, lined up with the registry's row numbers (position i is row i)
+        self.choices = [sys.intern(choice.lower()) if isinstance(choice, str) else '' for choice in choices]
+
+        # How many prefiltered rows get handed to rapidfuzz, how common a trigram can be before it's useless for narrowing things down, and the "good match" score
+        self.max_candidates = max_candidates
+        self.max_posting = max_posting
+        self.score_cutoff = score_cutoff
+
+        # Trigram -> every row containing it (the cheap prefilter; rows are packed into 4-byte unsigned int arrays instead of lists of int objects)
+        postings = {}
+        for row, choice in enumerate(self.choices):
+            for trigram in self.trigrams(choice):
+                postings.setdefault(trigram, []).append(row)
+        self.trigram_index = {trigram: array('I', rows) for trigram, rows in postings.items()}
+
+    # Function to split a string into its (word-boundary padded) trigrams
+    @staticmethod
+    def trigrams(text):
+        padded = f" {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    # Function to narrow the whole registry down to the rows sharing the most trigrams with the query
+    def candidates(self, query, include_common=False):
+        counts = Counter()
+        common = []
+
+        # Count shared trigrams per row (trigrams in almost every coin are kept aside; they don't narrow anything down)
+        for trigram in self.trigrams(query):
+            posting = self.trigram_index.get(trigram)
+            if not posting:
+                continue
+            if len(posting) > self.max_posting:
+                common.append(posting)
+            else:
+                counts.update(posting)
+
+        # Only count the common trigrams if they're all the query has
+        if not counts:
+            for posting in common:
+                counts.update(posting)
+            common = []
+
+        rows = [row for row, _ in counts.most_common(self.max_candidates)]
+
+        # If asked, pad the rows out from the common trigrams (rapidfuzz does the real ranking anyway, so there's no need to count them)
+        if include_common:
+            seen = set(rows)
+            for posting in sorted(common, key=len):
+                for row in posting:
+                    if len(rows) >= self.max_candidates:
+                        return rows
+                    if row not in seen:
+                        seen.add(row)
+                        rows.append(row)
+
+        return rows
+
+    # Function to get the closest choices to the query (returns a list of (choice, score, row) tuples, best first)
+    def search(self, query, limit=3):
+        from rapidfuzz import process # Imported on first search, so building an index (and the bot's startup) doesn't pay for it
+        query = query.lower()
+
+        # Fast path: score only the rows sharing rare trigrams with the query, skipping anything below the cutoff
+        rows = self.candidates(query)
+        if rows:
+            results = process.extract(query, [self.choices[row] for row in rows], limit=limit, score_cutoff=self.score_cutoff)
+            if len(results) == limit:
+                return [(choice, score, rows[idx]) for choice, score, idx in results]
+
+        # Not enough good matches, so widen the net to the common trigrams too and keep the best of whatever is there
+        rows = self.candidates(query, include_common=True)
+
+        # Nothing shares a single trigram with the query, so fall back to scoring everything (a cutoff of 1 keeps out cleared rows, whose empty text scores 0
+        # against anything, so a hopeless query gets no suggestions rather than coins that aren't there)
+        if not rows:
+            return process.extract(query, self.choices, limit=limit, score_cutoff=1)
+
+        # Map each candidate position straight back to its registry row
+        results = process.extract(query, [self.choices[row] for row in rows], limit=limit, score_cutoff=1)
+        return [(choice, score, rows[idx]) for choice, score, idx in results]
+
+    # Function to get a copy of the index with some rows changed (changes maps row -> new text, or None to clear the row; only the touched trigram arrays are copied, so this index is left alone)
+    def updated(self, changes):
+        new = object.__new__(FuzzyIndex)
+        new.max_candidates, new.max_posting, new.score_cutoff = self.max_candidates, self.max_posting, self.score_cutoff
+        new.choices = list(self.choices)
+        new.trigram_index = dict(self.trigram_index)
+
+        # Trigram -> its copied row array (each array is copied at most once)
+        touched = {}
+        def posting(trigram):
+            if trigram not in touched:
+                touched[trigram] = array('I', new.trigram_index.get(trigram, ()))
+            return touched[trigram]
+
+        for row, text in changes.items():
+            # Rows past the end are brand new coins
+            if row >= len(new.choices):
+                new.choices.extend([''] * (row + 1 - len(new.choices)))
+
+            # Take the old text's trigrams out, then put the new text's in
+            for trigram in self.trigrams(new.choices[row]) if new.choices[row] else ():
+                posting(trigram).remove(row)
+            new.choices[row] = sys.intern(text.lower()) if isinstance(text, str) else ''
+            for trigram in self.trigrams(new.choices[row]) if new.choices[row] else ():
+                posting(trigram).append(row)
+
+        # Swap the copied arrays in (dropping any that ended up empty)
+        for trigram, rows in touched.items():
+            if rows:
+                new.trigram_index[trigram] = rows
+            else:
+                new.trigram_index.pop(trigram, None)
+
+        return new
@@ -0,0 +1,173 @@
+# Imports
+import asyncio
+import json
+import random
+import time
+import aiohttp
+from utils.metrics import metrics
+
+# Live feed metrics (copied over from the feed's counters whenever metrics are read)
+LIVE_FEED_MESSAGES = metrics.counter('live_feed_messages_total', 'Messages received from the live ticker feed, by result', ('result',))
+LIVE_FEED_CONNECTS = metrics.counter('live_feed_connects_total', 'Connection attempts to the live ticker feed, by result', ('result',))
+LIVE_FEED_CONNECTED = metrics.gauge('live_feed_connected', '1 while the live ticker feed is connected')
+LIVE_FEED_COINS = metrics.gauge('live_feed_coins', 'Coins with a fresh price from the live ticker feed')
+LIVE_FEED_ANSWERS = metrics.counter('live_feed_answers_total', 'Price lookups answered from the live ticker feed, by result', ('result',))
+
+# The coins we stream by default (CoinGecko id -> exchange pair; the most asked about coins, all quoted in USDT, which we show as USD)
+DEFAULT_PAIRS = {
+    'bitcoin': 'BTCUSDT', 'ethereum': 'ETHUSDT', 'binancecoin': 'BNBUSDT', 'solana': 'SOLUSDT', 'ripple': 'XRPUSDT', 'dogecoin': 'DOGEUSDT',
+    'cardano': 'ADAUSDT', 'tron': 'TRXUSDT', 'avalanche-2': 'AVAXUSDT', 'shiba-inu': 'SHIBUSDT', 'chainlink': 'LINKUSDT', 'polkadot': 'DOTUSDT',
+    'bitcoin-cash': 'BCHUSDT', 'litecoin': 'LTCUSDT', 'near': 'NEARUSDT', 'uniswap': 'UNIUSDT',
+}
+
+# Function to read a pairs setting like `bitcoin=BTCUSDT,ethereum=ETHUSDT` (empty or unset gives the defaults)
+def parse_pairs(text) -> dict:
+    if not text:
+        return dict(DEFAULT_PAIRS)
+    pairs = {}
+    for item in text.split(','):
+        coin_id, _, symbol = item.partition('=')
+        if coin_id.strip() and symbol.strip():
+            pairs[coin_id.strip().lower()] = symbol.strip().upper()
+    return pairs
+
+# Create class (the newest streamed price of each coin; commands read it before going anywhere near the api, and anything older than `max_age` is ignored,
+# so a dead feed quietly falls back to the normal quotes)
+class LivePrices:
+
+    # Init method (set important variables; every price is also recorded in `history` if given, so the sampler never has to poll these coins)
+    def __init__(self, max_age=10.0, history=None):
+        self.max_age = max_age
+        self.history = history
+        self.prices = {}                 # coin id -> (price, time.monotonic() it arrived)
+        self.updates = 0
+
+        # Simple counters for hit ratio logging
+        self.hits = 0
+        self.misses = 0
+
+    # Function to store one streamed price
+    def update(self, coin_id, price):
+        self.prices[coin_id] = (price, time.monotonic())
+        self.updates += 1
+        if self.history is not None:
+            self.history.record(coin_id, price)
+
+    # Function to get a coin's streamed price and its age in seconds (None if the feed hasn't got a fresh one for it)
+    def get(self, coin_id):
+        entry = self.prices.get(coin_id)
+        if entry is not None:
+            age = time.monotonic() - entry[1]
+            if age <= self.max_age:
+                self.hits += 1
+                return entry[0], age
+        self.misses += 1
+        return None
+
+    # Function to count the coins with a fresh price
+    def fresh(self) -> int:
+        now = time.monotonic()
+        return sum(1 for _, received in self.prices.values() if now - received <= self.max_age)
+
+# Create class (keeps one WebSocket open to an exchange's ticker stream and pours every tick into a LivePrices table; Binance-style 24h mini tickers,
+# either one per message, wrapped in a combined stream's {"stream", "data"} envelope, or a list of them. Reconnects with backoff whenever it drops)
+class LiveFeed:
+
+    # Init method (set important variables; `url` may contain `{streams}`, which gets the pairs' stream names, e.g. wss://stream.binance.com:9443/stream?streams={streams})
+    def __init__(self, url, pairs, prices, name='Binance', backoff=1.0, max_backoff=60.0, heartbeat=20.0):
+        self.url = url.format(streams='/'.join(f"{symbol.lower()}@miniTicker" for symbol in pairs.values()))
+        self.coins = {symbol.upper(): coin_id for coin_id, symbol in pairs.items()} # Exchange pair -> CoinGecko id
+        self.prices = prices
+        self.name = name
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.heartbeat = heartbeat
+        self.task = None
+        self.connected = False
+
+        # Simple counters for logging
+        self.messages = 0
+        self.ticks = 0
+        self.bad_messages = 0
+        self.connects = 0
+        self.connect_failures = 0
+
+    # Function to start streaming in the background
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    # Function to stop streaming
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    # Function to stay connected for good (a long-lived socket gets its own session, since the api client's has a total timeout on every request)
+    async def run(self):
+        attempt = 0
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+                        self.connects += 1
+                        self.connected = True
+                        print(f"Live feed connected to {self.name}.")
+
+                        # Handle each message as it arrives (nothing is buffered up, so a slow moment never leaves a backlog of old prices to chew through)
+                        async for message in ws:
+                            if message.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                                self.ingest(message.data)
+                                attempt = 0 # Only a connection that actually delivered something resets the backoff
+                            elif message.type == aiohttp.WSMsgType.ERROR:
+                                break
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    self.connect_failures += 1
+                    print(f"Live feed connection to {self.name} failed: {e!r}")
+                finally:
+                    self.connected = False
+
+                # Wait a bit longer after each failure in a row (with some jitter, so a cluster doesn't reconnect in lockstep)
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(1, 1.25)
+                attempt += 1
+                print(f"Live feed from {self.name} disconnected, reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    # Function to take in one raw message (only the pair and last price of tickers we follow are looked at; messages that aren't JSON are counted and skipped, tickers without a usable price are just skipped)
+    def ingest(self, raw):
+        self.messages += 1
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            self.bad_messages += 1
+            return
+        data = message.get('data', message) if isinstance(message, dict) else message
+        for ticker in (data if isinstance(data, list) else (data,)):
+            if not isinstance(ticker, dict):
+                continue
+            coin_id = self.coins.get(ticker.get('s'))
+            if coin_id is None:
+                continue
+            try:
+                price = float(ticker['c'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 < price < float('inf'):
+                continue
+            self.prices.update(coin_id, price)
+            self.ticks += 1
+
+    # Function to copy the feed counters into the metrics registry (registered as a collector by the bot)
+    def collect_metrics(self, metrics):
+        LIVE_FEED_MESSAGES.labels('ok').value = self.messages - self.bad_messages
+        LIVE_FEED_MESSAGES.labels('bad').value = self.bad_messages
+        LIVE_FEED_CONNECTS.labels('ok').value = self.connects
+        LIVE_FEED_CONNECTS.labels('failed').value = self.connect_failures
+        LIVE_FEED_CONNECTED.labels().set(1 if self.connected else 0)
+        LIVE_FEED_COINS.labels().set(self.prices.fresh())
+        LIVE_FEED_ANSWERS.labels('hit').value = self.prices.hits
+        LIVE_FEED_ANSWERS.labels('miss').value = self.prices.misses
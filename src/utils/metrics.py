@@ -0,0 +1,218 @@
+# Imports
+import time
+from bisect import bisect_left
+
+# Default latency buckets in seconds (upper bounds; covers sub-millisecond index lookups up to slow upstream calls)
+LATENCY_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Create class (a number that only goes up)
+class Counter:
+    __slots__ = ('value',)
+
+    # Init method (set important variables)
+    def __init__(self):
+        self.value = 0
+
+    # Function to count something
+    def inc(self, amount=1):
+        self.value += amount
+
+# Create class (a number that goes up and down, e.g. requests in flight)
+class Gauge:
+    __slots__ = ('value',)
+
+    # Init method (set important variables)
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+# Create class (times a block of code into a histogram: `with histogram.time(): ...`)
+class Timer:
+    __slots__ = ('histogram', 'start')
+
+    # Init method (set important variables)
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+# Create class (fixed-bucket histogram; observing is one bisect and three additions, so it's cheap enough for every lookup)
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    # Init method (`buckets` are sorted upper bounds; anything bigger lands in the implicit +Inf bucket)
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    # Function to record one value
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    # Function to time a block of code
+    def time(self):
+        return Timer(self)
+
+    # Function to estimate a quantile (0-1) from the buckets (linear within the bucket it falls in; None if nothing was recorded)
+    def quantile(self, q):
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (target - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+# Create class (one named metric and its children, one per combination of label values)
+class MetricFamily:
+
+    # Init method (kind is 'counter', 'gauge' or 'histogram')
+    def __init__(self, name, help_text, kind, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self.buckets = buckets
+        self.children = {}
+
+    # Function to get the child for some label values (made on first use; hot paths can hold on to the child instead of looking it up every time)
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}, got {values}")
+            if self.kind == 'counter':
+                child = Counter()
+            elif self.kind == 'gauge':
+                child = Gauge()
+            else:
+                child = Histogram(self.buckets)
+            self.children[values] = child
+        return child
+
+# Create class
+class Metrics:
+
+    # Init method (set important variables)
+    def __init__(self):
+        self.families = {}
+        self.collectors = []
+        self.started = time.time()
+
+    # Function to get (or make) a metric family
+    def family(self, name, help_text, kind, label_names=(), buckets=LATENCY_BUCKETS):
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = MetricFamily(name, help_text, kind, label_names, buckets)
+        elif family.kind != kind:
+            raise ValueError(f"{name} is already registered as a {family.kind}")
+        return family
+
+    def counter(self, name, help_text, label_names=()):
+        return self.family(name, help_text, 'counter', label_names)
+
+    def gauge(self, name, help_text, label_names=()):
+        return self.family(name, help_text, 'gauge', label_names)
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        return self.family(name, help_text, 'histogram', label_names, buckets)
+
+    # Function to register a callback that refreshes gauges right before they're read (for stats other classes already keep, e.g. the quote cache counters)
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    # Function to take out a collector again (e.g. when the bot shuts down)
+    def remove_collector(self, collector):
+        if collector in self.collectors:
+            self.collectors.remove(collector)
+
+    # Function to run every collector (a broken collector just gets skipped; stats should never take the bot down)
+    def collect(self):
+        for collector in list(self.collectors):
+            try:
+                collector(self)
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+
+    # Function to get every metric as plain data (name -> list of (labels dict, value); histograms give count/sum/p50/p95/p99)
+    def snapshot(self) -> dict:
+        self.collect()
+        data = {}
+        for name, family in self.families.items():
+            rows = []
+            for values, child in family.children.items():
+                labels = dict(zip(family.label_names, values))
+                if family.kind == 'histogram':
+                    rows.append((labels, {'count': child.count, 'sum': child.sum, 'p50': child.quantile(0.5), 'p95': child.quantile(0.95), 'p99': child.quantile(0.99)}))
+                else:
+                    rows.append((labels, child.value))
+            data[name] = rows
+        return data
+
+    # Function to render every metric in the Prometheus text format
+    def render_prometheus(self) -> str:
+        self.collect()
+        lines = []
+        for name, family in self.families.items():
+            lines.append(f"# HELP {name} {family.help_text}")
+            lines.append(f"# TYPE {name} {family.kind}")
+            for values, child in family.children.items():
+                labels = [f'{label}="{escape_label(value)}"' for label, value in zip(family.label_names, values)]
+                if family.kind == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(family.buckets + (float('inf'),), child.counts):
+                        cumulative += count
+                        le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                        lines.append(f"{name}_bucket{{{','.join(labels + [le])}}} {cumulative}")
+                    suffix = f"{{{','.join(labels)}}}" if labels else ''
+                    lines.append(f"{name}_sum{suffix} {child.sum}")
+                    lines.append(f"{name}_count{suffix} {child.count}")
+                else:
+                    suffix = f"{{{','.join(labels)}}}" if labels else ''
+                    lines.append(f"{name}{suffix} {child.value}")
+        lines.append("# HELP process_uptime_seconds Seconds since the bot started")
+        lines.append("# TYPE process_uptime_seconds gauge")
+        lines.append(f"process_uptime_seconds {time.time() - self.started}")
+        return '\n'.join(lines) + '\n'
+
+# Function to escape a label value for the Prometheus text format
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Function to serve the Prometheus text on http://host:port/metrics (returns the aiohttp runner, so the caller can clean it up on shutdown)
+async def start_metrics_server(metrics, host='127.0.0.1', port=9108):
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=metrics.render_prometheus(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+# The process-wide metrics registry every module records into
+metrics = Metrics()
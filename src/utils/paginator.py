@@ -0,0 +1,51 @@
+# Imports
+import discord
+
+# Create class (Previous/Next buttons for answers too long for one embed; only the person who ran the command can turn the pages)
+class EmbedPaginator(discord.ui.View):
+
+    # Init method (`make_page(page)` builds the embed for a 0-based page number, so pages are only built when someone looks at them)
+    def __init__(self, author_id, pages, make_page, timeout=120):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.pages = pages
+        self.make_page = make_page
+        self.page = 0
+        self.message = None              # Set by the caller after sending, so the buttons can be disabled on timeout
+        self.update_buttons()
+
+    # Function to grey out the buttons that can't go anywhere
+    def update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    # Only let the command's author flip pages (everyone else gets a quiet "no")
+    async def interaction_check(self, interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Only the person who ran this command can change pages.", ephemeral=True)
+            return False
+        return True
+
+    # Function to show another page
+    async def show_page(self, interaction, page):
+        self.page = max(0, min(self.pages - 1, page))
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.make_page(self.page), view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        await self.show_page(interaction, self.page - 1)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        await self.show_page(interaction, self.page + 1)
+
+    # Disable the buttons once nobody can use them anymore
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
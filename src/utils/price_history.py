@@ -0,0 +1,247 @@
+# Imports
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from utils.metrics import metrics
+
+# Price history metrics (copied over from the store whenever metrics are read)
+PRICE_HISTORY_COINS = metrics.gauge('price_history_coins', 'Coins with a price history row')
+PRICE_HISTORY_SAMPLES = metrics.counter('price_history_samples_total', 'Quotes recorded into the price history')
+PRICE_HISTORY_BYTES = metrics.gauge('price_history_bytes', 'Fixed size of the price history buffers')
+
+# Window units users can type (`30m`, `1h`, `7d`, ...)
+WINDOW_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+WINDOW_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)\s*([smhdw])$')
+
+# Function to turn a window like `1h`, `30m` or `7d` into seconds (None if it isn't one)
+def parse_window(text):
+    match = WINDOW_PATTERN.match(text.strip().lower())
+    if match is None:
+        return None
+    seconds = float(match.group(1)) * WINDOW_UNITS[match.group(2)]
+    return seconds if seconds > 0 else None
+
+# Create class (fixed-size ring buffer of (time, price) samples per coin, in one NumPy block so window maths is vectorized and memory never grows;
+# optionally memory-mapped to a file, so the history survives restarts and lives in the page cache instead of the heap)
+class PriceHistory:
+
+    # Init method (`slots` samples per coin, at most one per `resolution` seconds, so each coin covers slots * resolution seconds in slots * 16 bytes;
+    # the `max_coins` least recently recorded coins are kept; `path` is the .npy file to map, or None to keep it in memory)
+    def __init__(self, slots=1440, max_coins=500, resolution=60.0, path=None):
+        self.slots = slots
+        self.max_coins = max_coins
+        self.resolution = resolution
+        self.path = path
+        self.data = None                 # (max_coins, 2, slots) float64: [row, 0] sample times (unix seconds, NaN for empty), [row, 1] prices; made by open()
+        self.rows = OrderedDict()        # coin id -> row, least recently recorded first
+        self.free = list(range(max_coins - 1, -1, -1)) # Rows nobody has yet (popped from the end)
+        self.next = [0] * max_coins      # row -> slot the next sample goes in
+        self.bucket_start = [0.0] * max_coins # row -> time the newest slot's bucket started (later samples in the same bucket replace it)
+        self.last_at = [0.0] * max_coins # row -> time of the newest sample
+        self.wanted = OrderedDict()      # coin id -> monotonic time someone last asked about it, oldest first (the background sampler keeps these going)
+        self.rows_changed = False        # Whether the coin -> row map needs saving next to the mapped file
+        self.recorded = 0
+
+    # Seconds of history each coin can hold
+    @property
+    def span(self) -> float:
+        return self.slots * self.resolution
+
+    # Function to allocate the buffers, or map them from the file and pick up where the last run left off (blocking; run it off the event loop)
+    def open(self):
+        import numpy as np # Imported on first use, so NumPy stays out of the bot's startup
+        shape = (self.max_coins, 2, self.slots)
+        if not self.path:
+            self.data = np.full(shape, np.nan)
+            return
+
+        # Reuse the file if it has the same layout and we know whose rows are whose, otherwise start it over
+        try:
+            data = np.load(self.path, mmap_mode='r+')
+            with open(f"{self.path}.json") as file:
+                coins = json.load(file)['coins']
+            if data.shape != shape or data.dtype != np.float64:
+                raise ValueError(f"layout changed from {data.shape}")
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(self.path):
+                print(f"Starting a new price history ({e})")
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            data = np.lib.format.open_memmap(self.path, mode='w+', dtype=np.float64, shape=shape)
+            data[:] = np.nan
+            coins = {}
+
+        # Work out each row's newest sample straight from the data (the map is only saved now and then, so rows it doesn't know about are cleared)
+        self.data = data
+        known = set()
+        newest = {}
+        for coin_id, row in coins.items():
+            if 0 <= row < self.max_coins and row not in known and not np.isnan(data[row, 0]).all():
+                known.add(row)
+                last = int(np.nanargmax(data[row, 0]))
+                self.next[row] = (last + 1) % self.slots
+                self.last_at[row] = self.bucket_start[row] = float(data[row, 0, last])
+                newest[coin_id] = (self.last_at[row], row)
+        for row in range(self.max_coins):
+            if row not in known:
+                data[row] = np.nan
+        self.free = [row for row in range(self.max_coins - 1, -1, -1) if row not in known]
+        self.rows = OrderedDict((coin_id, row) for coin_id, (_, row) in sorted(newest.items(), key=lambda item: item[1][0]))
+        print(f"Loaded price history for {len(self.rows)} coins.")
+
+    # Function to get a coin's row, taking over the least recently recorded coin's row if every row is in use
+    def assign(self, coin_id) -> int:
+        if self.free:
+            row = self.free.pop()
+        else:
+            _, row = self.rows.popitem(last=False)
+            self.data[row] = math.nan
+        self.rows[coin_id] = row
+        self.next[row], self.bucket_start[row], self.last_at[row] = 0, 0.0, 0.0
+        self.rows_changed = True
+        return row
+
+    # Function to record a price (`at` is unix seconds, now if not given; samples inside the newest slot's bucket replace it, so the newest price is always kept)
+    def record(self, coin_id, price, at=None):
+        if self.data is None or price is None:
+            return
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return
+        if not math.isfinite(price):
+            return
+        at = time.time() if at is None else at
+
+        # Find the coin's row (and mark it recently recorded)
+        row = self.rows.get(coin_id)
+        if row is None:
+            row = self.assign(coin_id)
+        else:
+            self.rows.move_to_end(coin_id)
+
+        # Anything older than what we already have (e.g. a shared quote fetched before ours) is no news
+        if at < self.last_at[row]:
+            return
+
+        # Same bucket as the newest slot: overwrite it; otherwise move on to the next slot (overwriting the oldest once the ring is full)
+        slot = self.next[row]
+        if self.last_at[row] and at - self.bucket_start[row] < self.resolution:
+            slot = (slot - 1) % self.slots
+        else:
+            self.next[row] = (slot + 1) % self.slots
+            self.bucket_start[row] = at
+        self.data[row, 0, slot] = at
+        self.data[row, 1, slot] = price
+        self.last_at[row] = at
+        self.recorded += 1
+
+    # Function to get a coin's newest sample (returns (time, price), or None if we have nothing on it)
+    def last(self, coin_id):
+        row = self.rows.get(coin_id)
+        if row is None or self.data is None:
+            return None
+        slot = (self.next[row] - 1) % self.slots
+        return float(self.data[row, 0, slot]), float(self.data[row, 1, slot])
+
+    # Function to get a coin's samples oldest first (returns (times, prices) arrays, empty if we have nothing on it; with `since`, only from the newest sample at or before it on)
+    def series(self, coin_id, since=None):
+        import numpy as np
+        row = self.rows.get(coin_id)
+        if row is None or self.data is None:
+            return np.empty(0), np.empty(0)
+
+        # Unroll the ring starting at its oldest slot, and drop the slots that were never filled
+        order = (np.arange(self.slots) + self.next[row]) % self.slots
+        times, prices = self.data[row, 0, order], self.data[row, 1, order]
+        filled = ~np.isnan(times)
+        times, prices = times[filled], prices[filled]
+        if since is not None:
+            start = max(int(np.searchsorted(times, since, side='right')) - 1, 0)
+            times, prices = times[start:], prices[start:]
+        return times, prices
+
+    # Function to sum up a coin's last `seconds` (returns None if we have nothing on it; otherwise a dict with the price at the start of the window and now,
+    # the change between them, the high and low with their times, how many samples went in, and whether the history actually reaches back that far)
+    def window(self, coin_id, seconds, now=None):
+        import numpy as np
+        times, prices = self.series(coin_id)
+        if not len(times):
+            return None
+        now = time.time() if now is None else now
+        cutoff = now - seconds
+
+        # The window starts from the newest sample at or before the cutoff (if the history goes back that far, else from the oldest we have)
+        before = int(np.searchsorted(times, cutoff, side='right')) - 1
+        start = max(before, 0)
+
+        # High and low over the samples inside the window (the starting sample counts too if nothing else is in it)
+        inside = times >= cutoff
+        if not inside.any():
+            inside[start] = True
+        window_times, window_prices = times[inside], prices[inside]
+        high, low = int(np.argmax(window_prices)), int(np.argmin(window_prices))
+
+        start_price, end_price = float(prices[start]), float(prices[-1])
+        return {
+            'start_at': float(times[start]), 'start_price': start_price,
+            'end_at': float(times[-1]), 'end_price': end_price,
+            'change': (end_price - start_price) / start_price if start_price else math.nan,
+            'high': float(window_prices[high]), 'high_at': float(window_times[high]),
+            'low': float(window_prices[low]), 'low_at': float(window_times[low]),
+            'samples': int(inside.sum()),
+            'covered': before >= 0,
+        }
+
+    # Function to note that someone asked about a coin (the background sampler keeps recording the coins people ask about)
+    def want(self, coin_id):
+        self.wanted[coin_id] = time.monotonic()
+        self.wanted.move_to_end(coin_id)
+        while len(self.wanted) > self.max_coins:
+            self.wanted.popitem(last=False)
+
+    # Function to get the coins someone asked about in the last `max_age` seconds, most recent first (at most `limit`)
+    def popular(self, limit, max_age) -> list:
+        cutoff = time.monotonic() - max_age
+        coins = []
+        for coin_id, asked_at in reversed(self.wanted.items()):
+            if asked_at < cutoff or len(coins) >= limit:
+                break
+            coins.append(coin_id)
+        return coins
+
+    # Function to pick out the coins whose newest sample is more than a bucket old (or that have none), i.e. the ones a background sample would add to
+    def stale(self, coin_ids, now=None) -> list:
+        now = time.time() if now is None else now
+        return [coin_id for coin_id in coin_ids if coin_id not in self.rows or now - self.last_at[self.rows[coin_id]] >= self.resolution]
+
+    # Function to save the coin -> row map next to the mapped file and flush the samples to disk (the map is copied here, the writing happens on a thread)
+    async def flush(self):
+        if self.path and self.data is not None:
+            coins = dict(self.rows) if self.rows_changed else None
+            self.rows_changed = False
+            await asyncio.to_thread(self.write, self.data, coins)
+
+    # Function to write the map (if it changed) and flush the mapped samples (blocking)
+    def write(self, data, coins=None):
+        if coins is not None:
+            temp_path = f"{self.path}.json.tmp"
+            with open(temp_path, 'w') as file:
+                json.dump({'coins': coins}, file)
+            os.replace(temp_path, f"{self.path}.json")
+        data.flush()
+
+    # Function to save everything and let go of the file (on shutdown)
+    def close(self):
+        if self.path and self.data is not None:
+            self.write(self.data, dict(self.rows))
+        self.data = None
+
+    # Function to copy the store's state into the metrics registry (registered as a collector by the bot)
+    def collect_metrics(self, metrics):
+        PRICE_HISTORY_COINS.labels().set(len(self.rows))
+        PRICE_HISTORY_SAMPLES.labels().value = self.recorded
+        PRICE_HISTORY_BYTES.labels().set(self.max_coins * 2 * self.slots * 8)
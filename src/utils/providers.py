@@ -0,0 +1,280 @@
+# Imports
+import asyncio
+import math
+import time
+from collections import deque
+from utils.api_client import UpstreamError
+from utils.coin_xref import CoinCrossReference
+from utils.metrics import metrics
+from utils.rate_limiter import INTERACTIVE
+
+# Provider metrics (the hedge thresholds are copied over whenever metrics are read)
+PROVIDER_HEDGE_SECONDS = metrics.gauge('provider_hedge_seconds', 'Rolling p95 latency per provider endpoint (how long a primary request gets before it is hedged; -1 until there are enough samples)', ('provider', 'endpoint'))
+PROVIDER_HEDGES = metrics.counter('provider_hedges_total', 'Backup requests sent because the primary was slower than its p95, by who answered first', ('endpoint', 'winner'))
+PROVIDER_FAILOVERS = metrics.counter('provider_failovers_total', 'Requests that went to the backup provider because the primary failed, by result', ('endpoint', 'result'))
+PROVIDER_ANSWERS = metrics.counter('provider_answers_total', 'Requests answered, by endpoint and the provider that answered', ('endpoint', 'provider'))
+
+# Display names for the footers
+PROVIDER_NAMES = {'gecko': 'CoinGecko', 'cmc': 'CoinMarketCap'}
+
+# Function to name whoever a set of quotes came from for a footer (quotes from CMC say so; everything else is CoinGecko's)
+def quote_source(*quotes) -> str:
+    return ' & '.join(sorted({quote.get('source', 'CoinGecko') for quote in quotes if quote})) or 'CoinGecko'
+
+# Create class (the last `size` latencies of one provider endpoint; its p95 is how long a request there usually takes at worst)
+class LatencyWindow:
+
+    # Init method (set important variables)
+    def __init__(self, size=200):
+        self.samples = deque(maxlen=size)
+        self.sorted = None               # Sorted copy of the samples (made on the first quantile() after a change)
+
+    def __len__(self):
+        return len(self.samples)
+
+    # Function to record one latency in seconds
+    def observe(self, seconds):
+        self.samples.append(seconds)
+        self.sorted = None
+
+    # Function to get a quantile (0-1) of the window (nearest rank; None if it's empty)
+    def quantile(self, q):
+        if not self.samples:
+            return None
+        if self.sorted is None:
+            self.sorted = sorted(self.samples)
+        return self.sorted[min(len(self.sorted) - 1, max(0, math.ceil(q * len(self.sorted)) - 1))]
+
+# Create class (CoinGecko's quote and listing endpoints; answers come back in the shapes the cogs already use)
+class GeckoProvider:
+    name = 'gecko'
+
+    # Init method (set important variables)
+    def __init__(self, api_client):
+        self.api_client = api_client
+
+    # Function to fetch /coins/markets rows for many ids in one call (returns a dict of id -> row)
+    async def markets(self, coin_ids, priority=INTERACTIVE):
+        # Parameters for the search to query the markets endpoint
+        parameters = {
+            'vs_currency': 'usd',
+            'ids': ','.join(coin_ids),
+            'per_page': len(coin_ids),
+            'precision': '15',
+        }
+
+        data = await self.api_client.gecko_json('/coins/markets', params=parameters, priority=priority)
+        return {row['id']: row for row in data or []}
+
+    # Function to fetch /simple/price entries for many ids in one call (returns a dict of id -> entry)
+    async def simple(self, coin_ids, priority=INTERACTIVE):
+        # Parameters for the search to query the simple/price endpoint
+        parameters = {
+            'vs_currencies': 'usd',
+            'ids': ','.join(coin_ids),
+            'include_24hr_vol': 'true',
+        }
+
+        data = await self.api_client.gecko_json('/simple/price', params=parameters, priority=priority)
+        return data or {}
+
+    # Function to fetch the top `size` coins by market cap (/coins/markets pages of 250, fetched together; returns listing dicts in rank order)
+    async def listings(self, size, priority=INTERACTIVE):
+        pages = await asyncio.gather(*(self.api_client.gecko_json('/coins/markets', params={'vs_currency': 'usd', 'order': 'market_cap_desc', 'per_page': 250, 'page': page}, priority=priority)
+                                       for page in range(1, math.ceil(size / 250) + 1)))
+        rows = [row for page in pages for row in page or []][:size]
+        return [{'rank': row.get('market_cap_rank') or rank, 'name': row.get('name'), 'symbol': (row.get('symbol') or '').upper(), 'price': row.get('current_price'), 'market_cap': row.get('market_cap')}
+                for rank, row in enumerate(rows, 1)]
+
+# Create class (CoinMarketCap's quote and listing endpoints, asked about CoinGecko ids through the cross-reference and answering in CoinGecko's shapes)
+class CMCProvider:
+    name = 'cmc'
+
+    # Init method (set important variables)
+    def __init__(self, api_client, cross_reference):
+        self.api_client = api_client
+        self.cross_reference = cross_reference
+
+    # Function to check whether every one of these CoinGecko ids can be asked about here
+    def covers(self, coin_ids) -> bool:
+        return self.cross_reference.covers(coin_ids)
+
+    # Function to fetch /v2/cryptocurrency/quotes/latest for many CoinGecko ids in one call (returns a dict of CoinGecko id -> CMC coin)
+    async def quotes(self, coin_ids, priority=INTERACTIVE):
+        cmc_ids = {self.cross_reference.cmc_id(coin_id): coin_id for coin_id in coin_ids}
+        cmc_ids.pop(None, None)
+        data = await self.api_client.cmc_json('/v2/cryptocurrency/quotes/latest', params={'id': ','.join(map(str, cmc_ids)), 'convert': 'USD'}, priority=priority)
+
+        # Coins come back keyed by CMC id (as strings; some versions of the endpoint wrap each one in a list)
+        coins = {}
+        for cmc_id, coin in ((data or {}).get('data') or {}).items():
+            if isinstance(coin, list):
+                coin = coin[0] if coin else None
+            coin_id = cmc_ids.get(int(cmc_id)) if str(cmc_id).isdigit() else None
+            if coin_id is not None and coin:
+                coins[coin_id] = coin
+        return coins
+
+    # Function to get CoinGecko-shaped /coins/markets rows for many ids from CMC (returns a dict of id -> row)
+    async def markets(self, coin_ids, priority=INTERACTIVE):
+        rows = {}
+        for coin_id, coin in (await self.quotes(coin_ids, priority)).items():
+            usd = (coin.get('quote') or {}).get('USD') or {}
+            rows[coin_id] = {
+                'id': coin_id, 'symbol': (coin.get('symbol') or '').lower(), 'name': coin.get('name'),
+                'current_price': usd.get('price'), 'market_cap': usd.get('market_cap'), 'market_cap_rank': coin.get('cmc_rank'),
+                'total_volume': usd.get('volume_24h'), 'price_change_percentage_24h': usd.get('percent_change_24h'),
+                'source': PROVIDER_NAMES[self.name],
+            }
+        return rows
+
+    # Function to get CoinGecko-shaped /simple/price entries for many ids from CMC (returns a dict of id -> entry)
+    async def simple(self, coin_ids, priority=INTERACTIVE):
+        entries = {}
+        for coin_id, coin in (await self.quotes(coin_ids, priority)).items():
+            usd = (coin.get('quote') or {}).get('USD') or {}
+            entries[coin_id] = {'usd': usd.get('price'), 'usd_24h_vol': usd.get('volume_24h'), 'source': PROVIDER_NAMES[self.name]}
+        return entries
+
+    # Function to fetch the top `size` coins by market cap in one call (returns listing dicts in rank order)
+    async def listings(self, size, priority=INTERACTIVE):
+        # Fetch cryptocurrencies (sorted by market cap) with the listings endpoint, with their prices in USD
+        parameters = {
+            'start': '1',
+            'limit': size,
+            'convert': 'USD'
+        }
+        data = await self.api_client.cmc_json('/v1/cryptocurrency/listings/latest', params=parameters, priority=priority)
+        return [{'rank': coin['cmc_rank'], 'name': coin['name'], 'symbol': coin['symbol'], 'price': coin['quote']['USD']['price'], 'market_cap': coin['quote']['USD']['market_cap']}
+                for coin in data.get('data') or []]
+
+# Create class (both providers behind one front door: every request goes to its endpoint's usual provider first, and to the other one if the first fails, or
+# (for commands people are waiting on) if it's still going after its usual p95 latency, in which case the first answer wins and the other request is cancelled)
+class Providers:
+
+    # Init method (`window` latencies per endpoint feed the p95; hedging only starts once an endpoint has `min_samples` of them)
+    def __init__(self, api_client, hedging=True, window=200, min_samples=20, quantile=0.95):
+        self.api_client = api_client
+        self.cross_reference = CoinCrossReference() # Filled in by the DataManager once both the registry and the CMC map are loaded
+        self.gecko = GeckoProvider(api_client)
+        self.cmc = CMCProvider(api_client, self.cross_reference)
+        self.hedging = hedging
+        self.window = window
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.latency = {}                # (provider, endpoint) -> LatencyWindow
+
+    # Function to get /coins/markets rows for many CoinGecko ids (CoinGecko first, CMC as the backup if every id is cross-referenced; raises UpstreamError)
+    async def markets(self, coin_ids, priority=INTERACTIVE):
+        backup = (lambda: self.cmc.markets(coin_ids, priority)) if self.cmc.covers(coin_ids) else None
+        _, rows = await self.call('markets', self.gecko, lambda: self.gecko.markets(coin_ids, priority), self.cmc, backup, priority)
+        return rows
+
+    # Function to get /simple/price entries for many CoinGecko ids (same providers as markets(); raises UpstreamError)
+    async def simple(self, coin_ids, priority=INTERACTIVE):
+        backup = (lambda: self.cmc.simple(coin_ids, priority)) if self.cmc.covers(coin_ids) else None
+        _, entries = await self.call('simple', self.gecko, lambda: self.gecko.simple(coin_ids, priority), self.cmc, backup, priority)
+        return entries
+
+    # Function to get the top `size` coins by market cap (CMC first, CoinGecko as the backup; returns (provider display name, listing dicts); raises UpstreamError)
+    async def listings(self, size, priority=INTERACTIVE):
+        provider, rows = await self.call('listings', self.cmc, lambda: self.cmc.listings(size, priority), self.gecko, lambda: self.gecko.listings(size, priority), priority)
+        return PROVIDER_NAMES[provider.name], rows
+
+    # Function to get an endpoint's latency window (made on first use)
+    def latency_window(self, provider, endpoint):
+        window = self.latency.get((provider, endpoint))
+        if window is None:
+            window = self.latency[(provider, endpoint)] = LatencyWindow(self.window)
+        return window
+
+    # Function to get how long a request to an endpoint gets before it's hedged (None if hedging is off or there aren't enough samples to know yet)
+    def hedge_delay(self, provider, endpoint):
+        window = self.latency.get((provider, endpoint))
+        if not self.hedging or window is None or len(window) < self.min_samples:
+            return None
+        return window.quantile(self.quantile)
+
+    # Function to run one provider request and record how long it took (a request cancelled because the other provider won still counts, as a lower bound,
+    # so slow stretches keep showing up in the p95; failed requests don't, since a quick error says nothing about how slow an answer would be)
+    async def timed(self, provider, endpoint, fetch):
+        start = time.perf_counter()
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            self.latency_window(provider, endpoint).observe(time.perf_counter() - start)
+            raise
+        self.latency_window(provider, endpoint).observe(time.perf_counter() - start)
+        return result
+
+    # Function to ask the primary provider and, if it fails or (for interactive requests) runs past its p95, the backup too (returns (provider that answered, result);
+    # `fetch_backup` is None when the backup can't answer this request; raises the primary's UpstreamError if neither provider could answer)
+    async def call(self, endpoint, primary, fetch, backup, fetch_backup, priority):
+        tasks = {asyncio.ensure_future(self.timed(primary.name, endpoint, fetch)): primary}
+        primary_task = next(iter(tasks))
+        hedged = False
+        try:
+            # Give the primary until its p95 before asking the backup as well (not for background work, and not into a backup that already has a queue)
+            delay = self.hedge_delay(primary.name, endpoint) if fetch_backup is not None and priority == INTERACTIVE else None
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.api_client.schedulers[backup.name].stats()['queue_depth'] == 0:
+                    tasks[asyncio.ensure_future(self.timed(backup.name, endpoint, fetch_backup))] = backup
+                    hedged = True
+
+            # Take the first good answer
+            primary_error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        # A failed primary sends the request to the backup (its bugs still surface as usual)
+                        if task is primary_task:
+                            if not isinstance(e, UpstreamError):
+                                raise
+                            primary_error = e
+                            if not hedged and fetch_backup is not None:
+                                failover = asyncio.ensure_future(self.timed(backup.name, endpoint, fetch_backup))
+                                tasks[failover] = backup
+                                pending.add(failover)
+                        # The backup is only ever a second chance, so anything odd it does is just logged
+                        else:
+                            if not isinstance(e, UpstreamError):
+                                print(f"{PROVIDER_NAMES[backup.name]} backup request for {endpoint} failed: {e!r}")
+                            if primary_error is not None and not hedged:
+                                PROVIDER_FAILOVERS.labels(endpoint, 'failed').inc()
+                        continue
+
+                    # Got one
+                    winner = tasks[task]
+                    if hedged:
+                        PROVIDER_HEDGES.labels(endpoint, winner.name).inc()
+                    elif winner is backup:
+                        PROVIDER_FAILOVERS.labels(endpoint, 'ok').inc()
+                    PROVIDER_ANSWERS.labels(endpoint, winner.name).inc()
+                    return winner, result
+
+            # Nobody could answer (the backup's error, if it had one, is less interesting than why the usual provider failed)
+            raise primary_error
+        finally:
+            # Cancel whoever lost (or everyone, if we were cancelled ourselves), and wait for them to wind down
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.wait(losers)
+
+            # Mark every result we didn't use as seen (a loser that failed in the same round as the winner, or alongside a raised bug, would otherwise
+            # get logged as "Task exception was never retrieved")
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()
+
+    # Function to copy the hedge thresholds into the metrics registry (registered as a collector by the bot)
+    def collect_metrics(self, metrics):
+        for provider, endpoint in self.latency:
+            delay = self.hedge_delay(provider, endpoint)
+            PROVIDER_HEDGE_SECONDS.labels(provider, endpoint).set(-1 if delay is None else delay)
@@ -0,0 +1,81 @@
+# Imports
+import asyncio
+from collections import Counter
+
+# Create class
+class QuoteBatcher:
+
+    # Init method (`fetch_many(ids)` makes one upstream call for a list of ids and returns a dict of id -> quote)
+    def __init__(self, fetch_many, window=0.05, max_batch=100):
+        self.fetch_many = fetch_many
+        self.window = window           # Seconds to keep collecting ids before sending a batch
+        self.max_batch = max_batch     # Send early once this many distinct ids are waiting
+        self.pending = {}              # id -> future for every id waiting on the next batch
+        self.flush_handle = None       # Timer that sends the current batch when the window closes
+        self.tasks = set()             # Running batch requests (held so they don't get garbage collected)
+
+        # Batch size metrics
+        self.batches = 0               # Upstream calls made
+        self.requests = 0              # Quote requests served by those calls (including duplicate ids)
+        self.batch_sizes = Counter()   # Distinct ids per batch -> how many batches had that size
+
+    # Function to queue an id for the next batch and wait for its quote (None if upstream doesn't know the id)
+    async def get(self, coin_id):
+        self.requests += 1
+        future = self.pending.get(coin_id)
+
+        # First request for this id in the current window, so add it to the batch
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self.pending[coin_id] = future
+
+            # Send right away if the batch is full, otherwise make sure the window timer is running
+            if len(self.pending) >= self.max_batch:
+                self.flush()
+            elif self.flush_handle is None:
+                self.flush_handle = loop.call_later(self.window, self.flush)
+
+        return await asyncio.shield(future)
+
+    # Function to send whatever is waiting as one upstream call
+    def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        batch, self.pending = self.pending, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self.run_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    # Function to make the upstream call for one batch and fan the results back out to every waiting command
+    async def run_batch(self, batch):
+        self.batches += 1
+        self.batch_sizes[len(batch)] += 1
+
+        try:
+            results = await self.fetch_many(list(batch))
+        except Exception as e:
+            # Everyone in the batch gets the same error (marked retrieved so asyncio doesn't complain about abandoned waiters)
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+            return
+
+        for coin_id, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(coin_id))
+
+    # Function to summarize the batch size metrics
+    def stats(self) -> dict:
+        total_ids = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            'batches': self.batches,
+            'requests': self.requests,
+            'avg_batch_size': total_ids / self.batches if self.batches else 0.0,
+            'max_batch_size': max(self.batch_sizes, default=0),
+            'batch_sizes': dict(sorted(self.batch_sizes.items())),
+        }
@@ -0,0 +1,91 @@
+# Imports
+import asyncio
+import time
+from collections import OrderedDict
+from utils.cache_backend import BackendError, BackendUnavailableError, encode_entry, shared_fetch
+
+# Create class
+class QuoteCache:
+
+    # Init method (set important variables)
+    def __init__(self, ttl=30, maxsize=1024, backend=None, on_store=None):
+        self.ttl = ttl                 # Seconds a quote stays fresh
+        self.maxsize = maxsize         # Max quotes held before the least recently used one is evicted
+        self.backend = backend         # Optional shared backend (other bot processes' fetches land there too, so a quote is fetched once for the whole cluster)
+        self.on_store = on_store       # Optional `on_store(key, value, fetched_at)` called with every quote stored (e.g. to record it in the price history)
+        self.entries = OrderedDict()   # key -> (value, fetched_at), oldest use first
+        self.in_flight = {}            # key -> future shared by everyone waiting on the same upstream request
+
+        # Simple counters for hit ratio logging
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    # Function to get a quote, calling `fetch()` only if there's no fresh copy and nobody else is already fetching it (returns (value, age in seconds))
+    async def get(self, key, fetch):
+        # Serve a fresh cached quote straight away
+        entry = self.entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], time.monotonic() - entry[1]
+
+        # Someone else is already fetching this key, so just wait on their request
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            value, fetched_at = await asyncio.shield(future)
+            return value, time.monotonic() - fetched_at
+
+        # Otherwise this call does the fetch for everyone
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            if self.backend is None:
+                value, age = await fetch(), 0.0
+            else:
+                value, age = await shared_fetch(self.backend, self.backend_key(key), self.ttl, fetch)
+        except asyncio.CancelledError:
+            # The fetching command got cancelled, so cancel the waiters too
+            future.cancel()
+            raise
+        except Exception as e:
+            # Hand the failure to any waiters too (and mark it retrieved so asyncio doesn't complain when nobody was waiting)
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self.in_flight[key]
+
+        # Store the new quote and evict the least recently used ones past the size bound (a quote from the shared backend keeps its real age)
+        fetched_at = time.monotonic() - age
+        self.set(key, value, fetched_at)
+        future.set_result((value, fetched_at))
+        return value, age
+
+    # Function to get a key's name in the shared backend
+    @staticmethod
+    def backend_key(key) -> str:
+        return 'quote:' + ':'.join(key)
+
+    # Function to hand quotes we fetched some other way to the other processes too (e.g. the alert poller's big refresh; `items` is a list of (key, value))
+    async def share(self, items):
+        if self.backend is None or not items:
+            return
+        try:
+            await self.backend.set_many([(self.backend_key(key), encode_entry(value)) for key, value in items], self.ttl)
+        except BackendUnavailableError:
+            pass # The backend logs when it goes down and comes back
+        except BackendError as e:
+            print(f"Failed to share {len(items)} quotes: {e}")
+
+    # Function to store a quote directly (e.g. one that came back as part of a bigger response)
+    def set(self, key, value, fetched_at=None):
+        fetched_at = time.monotonic() if fetched_at is None else fetched_at
+        self.entries[key] = (value, fetched_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        if self.on_store is not None and value is not None:
+            self.on_store(key, value, fetched_at)
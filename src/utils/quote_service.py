@@ -0,0 +1,119 @@
+# Imports
+import asyncio
+import time
+from utils.api_client import UpstreamError
+from utils.metrics import metrics
+from utils.rate_limiter import BACKGROUND, INTERACTIVE
+from utils.quote_cache import QuoteCache
+from utils.quote_batcher import QuoteBatcher
+from utils.providers import Providers
+
+# Quote metrics (copied over from the cache and batcher counters whenever metrics are read)
+QUOTE_CACHE_REQUESTS = metrics.counter('quote_cache_requests_total', 'Quote cache lookups by result (coalesced = waited on someone else\'s fetch)', ('result',))
+QUOTE_CACHE_ENTRIES = metrics.gauge('quote_cache_entries', 'Quotes currently held in the cache')
+QUOTE_CACHE_HIT_RATIO = metrics.gauge('quote_cache_hit_ratio', 'Share of quote lookups answered without a new upstream request')
+QUOTE_FETCHES_IN_FLIGHT = metrics.gauge('quote_fetches_in_flight', 'Quote keys currently being fetched')
+QUOTE_BATCHES = metrics.counter('quote_batches_total', 'Multi-id upstream calls made by the quote batchers', ('endpoint',))
+QUOTE_BATCHED_REQUESTS = metrics.counter('quote_batched_requests_total', 'Quote requests served through the batchers', ('endpoint',))
+QUOTE_BATCH_AVG_SIZE = metrics.gauge('quote_batch_avg_size', 'Average distinct ids per batched upstream call', ('endpoint',))
+
+# Create class
+class QuoteService:
+
+    # Init method (set important variables)
+    def __init__(self, api_client, ttl=30, maxsize=1024, batch_window=0.05, max_batch=100, backend=None, history=None, providers=None):
+        self.api_client = api_client
+        self.providers = providers or Providers(api_client) # Where quotes come from (CoinGecko, with CoinMarketCap as the backup)
+        self.history = history # Optional PriceHistory every quote we get hold of is recorded into (and that learns which coins people ask about)
+        self.cache = QuoteCache(ttl=ttl, maxsize=maxsize, backend=backend, on_store=self.record if history is not None else None)
+
+        # One micro-batcher per endpoint (both endpoints take a comma-separated `ids` list)
+        self.max_batch = max_batch
+        self.markets_batcher = QuoteBatcher(self.fetch_markets, window=batch_window, max_batch=max_batch)
+        self.simple_batcher = QuoteBatcher(self.fetch_simple, window=batch_window, max_batch=max_batch)
+
+    # Function to fetch /coins/markets rows for many ids in one call (returns a dict of id -> row)
+    async def fetch_markets(self, coin_ids, priority=INTERACTIVE):
+        return await self.providers.markets(coin_ids, priority=priority)
+
+    # Function to fetch /simple/price entries for many ids in one call (returns a dict of id -> entry)
+    async def fetch_simple(self, coin_ids, priority=INTERACTIVE):
+        return await self.providers.simple(coin_ids, priority=priority)
+
+    # Function to record a quote that just went into the cache in the price history (markets rows and simple entries keep the USD price in different places)
+    def record(self, key, value, fetched_at):
+        endpoint, coin_id = key
+        price = value.get('current_price') if endpoint == 'markets' else value.get('usd')
+        self.history.record(coin_id, price, time.time() - (time.monotonic() - fetched_at))
+
+    # Function to get a coin's /coins/markets row through the cache (returns (row or None, age in seconds); raises UpstreamError)
+    async def get_market(self, coin_id):
+        if self.history is not None:
+            self.history.want(coin_id)
+        return await self.cache.get(('markets', coin_id), lambda: self.markets_batcher.get(coin_id))
+
+    # Function to get a coin's /simple/price entry (price + 24h volume) through the cache (returns (entry or None, age in seconds); raises UpstreamError)
+    async def get_simple(self, coin_id):
+        if self.history is not None:
+            self.history.want(coin_id)
+        return await self.cache.get(('simple', coin_id), lambda: self.simple_batcher.get(coin_id))
+
+    # Function to get many coins' quotes at once through the cache (fresh ones straight away, every stale one in a single comma-joined `ids` call;
+    # returns a dict of id -> (row/entry or None, age in seconds); raises UpstreamError)
+    async def get_many(self, endpoint, coin_ids):
+        batcher = self.markets_batcher if endpoint == 'markets' else self.simple_batcher
+        if self.history is not None:
+            for coin_id in coin_ids:
+                self.history.want(coin_id)
+        lookups = [asyncio.ensure_future(self.cache.get((endpoint, coin_id), lambda coin_id=coin_id: batcher.get(coin_id))) for coin_id in coin_ids]
+
+        # Send the batch as soon as every lookup has had its turn to join it (we already know the whole list, so there's no point waiting out the batching window)
+        asyncio.get_running_loop().call_soon(batcher.flush)
+
+        # Every id in the batch shares the same error if it fails (waiting on all of them, so none of the failures go unretrieved)
+        results = await asyncio.gather(*lookups, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return dict(zip(coin_ids, results))
+
+    # Function to fetch fresh /simple/price entries for any number of ids in as few calls as possible, in the background (fills the cache for commands too; returns a dict of id -> entry, leaving out ids whose batch failed)
+    async def refresh_simple(self, coin_ids, priority=BACKGROUND):
+        chunks = [coin_ids[i:i + self.max_batch] for i in range(0, len(coin_ids), self.max_batch)]
+        results = await asyncio.gather(*(self.fetch_simple(chunk, priority=priority) for chunk in chunks), return_exceptions=True)
+
+        quotes = {}
+        shared = []
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, UpstreamError):
+                print(f"Failed to refresh {len(chunk)} quotes. Status code: {result.status}")
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            for coin_id in chunk:
+                quote = result.get(coin_id)
+                self.cache.set(('simple', coin_id), quote)
+                shared.append((('simple', coin_id), quote))
+                if quote is not None:
+                    quotes[coin_id] = quote
+
+        # Other bot processes can answer !vol24 from these too
+        await self.cache.share(shared)
+        return quotes
+
+    # Function to copy the cache and batcher counters into the metrics registry (registered as a collector by the bot)
+    def collect_metrics(self, metrics):
+        cache = self.cache
+        QUOTE_CACHE_REQUESTS.labels('hit').value = cache.hits
+        QUOTE_CACHE_REQUESTS.labels('miss').value = cache.misses
+        QUOTE_CACHE_REQUESTS.labels('coalesced').value = cache.coalesced
+        QUOTE_CACHE_ENTRIES.labels().set(len(cache.entries))
+        QUOTE_FETCHES_IN_FLIGHT.labels().set(len(cache.in_flight))
+        total = cache.hits + cache.misses + cache.coalesced
+        QUOTE_CACHE_HIT_RATIO.labels().set((cache.hits + cache.coalesced) / total if total else 0.0)
+
+        for endpoint, batcher in (('markets', self.markets_batcher), ('simple', self.simple_batcher)):
+            stats = batcher.stats()
+            QUOTE_BATCHES.labels(endpoint).value = stats['batches']
+            QUOTE_BATCHED_REQUESTS.labels(endpoint).value = stats['requests']
+            QUOTE_BATCH_AVG_SIZE.labels(endpoint).set(stats['avg_batch_size'])
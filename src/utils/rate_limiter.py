@@ -0,0 +1,118 @@
+# Imports
+import asyncio
+import heapq
+import itertools
+import time
+
+# Request priorities (lower goes first): commands a user is waiting on beat background refreshes
+INTERACTIVE = 0
+BACKGROUND = 10
+
+# Create class
+class TokenBucket:
+
+    # Init method (`rate` tokens are added per second, up to `capacity` banked for bursts)
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0        # Set from Retry-After; no tokens are handed out before this
+
+    # Function to top the bucket up for the time that has passed
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Function to get the seconds until a token can be taken (0 if one is available right now)
+    def wait_time(self) -> float:
+        self.refill()
+        paused = self.paused_until - time.monotonic()
+        short = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        return max(paused, short, 0.0)
+
+    # Function to take a token (only call after wait_time() returned 0)
+    def take(self):
+        self.tokens -= 1
+
+    # Function to stop handing out tokens for a while (upstream told us to back off), and drain the burst allowance so we restart gently
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = min(self.tokens, 0)
+
+# Error raised when a request can't even be queued because the queue is already full
+class QueueFullError(Exception):
+
+    # Init method (keep the provider and the expected wait around for the caller)
+    def __init__(self, provider, wait):
+        super().__init__(f"Request queue for {provider} is full")
+        self.provider = provider
+        self.wait = wait
+
+# Create class
+class RequestScheduler:
+
+    # Init method (one scheduler per upstream provider; background work may only fill the queue up to `interactive_reserve` short of `max_queue`, so the
+    # alert poller and the samplers can never leave a user's command without a place in line)
+    def __init__(self, name, rate, capacity, max_queue=100, interactive_reserve=None):
+        self.name = name
+        self.bucket = TokenBucket(rate, capacity)
+        self.max_queue = max_queue     # Interactive requests allowed to wait before new ones fail fast
+        self.interactive_reserve = max(1, max_queue // 4) if interactive_reserve is None else interactive_reserve
+        self.queue = []                # Heap of (priority, order, future) for every waiting request
+        self.interactive = 0           # How many of those are interactive
+        self.order = itertools.count() # Tie-breaker so equal priorities are first come, first served
+        self.dispatcher = None         # Task handing tokens to the queue (only runs while something is waiting)
+
+    # Function to wait for permission to make one upstream request (raises QueueFullError straight away if the queue is full)
+    async def acquire(self, priority=INTERACTIVE):
+        # Fast path: nobody waiting and a token is ready
+        if not self.queue and self.bucket.wait_time() == 0:
+            self.bucket.take()
+            return
+
+        # Fail fast instead of letting the backlog grow without bound (interactive requests only count each other, background ones count everyone and stop short of the reserve)
+        if priority <= INTERACTIVE:
+            if self.interactive >= self.max_queue:
+                raise QueueFullError(self.name, self.bucket.wait_time())
+            self.interactive += 1
+        elif len(self.queue) >= self.max_queue - self.interactive_reserve:
+            raise QueueFullError(self.name, self.bucket.wait_time())
+
+        # Queue up and wait for the dispatcher to hand us a token
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queue, (priority, next(self.order), future))
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.create_task(self.dispatch())
+        await future
+
+    # Function to hand out tokens to the waiting requests, highest priority first
+    async def dispatch(self):
+        while self.queue:
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            priority, _, future = heapq.heappop(self.queue)
+            if priority <= INTERACTIVE:
+                self.interactive -= 1
+
+            # Skip requests whose command gave up (e.g. got cancelled) while waiting
+            if future.done():
+                continue
+            self.bucket.take()
+            future.set_result(None)
+
+    # Function to back off after upstream rate limited us
+    def backoff(self, seconds):
+        self.bucket.pause(seconds)
+
+    # Function to summarize the scheduler's current state
+    def stats(self) -> dict:
+        wait = self.bucket.wait_time()
+        return {
+            'queue_depth': len(self.queue),
+            'tokens': round(self.bucket.tokens, 2),
+            'wait_seconds': round(wait, 2),
+        }
@@ -0,0 +1,77 @@
+# Imports
+import os
+import struct
+import zlib
+
+# File layout: fixed header (magic, format version, row count, column count, payload crc32, payload length), then one length-prefixed utf-8 blob per column
+SNAPSHOT_MAGIC = b'CBRG'
+SNAPSHOT_VERSION = 2             # 2: missing values are stored as NONE_VALUE instead of ''
+HEADER = struct.Struct('<4sHIHIQ')
+COLUMN_LENGTH = struct.Struct('<I')
+
+# Column order matches the /coins/list payload
+COLUMNS = ('id', 'symbol', 'name')
+
+# Separator between the values in a column blob, and what a missing (None) value is stored as (neither can show up in a coin's id, symbol or name)
+SEPARATOR = '\x00'
+NONE_VALUE = '\x01'
+
+# Function to write the registry columns to disk atomically (readers only ever see the old file or the complete new one)
+def save_snapshot(path, ids, symbols, names):
+    # Build the columnar payload
+    payload = bytearray()
+    for column in (ids, symbols, names):
+        blob = SEPARATOR.join(NONE_VALUE if value is None else str(value).replace(SEPARATOR, '').replace(NONE_VALUE, '') for value in column).encode('utf-8')
+        payload += COLUMN_LENGTH.pack(len(blob))
+        payload += blob
+
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(ids), len(COLUMNS), zlib.crc32(payload), len(payload))
+
+    # Write next to the real file, flush it to disk, then swap it into place
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(header)
+        file.write(payload)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+# Function to read the registry columns back (returns a dict of column name -> list of values, or None if the file is missing, unreadable, from another version,
+# or corrupt; the caller fetches the registry from the network instead, so nothing in here may raise)
+def load_snapshot(path):
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+    try:
+        return decode_snapshot(data)
+    except (struct.error, UnicodeDecodeError, ValueError):
+        return None
+
+# Function to decode a snapshot file's bytes (None if they aren't a complete snapshot of this version; may raise on a payload that passed the crc but still doesn't decode)
+def decode_snapshot(data):
+    # Check the header before trusting anything else in the file
+    if len(data) < HEADER.size:
+        return None
+    magic, version, rows, column_count, checksum, length = HEADER.unpack_from(data)
+    payload = memoryview(data)[HEADER.size:]
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or column_count != len(COLUMNS) or len(payload) != length or zlib.crc32(payload) != checksum:
+        return None
+
+    # Split each column blob back into its values
+    columns = {}
+    offset = 0
+    for column in COLUMNS:
+        (size,) = COLUMN_LENGTH.unpack_from(payload, offset)
+        offset += COLUMN_LENGTH.size
+        blob = bytes(payload[offset:offset + size]).decode('utf-8')
+        offset += size
+        columns[column] = [None if value == NONE_VALUE else value for value in blob.split(SEPARATOR)] if rows else []
+
+        # Every column has to line up with the row count
+        if len(columns[column]) != rows:
+            return None
+
+    return columns
@@ -0,0 +1,52 @@
+# Imports
+from collections import OrderedDict
+from utils.metrics import metrics
+
+# Render cache metrics (copied over from the cache counters whenever metrics are read)
+RENDER_CACHE_REQUESTS = metrics.counter('render_cache_requests_total', 'Embed render cache lookups by result', ('result',))
+RENDER_CACHE_ENTRIES = metrics.gauge('render_cache_entries', 'Rendered embeds currently held in the cache')
+
+# Function to get a copy of a (cached) embed with a footer on it, for sending (the cached one stays footer-less for the next answer)
+def with_footer(embed, text):
+    embed = embed.copy()
+    embed.set_footer(text=text)
+    return embed
+
+# Create class (rendered answer embeds, reused while the quotes they were rendered from stay the same; least recently used ones are evicted past `maxsize`)
+# An entry's version is the exact quote objects it came from (every fetch, shared or local, hands out new ones, so a changed quote can never match). Anything that
+# changes while the quotes don't, like the quote age in the footer, is left off the cached embed and added to a copy on every send (see with_footer).
+# Cached embeds are shared between answers, so nobody may change one after it's been put in.
+class RenderCache:
+
+    # Init method (set important variables)
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()     # key -> (quotes, embed), oldest use first
+
+        # Simple counters for hit ratio logging
+        self.hits = 0
+        self.misses = 0
+
+    # Function to get the embed rendered for `key` from exactly these quotes (None if there isn't one, or it came from older quotes)
+    def get(self, key, quotes):
+        entry = self.entries.get(key)
+        if entry is None or len(entry[0]) != len(quotes) or any(old is not new for old, new in zip(entry[0], quotes)):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    # Function to store a freshly rendered embed (replaces whatever was rendered for `key` from older quotes; returns the embed)
+    def put(self, key, quotes, embed):
+        self.entries[key] = (tuple(quotes), embed)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return embed
+
+    # Function to copy the cache counters into the metrics registry (registered as a collector by the bot)
+    def collect_metrics(self, metrics):
+        RENDER_CACHE_REQUESTS.labels('hit').value = self.hits
+        RENDER_CACHE_REQUESTS.labels('miss').value = self.misses
+        RENDER_CACHE_ENTRIES.labels().set(len(self.entries))
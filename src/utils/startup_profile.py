@@ -0,0 +1,48 @@
+# Imports
+import time
+from contextlib import contextmanager
+from utils.metrics import metrics
+
+# Startup metrics (seconds each phase took on this process's last start)
+STARTUP_PHASE_SECONDS = metrics.gauge('startup_phase_seconds', 'Seconds each startup phase took', ('phase',))
+
+# Create class (records when each startup phase ran, so overlapping phases show up as overlapping; printed by `bot.py --profile-startup`)
+class StartupProfile:
+
+    # Init method (`started` is the perf_counter() reading everything is measured from, taken before the bot's imports)
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases = {}                 # phase name -> (start, end) in perf_counter() seconds
+
+    # Function to note a phase that ran from `start` to `end` (now if not given)
+    def mark(self, name, start, end=None):
+        end = time.perf_counter() if end is None else end
+        self.phases[name] = (start, end)
+        STARTUP_PHASE_SECONDS.labels(name).set(end - start)
+
+    # Function to time the code inside a `with` block as one phase (works around awaits too)
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name, start)
+
+    # Function to time a coroutine as one phase (so concurrent phases can be gathered)
+    async def timed(self, name, coro):
+        with self.phase(name):
+            return await coro
+
+    # Seconds from the start of the profile until now
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    # Function to lay the phases out in the order they started (offsets are from the start of the profile, so concurrent phases overlap)
+    def report(self) -> str:
+        lines = ["Startup profile (ms since start):"]
+        width = max((len(name) for name in self.phases), default=0)
+        for name, (start, end) in sorted(self.phases.items(), key=lambda item: item[1][0]):
+            lines.append(f"  {name:<{width}}  {(start - self.started) * 1000:7.1f} -> {(end - self.started) * 1000:7.1f}  {(end - start) * 1000:7.1f} ms")
+        lines.append(f"  {'ready':<{width}}  {self.elapsed() * 1000:7.1f} ms")
+        return '\n'.join(lines)
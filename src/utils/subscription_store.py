@@ -0,0 +1,245 @@
+# Imports
+import asyncio
+import os
+import sqlite3
+import time
+
+# Schema (user and coin lookups both have an index; watchlists and preferences are keyed by user, so they're stored clustered by user)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    alert_id   INTEGER PRIMARY KEY,
+    user_id    INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    coin_id    TEXT    NOT NULL,
+    direction  INTEGER NOT NULL,
+    threshold  REAL    NOT NULL,
+    created_at REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_by_user ON alerts (user_id);
+CREATE INDEX IF NOT EXISTS alerts_by_coin ON alerts (coin_id);
+
+CREATE TABLE IF NOT EXISTS alert_changes (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    alert_id   INTEGER NOT NULL,
+    changed_at REAL    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS watchlist (
+    user_id  INTEGER NOT NULL,
+    coin_id  TEXT    NOT NULL,
+    added_at REAL    NOT NULL,
+    PRIMARY KEY (user_id, coin_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS watchlist_by_coin ON watchlist (coin_id);
+
+CREATE TABLE IF NOT EXISTS preferences (
+    user_id INTEGER NOT NULL,
+    key     TEXT    NOT NULL,
+    value   TEXT,
+    PRIMARY KEY (user_id, key)
+) WITHOUT ROWID;
+"""
+
+# Write statements (queued writes are grouped by statement and run with executemany)
+SAVE_ALERT = "INSERT OR REPLACE INTO alerts (alert_id, user_id, channel_id, coin_id, direction, threshold, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)"
+DELETE_ALERT = "DELETE FROM alerts WHERE alert_id = ?"
+LOG_ALERT_CHANGE = "INSERT INTO alert_changes (alert_id, changed_at) VALUES (?, ?)"
+ADD_WATCH = "INSERT OR IGNORE INTO watchlist (user_id, coin_id, added_at) VALUES (?, ?, ?)"
+REMOVE_WATCH = "DELETE FROM watchlist WHERE user_id = ? AND coin_id = ?"
+SET_PREFERENCE = "INSERT OR REPLACE INTO preferences (user_id, key, value) VALUES (?, ?, ?)"
+DELETE_PREFERENCE = "DELETE FROM preferences WHERE user_id = ? AND key = ?"
+
+# Create class (SQLite in WAL mode; writes are queued in memory and committed in batches on a worker thread, so the event loop never waits on the disk)
+class SubscriptionStore:
+
+    # Init method (`flush_interval` is the most seconds a write sits in memory; a full batch of `max_batch` writes goes out straight away;
+    # `changelog` also logs which alerts changed, so other bot processes sharing the database can catch up with alert_changes())
+    def __init__(self, path, flush_interval=1.0, max_batch=5000, changelog=False):
+        self.path = path
+        self.changelog = changelog
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.connection = None
+        self.pending = []                # Queued (statement, params) writes, in order
+        self.lock = asyncio.Lock()       # One batch (or read) on the connection at a time
+        self.wake = asyncio.Event()      # Set when a batch fills up early
+        self.flusher = None              # Background task committing the queue
+        self.stopping = False            # Set by close(), so the flusher finishes its current batch and stops instead of being cancelled mid-write
+
+        # Simple counters for logging
+        self.batches = 0
+        self.writes = 0
+
+    # Function to open the database and make sure the schema exists (runs on a worker thread)
+    async def open(self):
+        if self.connection is None:
+            self.connection = await asyncio.to_thread(self.connect)
+
+    # Function to connect and set the database up (WAL lets reads carry on while a batch commits; NORMAL sync is durable across app crashes, which is what a bot restart is)
+    def connect(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.executescript(SCHEMA)
+        return connection
+
+    # Function to start the background flusher
+    def start(self):
+        if self.flusher is None or self.flusher.done():
+            self.stopping = False
+            self.flusher = asyncio.create_task(self.flush_loop())
+
+    # Function to commit queued writes every flush_interval (or as soon as a batch fills up)
+    async def flush_loop(self):
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            try:
+                await self.flush()
+            except sqlite3.Error as e:
+                print(f"Failed to save subscriptions (will retry): {e}")
+
+    # Function to queue a write (cheap and synchronous, so it's fine to call from a command)
+    def queue(self, statement, params):
+        self.pending.append((statement, params))
+        if len(self.pending) >= self.max_batch:
+            self.wake.set()
+
+    # Function to commit everything queued so far, off the event loop (one transaction per max_batch writes, so a big backlog never holds the connection for long)
+    async def flush(self):
+        async with self.lock:
+            if not self.pending or self.connection is None:
+                return
+            backlog, self.pending = self.pending, []
+            for start in range(0, len(backlog), self.max_batch):
+                batch = backlog[start:start + self.max_batch]
+                write = asyncio.ensure_future(asyncio.to_thread(self.write_batch, batch))
+                try:
+                    await asyncio.shield(write)
+                except asyncio.CancelledError:
+                    # The worker thread can't be stopped, so let it finish while we still hold the lock (nothing else may use the connection meanwhile),
+                    # and only put back what it didn't write
+                    await asyncio.wait([write])
+                    self.pending[:0] = backlog[start:] if write.exception() is not None else backlog[start + len(batch):]
+                    raise
+                except BaseException:
+                    # Put the unwritten writes back in front of anything queued meanwhile, so nothing is lost or reordered
+                    self.pending[:0] = backlog[start:]
+                    raise
+                self.batches += 1
+                self.writes += len(batch)
+
+    # Function to write one batch (runs on a worker thread; consecutive writes using the same statement go through executemany together)
+    def write_batch(self, batch):
+        connection = self.connection
+        connection.execute("BEGIN")
+        try:
+            run_statement, run_params = None, []
+            for statement, params in batch:
+                if statement != run_statement and run_params:
+                    connection.executemany(run_statement, run_params)
+                    run_params = []
+                run_statement = statement
+                run_params.append(params)
+            if run_params:
+                connection.executemany(run_statement, run_params)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    # Function to flush and close the database (on shutdown; the flusher is told to stop and waited for, not cancelled, so its batch is never cut off halfway)
+    async def close(self):
+        if self.flusher is not None:
+            self.stopping = True
+            self.wake.set()
+            await self.flusher
+            self.flusher = None
+        if self.connection is not None:
+            await self.flush()
+            async with self.lock:
+                await asyncio.to_thread(self.connection.close)
+            self.connection = None
+
+    # Function to run a read query on a worker thread (flushes queued writes first, so reads always see them)
+    async def read(self, query, params=()):
+        await self.flush()
+        async with self.lock:
+            return await asyncio.to_thread(lambda: self.connection.execute(query, params).fetchall())
+
+    # Function to stream a query's rows in chunks (the whole result is never held in memory at once; yields lists of up to `chunk_size` rows)
+    async def stream(self, query, params=(), chunk_size=1000):
+        await self.flush()
+        async with self.lock:
+            cursor = await asyncio.to_thread(self.connection.execute, query, params)
+            try:
+                while True:
+                    rows = await asyncio.to_thread(cursor.fetchmany, chunk_size)
+                    if not rows:
+                        return
+                    yield rows
+            finally:
+                cursor.close()
+
+    # Alerts
+    def save_alert(self, alert):
+        self.queue(SAVE_ALERT, (alert.alert_id, alert.user_id, alert.channel_id, alert.coin_id, alert.direction, alert.threshold, time.time()))
+        if self.changelog:
+            self.queue(LOG_ALERT_CHANGE, (alert.alert_id, time.time()))
+
+    def delete_alert(self, alert_id):
+        self.queue(DELETE_ALERT, (alert_id,))
+        if self.changelog:
+            self.queue(LOG_ALERT_CHANGE, (alert_id, time.time()))
+
+    # Function to get the latest changelog position (where a fresh load starts catching up from)
+    async def last_alert_change(self) -> int:
+        return (await self.read("SELECT COALESCE(MAX(seq), 0) FROM alert_changes"))[0][0]
+
+    # Function to get every alert changed after changelog position `seq`, as it is now (seq, alert_id, user_id, channel_id, coin_id, direction, threshold; the rest are None if it's gone)
+    async def alert_changes(self, seq) -> list:
+        return await self.read("SELECT c.seq, c.alert_id, a.user_id, a.channel_id, a.coin_id, a.direction, a.threshold FROM alert_changes c "
+                               "LEFT JOIN alerts a ON a.alert_id = c.alert_id WHERE c.seq > ? ORDER BY c.seq", (seq,))
+
+    # Function to forget changelog entries older than `max_age` seconds (every process has long caught up with them)
+    def prune_alert_changes(self, max_age):
+        self.queue("DELETE FROM alert_changes WHERE changed_at < ?", (time.time() - max_age,))
+
+    # Function to stream every alert as (alert_id, user_id, channel_id, coin_id, direction, threshold) chunks
+    def stream_alerts(self, chunk_size=1000):
+        return self.stream("SELECT alert_id, user_id, channel_id, coin_id, direction, threshold FROM alerts ORDER BY alert_id", chunk_size=chunk_size)
+
+    async def alerts_for_user(self, user_id) -> list:
+        return await self.read("SELECT alert_id, user_id, channel_id, coin_id, direction, threshold FROM alerts WHERE user_id = ? ORDER BY alert_id", (user_id,))
+
+    async def alerts_for_coin(self, coin_id) -> list:
+        return await self.read("SELECT alert_id, user_id, channel_id, coin_id, direction, threshold FROM alerts WHERE coin_id = ?", (coin_id,))
+
+    # Watchlists
+    def add_watch(self, user_id, coin_id):
+        self.queue(ADD_WATCH, (user_id, coin_id, time.time()))
+
+    def remove_watch(self, user_id, coin_id):
+        self.queue(REMOVE_WATCH, (user_id, coin_id))
+
+    async def watchlist(self, user_id) -> list:
+        return [coin_id for (coin_id,) in await self.read("SELECT coin_id FROM watchlist WHERE user_id = ? ORDER BY added_at", (user_id,))]
+
+    async def watchers(self, coin_id) -> list:
+        return [user_id for (user_id,) in await self.read("SELECT user_id FROM watchlist WHERE coin_id = ?", (coin_id,))]
+
+    # Preferences (values are stored as text; callers convert)
+    def set_preference(self, user_id, key, value):
+        if value is None:
+            self.queue(DELETE_PREFERENCE, (user_id, key))
+        else:
+            self.queue(SET_PREFERENCE, (user_id, key, str(value)))
+
+    async def preferences(self, user_id) -> dict:
+        return dict(await self.read("SELECT key, value FROM preferences WHERE user_id = ?", (user_id,)))
@@ -0,0 +1,104 @@
+# Imports
+import asyncio
+import time
+from utils.cache_backend import BackendError, BackendUnavailableError, encode_entry, shared_fetch
+from utils.formatting import format_market_caps, format_prices
+from utils.providers import Providers
+from utils.rate_limiter import BACKGROUND, INTERACTIVE
+
+# Create class (in-memory snapshot of the top CMC listings by market cap, so !topcap only waits on the api the first time; kept fresh only while it's being used)
+class TopListings:
+
+    # Init method (set important variables)
+    def __init__(self, api_client, size=200, backend=None, share_ttl=900, providers=None):
+        self.api_client = api_client
+        self.providers = providers or Providers(api_client) # Where the listings come from (CoinMarketCap, with CoinGecko as the backup)
+        self.size = size                 # How many listings the snapshot holds (!topcap can ask for up to this many; CMC charges 1 credit per 200 per refresh)
+        self.backend = backend           # Optional shared backend (the first bot process to refresh publishes its snapshot there for the others)
+        self.share_ttl = share_ttl       # Seconds a snapshot is good for (shared or not; the scheduled refresh leaves it alone until then)
+        self.share_key = f'top_listings:v2:{size}' # Shared snapshots say who they came from since v2 (older processes' bare row lists live under the old key)
+        self.fetched_at = None           # When the current snapshot was fetched (None until the first fetch)
+        self.used_at = None              # When !topcap last read the snapshot (the scheduled refresh skips it if nobody has since the last fetch)
+        self.lock = asyncio.Lock()       # Only one refresh at a time (everyone else waits for it)
+
+        # Pre-formatted embed rows, in rank order: (name field, value field), and who they came from
+        self.rows = []
+        self.source = None
+
+    # Seconds since the snapshot was fetched (None if it never was)
+    def age(self):
+        return None if self.fetched_at is None else time.monotonic() - self.fetched_at
+
+    # Function to refresh the snapshot (from the shared backend if another process fetched one recently, unless forced; raises UpstreamError if the request was not successful)
+    async def refresh(self, priority=BACKGROUND, force=False):
+        if self.backend is None or force:
+            (source, rows), age = await self.fetch_rows(priority), 0.0
+            await self.share((source, rows))
+        else:
+            (source, rows), age = await shared_fetch(self.backend, self.share_key, self.share_ttl, lambda: self.fetch_rows(priority))
+            rows = [tuple(row) for row in rows]
+
+        # Swap the new snapshot in all at once
+        self.rows, self.source = rows, source
+        self.fetched_at = time.monotonic() - age
+        print(f"Top listings refresh successful. {len(rows)} coins from {source}{f' (shared, {age:.0f}s old)' if age else ''}.")
+
+    # Function to hand a fresh snapshot (and who it came from) to the other bot processes
+    async def share(self, snapshot):
+        if self.backend is None:
+            return
+        try:
+            await self.backend.set(self.share_key, encode_entry(snapshot), self.share_ttl)
+        except BackendUnavailableError:
+            pass # The backend logs when it goes down and comes back
+        except BackendError as e:
+            print(f"Failed to share the top listings: {e}")
+
+    # Function to fetch the top listings and pre-format every row (returns (provider name, rows); raises UpstreamError if neither provider could answer)
+    async def fetch_rows(self, priority=BACKGROUND):
+        # Fetch cryptocurrencies sorted by market cap, with their prices in USD
+        source, listings = await self.providers.listings(self.size, priority=priority)
+
+        # Format every coin's price and market cap in one go, then build the embed rows
+        prices = format_prices([coin['price'] for coin in listings])
+        market_caps = format_market_caps([coin['market_cap'] for coin in listings])
+        return source, [(f"{coin['rank']}. {coin['name']} ({coin['symbol']})", f"Price: {price}\nMarket Cap: {market_cap}")
+                        for coin, price, market_cap in zip(listings, prices, market_caps)]
+
+    # Function to make sure there's a snapshot to serve (only waits on the api if there's nothing at all yet; a failed refresh keeps the old snapshot)
+    async def ensure_loaded(self):
+        if self.rows:
+            return
+        async with self.lock:
+            # Someone else may have loaded it while we waited on the lock
+            if self.rows:
+                return
+            await self.refresh(priority=INTERACTIVE)
+
+    # Function to check whether the scheduled refresh should spend credits (only on a snapshot that's stale and that someone has read since it was fetched)
+    def wanted(self) -> bool:
+        age = self.age()
+        return age is not None and age >= self.share_ttl and self.used_at is not None and self.used_at >= self.fetched_at
+
+    # Function to refresh the snapshot on the bot's schedule if it's wanted (never raises; a failed refresh keeps serving the old snapshot, just with a growing age)
+    async def scheduled_refresh(self):
+        if not self.wanted():
+            return
+        async with self.lock:
+            # Someone may have refreshed it while we waited on the lock
+            if not self.wanted():
+                return
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Top listings refresh failed, keeping the old snapshot. Error: {e!r}")
+
+    # Function to refresh right now, ahead of anything queued in the background (for owners; raises UpstreamError so the caller can report it)
+    async def force_refresh(self):
+        async with self.lock:
+            await self.refresh(priority=INTERACTIVE, force=True)
+
+    # Function to get the top `number` rows (slice of the snapshot; may be shorter if upstream returned fewer; also notes that the snapshot is in use)
+    def top(self, number):
+        self.used_at = time.monotonic()
+        return self.rows[:number]
@@ -0,0 +1,46 @@
+# Equivalence tests for utils.formatting (run from the repo root: `python -m pytest tests`)
+# The fast price formatter must stay byte-identical to the original Decimal implementation, on a seeded random sample that hits every branch plus the edge values.
+
+# Imports
+import math
+import os
+import random
+import sys
+
+# Make `utils` importable the same way bot.py sees it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from utils.formatting import format_crypto_price, format_crypto_price_exact, format_prices
+
+# Number of random values per generator (a few seconds' worth; the seed keeps every run the same)
+SAMPLES = 20000
+
+# Values right on the branch boundaries, plus the odd ones (None, denormals, past float precision)
+EDGES = (0.0, 0.01, 1.0, math.nextafter(0.01, 0), math.nextafter(1.0, 0), 1e12, math.nextafter(1e12, 0), 2**53, 2**53 + 1, 1e-300, 5e-324, None)
+
+# Function to generate values that hit every branch (log-uniform magnitudes, short decimal reprs, exact half-cent ties, ints)
+def generate(rng):
+    for _ in range(SAMPLES):
+        yield 10 ** rng.uniform(-20, 13)
+        yield round(10 ** rng.uniform(-4, 12), rng.randint(0, 6))
+        yield float(f"{rng.randint(1, 10**9)}.{rng.randint(0, 99):02d}5")
+        yield float(f"0.{rng.randint(100, 9999):04d}")
+        yield rng.randint(0, 2**60)
+
+# Function to format a value with one of the formatters (an exception counts as its type, so both have to fail the same way too)
+def outcome(formatter, value):
+    try:
+        return formatter(value)
+    except Exception as e:
+        return type(e)
+
+def test_random_values_match_original():
+    for value in generate(random.Random(1234)):
+        assert outcome(format_crypto_price, value) == outcome(format_crypto_price_exact, value), value
+
+def test_edge_values_match_original():
+    for value in EDGES:
+        assert outcome(format_crypto_price, value) == outcome(format_crypto_price_exact, value), value
+
+def test_batch_matches_one_at_a_time():
+    values = [value for value in generate(random.Random(99))][:5000] + [value for value in EDGES if value is not None]
+    assert format_prices(values) == [format_crypto_price_exact(value) for value in values]